@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+PPUC Journal-Analyse
+Lädt die Schalter-Ereignisse aufgezeichneter Journale (ppuc_journal) per
+Memory-Mapping als NumPy-Spalten und wertet sie vektorisiert aus:
+Aktivierungen, Intervalle zwischen Flanken, Prellen, Raten, tote Schalter.
+
+Benötigt NumPy (pip install numpy).
+
+Verwendung:
+    python3 ppuc_analysis.py spiel1.ppj [spiel2.ppj ...] [--config elektra.yml] [--bounce-ms 5]
+"""
+
+import argparse
+import os
+from typing import Iterable, Optional, Sequence
+
+from ppuc_journal import HEADER_SIZE, JOURNAL_SWITCH, RECORD_SIZE, JournalReader
+
+# Standard-Grenze für Prellen: Flanken desselben Schalters in kürzerem Abstand
+DEFAULT_BOUNCE_NS = 5_000_000
+
+
+def _numpy():
+    """Importiert NumPy erst bei Bedarf."""
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("Die Journal-Analyse benötigt NumPy (pip install numpy)") from e
+    return numpy
+
+
+def _record_dtype(np):
+    """NumPy-Gegenstück zu den 16-Byte-Einträgen des Journals."""
+    dtype = np.dtype([('t_ns', '<u8'), ('kind', 'u1'), ('state', 'u1'), ('number', '<u2'), ('seq', '<u4')])
+    assert dtype.itemsize == RECORD_SIZE
+    return dtype
+
+
+class SwitchColumns:
+    """
+    Schalter-Ereignisse als Spalten gleicher Länge.
+
+    Attributes:
+        number: uint16, Schalter-Nummer
+        state: uint8, 1 = geschlossen, 0 = offen
+        t_ns: uint64, ns seit Beginn der jeweiligen Aufnahme
+        session: uint32, Index des Journals in paths
+        durations_ns: Dauer jeder Aufnahme (Index = session)
+    """
+
+    def __init__(self, number, state, t_ns, session, durations_ns, paths):
+        self.number = number
+        self.state = state
+        self.t_ns = t_ns
+        self.session = session
+        self.durations_ns = durations_ns
+        self.paths = list(paths)
+
+    def __len__(self) -> int:
+        return len(self.number)
+
+    @property
+    def total_duration_ns(self) -> int:
+        return int(self.durations_ns.sum())
+
+
+def load_switch_events(paths: Iterable[str]) -> SwitchColumns:
+    """
+    Lädt die Schalter-Ereignisse eines oder mehrerer Journale.
+
+    Die Journale werden per np.memmap eingeblendet; pro Journal entstehen
+    nur die gefilterten Spalten, keine Python-Objekte pro Ereignis.
+    """
+    np = _numpy()
+    dtype = _record_dtype(np)
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    paths = list(paths)
+
+    numbers, states, times, sessions, durations = [], [], [], [], []
+    for session, path in enumerate(paths):
+        with JournalReader(path) as reader:
+            count = len(reader)
+            duration = reader.duration_ns
+        durations.append(duration)
+        if not count:
+            continue
+        records = np.memmap(path, dtype=dtype, mode='r', offset=HEADER_SIZE, shape=(count,))
+        mask = records['kind'] == JOURNAL_SWITCH
+        numbers.append(records['number'][mask])
+        states.append(records['state'][mask])
+        times.append(records['t_ns'][mask])
+        sessions.append(np.full(len(numbers[-1]), session, dtype=np.uint32))
+        del records
+
+    def join(columns, column_dtype):
+        return np.concatenate(columns) if columns else np.empty(0, dtype=column_dtype)
+
+    return SwitchColumns(join(numbers, np.uint16), join(states, np.uint8), join(times, np.uint64),
+                         join(sessions, np.uint32), np.asarray(durations, dtype=np.uint64), paths)
+
+
+def activation_counts(columns: SwitchColumns, minlength: int = 0):
+    """Anzahl der Schließ-Flanken pro Schalter-Nummer (Index = Nummer)."""
+    np = _numpy()
+    return np.bincount(columns.number[columns.state == 1], minlength=minlength)
+
+
+def edge_counts(columns: SwitchColumns, minlength: int = 0):
+    """Anzahl aller Flanken pro Schalter-Nummer (Index = Nummer)."""
+    np = _numpy()
+    return np.bincount(columns.number, minlength=minlength)
+
+
+def edge_intervals(columns: SwitchColumns):
+    """
+    Abstände aufeinanderfolgender Flanken desselben Schalters.
+
+    Intervalle über Journal-Grenzen hinweg werden nicht gebildet.
+
+    Returns:
+        (Nummern, Intervalle in ns, Zustand der späteren Flanke) als Arrays
+    """
+    np = _numpy()
+    order = np.lexsort((columns.t_ns, columns.number, columns.session))
+    number = columns.number[order]
+    session = columns.session[order]
+    t_ns = columns.t_ns[order]
+    same = (number[1:] == number[:-1]) & (session[1:] == session[:-1])
+    intervals = (t_ns[1:] - t_ns[:-1])[same]
+    return number[1:][same], intervals, columns.state[order][1:][same]
+
+
+def interval_bins_ns(decades=(3, 11), per_decade: int = 10):
+    """Logarithmische Klassengrenzen in ns (Standard: 1 µs bis 100 s)."""
+    np = _numpy()
+    low, high = decades
+    return np.logspace(low, high, (high - low) * per_decade + 1)
+
+
+def interval_histogram(columns: SwitchColumns, bins_ns=None, minlength: int = 0):
+    """
+    Histogramm der Flanken-Intervalle pro Schalter.
+
+    Returns:
+        (Klassengrenzen in ns, counts[Nummer, Klasse]); Intervalle außerhalb
+        der Grenzen landen in der ersten bzw. letzten Klasse
+    """
+    np = _numpy()
+    if bins_ns is None:
+        bins_ns = interval_bins_ns()
+    bins_ns = np.asarray(bins_ns, dtype=np.float64)
+    number, intervals, _ = edge_intervals(columns)
+    classes = len(bins_ns) - 1
+    index = np.clip(np.searchsorted(bins_ns, intervals, side='right') - 1, 0, classes - 1)
+    size = max(int(number.max()) + 1 if len(number) else 0, minlength)
+    counts = np.bincount(number.astype(np.int64) * classes + index, minlength=size * classes)
+    return bins_ns, counts.reshape(size, classes)
+
+
+def bounce_counts(columns: SwitchColumns, threshold_ns: int = DEFAULT_BOUNCE_NS, minlength: int = 0):
+    """
+    Anzahl der Flanken pro Schalter, die kürzer als threshold_ns nach der
+    vorherigen Flanke desselben Schalters kommen (Index = Nummer).
+    """
+    np = _numpy()
+    number, intervals, _ = edge_intervals(columns)
+    return np.bincount(number[intervals < threshold_ns], minlength=minlength)
+
+
+def rates(columns: SwitchColumns, minlength: int = 0):
+    """Schließ-Flanken pro Sekunde und Schalter über die Gesamtdauer aller Journale."""
+    np = _numpy()
+    duration_s = columns.total_duration_ns / 1e9
+    counts = activation_counts(columns, minlength)
+    if duration_s <= 0:
+        return np.zeros(len(counts))
+    return counts / duration_s
+
+
+def dead_switches(columns: SwitchColumns, known_numbers: Sequence[int]):
+    """Konfigurierte Schalter ohne ein einziges Ereignis."""
+    np = _numpy()
+    known = np.unique(np.asarray(known_numbers, dtype=np.int64))
+    seen = np.unique(columns.number)
+    return known[~np.isin(known, seen)]
+
+
+def hot_spots(columns: SwitchColumns, top: int = 10):
+    """Die top Schalter mit den meisten Schließ-Flanken als (Nummern, Anzahlen)."""
+    np = _numpy()
+    counts = activation_counts(columns)
+    order = np.argsort(counts)[::-1][:top]
+    order = order[counts[order] > 0]
+    return order, counts[order]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse aufgezeichneter PPUC-Journale")
+    parser.add_argument('journals', nargs='+', help="Journal-Dateien (.ppj)")
+    parser.add_argument('--config', help="YAML-Konfiguration für Beschreibungen und tote Schalter")
+    parser.add_argument('--bounce-ms', type=float, default=DEFAULT_BOUNCE_NS / 1e6,
+                        help="Flanken mit kürzerem Abstand gelten als Prellen (Standard: 5)")
+    parser.add_argument('--top', type=int, default=10, help="Anzahl der meistgenutzten Schalter")
+    args = parser.parse_args()
+
+    columns = load_switch_events(args.journals)
+    descriptions = {}
+    known: Optional[list] = None
+    if args.config:
+        from ppuc_config import load_compiled_configuration
+        compiled = load_compiled_configuration(args.config)
+        for row in compiled.rows('switch'):
+            descriptions.setdefault(row['number'], row['description'])
+        known = list(descriptions)
+        compiled.close()
+
+    minlength = max(descriptions, default=-1) + 1
+    threshold_ns = int(args.bounce_ms * 1e6)
+    # Alle Spalten so lang wie die Flanken-Zählung, auch wenn der höchste
+    # Schalter nur Öffnen-Flanken hat
+    edges = edge_counts(columns, minlength)
+    activations = activation_counts(columns, len(edges))
+    bounces = bounce_counts(columns, threshold_ns, len(edges))
+    per_second = rates(columns, len(edges))
+
+    print(f"{len(columns.paths)} Journal(e), {len(columns)} Schalter-Ereignisse, "
+          f"{columns.total_duration_ns / 1e9:.1f} s")
+    print()
+    print(f"{'Nr':>4s}  {'Beschreibung':28s} {'Aktiv.':>9s} {'Flanken':>9s} {'/s':>8s} {'Prellen':>9s}")
+    for number in range(len(edges)):
+        if not edges[number]:
+            continue
+        ratio = bounces[number] / edges[number] * 100
+        marker = "  ⚠" if ratio >= 5 else ""
+        print(f"{number:4d}  {descriptions.get(number, '')[:28]:28s} {activations[number]:9d} "
+              f"{edges[number]:9d} {per_second[number]:8.2f} {bounces[number]:9d} ({ratio:4.1f} %){marker}")
+
+    numbers, counts = hot_spots(columns, args.top)
+    print()
+    print("Meistgenutzt: " + ", ".join(f"{n} ({c})" for n, c in zip(numbers.tolist(), counts.tolist())))
+
+    if known is not None:
+        dead = dead_switches(columns, known)
+        print("Ohne Ereignis: " + (", ".join(f"{n} {descriptions.get(n, '')}" for n in dead.tolist()) or "keine"))
+
+
+if __name__ == "__main__":
+    main()
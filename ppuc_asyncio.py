@@ -0,0 +1,128 @@
+"""
+PPUC asyncio-Frontend
+Stellt Switch-Ereignisse als async-Iterator und Befehle als awaitables bereit.
+
+Beispiel:
+    ppuc = AsyncPPUC()
+    ...
+    async for number, state in ppuc.switch_events():
+        if number == 5 and state:
+            await ppuc.set_solenoid_state(202, 1)
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Optional, Tuple
+
+from ppuc_wrapper import PPUC
+
+
+class AsyncPPUC:
+    """
+    asyncio-Frontend für eine PPUC-Instanz.
+
+    Switch-Ereignisse werden über den Wakeup-Dateideskriptor der
+    Switch-Pumpe in die Event-Loop geholt (loop.add_reader); die Event-Loop
+    selbst pollt und schläft nicht. Die Bibliothek fragt weiterhin die
+    Switch-Pumpe ab, die switch_events() bei Bedarf startet und die ohne
+    Ereignisse bis zu etwa 1000-mal pro Sekunde aufwacht (siehe
+    PPUC.start_switch_pump()). Lampen- und Spulenbefehle legen nur ein
+    Ereignis in die Sende-Queue der Bibliothek und werden direkt
+    ausgeführt; lang laufende Aufrufe (Tests, Verbindungsaufbau) laufen in
+    einem eigenen Worker-Thread.
+    """
+
+    def __init__(self, ppuc: Optional[PPUC] = None):
+        """
+        Args:
+            ppuc: Vorhandene PPUC-Instanz, sonst wird eine neue erstellt
+        """
+        self.ppuc = ppuc if ppuc is not None else PPUC()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ppuc-async")
+        self._reading = False
+        self._started_pump = False
+
+    async def switch_events(self, timestamps: bool = False) -> AsyncIterator[Tuple[int, ...]]:
+        """
+        Liefert Schalter-Ereignisse als (Nummer, Zustand), sobald sie eintreffen.
+
+        Args:
+            timestamps: (Nummer, Zustand, t_ns) mit dem monotonic_ns-Zeitpunkt
+                des Auslesens liefern (siehe PPUC.get_next_switch_event)
+
+        Pro AsyncPPUC ist nur ein aktiver Iterator erlaubt.
+        """
+        if self._reading:
+            raise RuntimeError("switch_events() wird bereits gelesen")
+
+        loop = asyncio.get_running_loop()
+        ppuc = self.ppuc
+        get_next = ppuc.get_next_switch_event if timestamps else ppuc.get_next_switch_state
+        if not ppuc._switch_pump_running:
+            # get_switch_wakeup_fd() startet die Pumpe, close() beendet sie wieder
+            self._started_pump = True
+        fd = ppuc.get_switch_wakeup_fd()
+        waiter = None
+
+        def on_readable():
+            ppuc.clear_switch_wakeup()
+            if waiter is not None and not waiter.done():
+                waiter.set_result(None)
+
+        self._reading = True
+        loop.add_reader(fd, on_readable)
+        try:
+            while True:
+                event = get_next()
+                if event is not None:
+                    yield event
+                    continue
+                # Queue leer: bis zum nächsten Signal der Switch-Pumpe schlafen
+                waiter = loop.create_future()
+                await waiter
+        finally:
+            loop.remove_reader(fd)
+            self._reading = False
+
+    async def set_lamp_state(self, number: int, state: int, force: bool = False):
+        """Setzt den Zustand einer Lampe."""
+        self.ppuc.set_lamp_state(number, state, force)
+
+    async def set_solenoid_state(self, number: int, state: int, force: bool = False):
+        """Setzt den Zustand einer Spule."""
+        self.ppuc.set_solenoid_state(number, state, force)
+
+    async def connect(self) -> bool:
+        """Verbindet mit den PPUC-Boards, ohne die Event-Loop zu blockieren."""
+        return await self._run(self.ppuc.connect)
+
+    async def coil_test(self):
+        """Führt einen Spulentest durch, ohne die Event-Loop zu blockieren."""
+        await self._run(self.ppuc.coil_test)
+
+    async def lamp_test(self):
+        """Führt einen Lampentest durch, ohne die Event-Loop zu blockieren."""
+        await self._run(self.ppuc.lamp_test)
+
+    async def switch_test(self):
+        """Führt einen Schaltertest durch, ohne die Event-Loop zu blockieren."""
+        await self._run(self.ppuc.switch_test)
+
+    def close(self):
+        """
+        Beendet den Worker-Thread, den Wakeup-Dateideskriptor und die
+        Switch-Pumpe, falls switch_events() sie gestartet hat.
+        """
+        self._executor.shutdown(wait=True)
+        if self._started_pump:
+            self.ppuc.stop_switch_pump()
+            self._started_pump = False
+        self.ppuc.close_switch_wakeup_fd()
+
+    async def _run(self, func, *args):
+        """Führt einen blockierenden Aufruf im Worker-Thread aus."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+
+__all__ = ['AsyncPPUC']
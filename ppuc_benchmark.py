@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+PPUC Benchmark
+Misst die heißen Pfade des ppuc_wrapper (Schalter lesen, Lampen/Spulen
+schalten, Inventar, Log-Callback) sowie Import- und Konstruktionszeit.
+Ergebnisse können als JSON-Baseline gespeichert und mit einer früheren
+Baseline verglichen werden.
+
+Verwendung:
+    python3 ppuc_benchmark.py                       # gegen ppuc_fake
+    python3 ppuc_benchmark.py --backend simulator   # echte Bibliothek + pty-Simulator
+    python3 ppuc_benchmark.py --save baseline.json
+    python3 ppuc_benchmark.py --compare baseline.json --threshold 10
+"""
+
+import argparse
+import array
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from ppuc_wrapper import PPUC, DeviceIndex, PPUCLibraryError, SwitchInfo
+
+DEFAULT_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "elektra.yml")
+
+# Misst in einem frischen Interpreter die Zeit für den Import allein
+_IMPORT_SNIPPET = """
+import time
+start = time.perf_counter_ns()
+import ppuc_wrapper
+print(time.perf_counter_ns() - start)
+"""
+
+# Misst in einem frischen Interpreter die erste PPUC() (inkl. Laden der
+# Bibliothek) und den Durchschnitt weiterer Instanzen
+_CONSTRUCTION_SNIPPET = """
+import time
+import ppuc_wrapper
+start = time.perf_counter_ns()
+first = ppuc_wrapper.PPUC()
+first_ns = time.perf_counter_ns() - start
+instances = []
+start = time.perf_counter_ns()
+for _ in range({count}):
+    instances.append(ppuc_wrapper.PPUC())
+print(first_ns, (time.perf_counter_ns() - start) // {count})
+"""
+
+
+def _run_snippet(snippet: str) -> str:
+    """Führt ein Snippet im Verzeichnis des Wrappers aus und gibt stdout zurück."""
+    result = subprocess.run(
+        [sys.executable, "-c", snippet],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+
+def bench_import(repeat: int = 10) -> float:
+    """Median der Importzeit von ppuc_wrapper in Mikrosekunden."""
+    samples = [int(_run_snippet(_IMPORT_SNIPPET)) for _ in range(repeat)]
+    return statistics.median(samples) / 1000
+
+
+def bench_construction(repeat: int = 5, count: int = 100):
+    """
+    Median der Konstruktionszeiten in Mikrosekunden.
+
+    Returns:
+        (erste Instanz inkl. Laden der Bibliothek, jede weitere Instanz)
+    """
+    first, following = [], []
+    for _ in range(repeat):
+        first_ns, following_ns = map(int, _run_snippet(_CONSTRUCTION_SNIPPET.format(count=count)).split())
+        first.append(first_ns)
+        following.append(following_ns)
+    return statistics.median(first) / 1000, statistics.median(following) / 1000
+
+
+# Hot-Path-Benchmarks: jede Funktion führt count Operationen aus und gibt
+# die dafür benötigten Nanosekunden zurück. fake ist None beim Simulator.
+
+def _bench_get_next_switch_state(ppuc, fake, count):
+    fake.push_switch_states([(5, 1)] * count)
+    get_next = ppuc.get_next_switch_state
+    start = time.perf_counter_ns()
+    for _ in range(count):
+        get_next()
+    return time.perf_counter_ns() - start
+
+
+def _bench_get_next_switch_state_empty(ppuc, fake, count):
+    get_next = ppuc.get_next_switch_state
+    start = time.perf_counter_ns()
+    for _ in range(count):
+        get_next()
+    return time.perf_counter_ns() - start
+
+
+def _bench_drain_switch_states(ppuc, fake, count):
+    fake.push_switch_states([(5, 1)] * count)
+    buf = array.array('i', bytes(8 * 256))
+    drain = ppuc.drain_switch_states
+    start = time.perf_counter_ns()
+    while drain(buf):
+        pass
+    return time.perf_counter_ns() - start
+
+
+def _fill_switch_queue(ppuc, fake, count):
+    """Lässt die Switch-Pumpe count Ereignisse in ihre Queue lesen und stoppt sie."""
+    fake.push_switch_states([(5, 1)] * count)
+    target = ppuc.get_switch_queue_stats()['queued'] + count
+    ppuc.start_switch_pump()
+    while ppuc.get_switch_queue_stats()['queued'] < target:
+        time.sleep(0.001)
+    ppuc.stop_switch_pump()
+
+
+def _bench_get_next_switch_state_queued(ppuc, fake, count):
+    _fill_switch_queue(ppuc, fake, count)
+    get_next = ppuc.get_next_switch_state
+    start = time.perf_counter_ns()
+    for _ in range(count):
+        get_next()
+    return time.perf_counter_ns() - start
+
+
+def _bench_drain_switch_states_queued(ppuc, fake, count):
+    _fill_switch_queue(ppuc, fake, count)
+    buf = array.array('i', bytes(8 * 256))
+    drain = ppuc.drain_switch_states
+    start = time.perf_counter_ns()
+    while drain(buf):
+        pass
+    return time.perf_counter_ns() - start
+
+
+def _bench_set_lamp_state(ppuc, fake, count):
+    set_lamp = ppuc.set_lamp_state
+    start = time.perf_counter_ns()
+    for i in range(count):
+        set_lamp(21, i & 1)
+    return time.perf_counter_ns() - start
+
+
+def _bench_set_lamp_state_suppressed(ppuc, fake, count):
+    set_lamp = ppuc.set_lamp_state
+    set_lamp(21, 1)
+    start = time.perf_counter_ns()
+    for _ in range(count):
+        set_lamp(21, 1)
+    return time.perf_counter_ns() - start
+
+
+def _bench_set_solenoid_state(ppuc, fake, count):
+    set_solenoid = ppuc.set_solenoid_state
+    start = time.perf_counter_ns()
+    for i in range(count):
+        set_solenoid(78, i & 1)
+    return time.perf_counter_ns() - start
+
+
+def _bench_lamp_handle(ppuc, fake, count):
+    lamp = ppuc.lamp('8K-BONUS')
+    on, off = lamp.on, lamp.off
+    start = time.perf_counter_ns()
+    for _ in range(count >> 1):
+        on()
+        off()
+    return time.perf_counter_ns() - start
+
+
+def _bench_inventory(ppuc, fake, count):
+    inventory = ppuc._inventory
+    start = time.perf_counter_ns()
+    for _ in range(count):
+        inventory.clear()
+        ppuc.get_coils()
+        ppuc.get_lamps()
+        ppuc.get_switches()
+    return time.perf_counter_ns() - start
+
+
+def _bench_inventory_cached(ppuc, fake, count):
+    ppuc.get_coils()
+    ppuc.get_lamps()
+    ppuc.get_switches()
+    start = time.perf_counter_ns()
+    for _ in range(count):
+        ppuc.get_coils()
+        ppuc.get_lamps()
+        ppuc.get_switches()
+    return time.perf_counter_ns() - start
+
+
+def _bench_device_index_shared_prefix(ppuc, fake, count):
+    # Viele Beschreibungen mit gemeinsamem Präfix; pro Operation ein Eintrag
+    devices = [SwitchInfo(1, i % 16, i, f"Lamp {i}") for i in range(count)]
+    start = time.perf_counter_ns()
+    DeviceIndex(devices)
+    return time.perf_counter_ns() - start
+
+
+def _bench_log_callback(ppuc, fake, count):
+    ppuc.set_log_message_callback(lambda message: None)
+    emit = fake.emit_log
+    start = time.perf_counter_ns()
+    for _ in range(count):
+        emit("Switch updated: #5, 1")
+    return time.perf_counter_ns() - start
+
+
+# Name -> (Funktion, Anzahl Operationen, nur mit Fake-Backend)
+BENCHMARKS = {
+    'get_next_switch_state': (_bench_get_next_switch_state, 200000, True),
+    'get_next_switch_state_empty': (_bench_get_next_switch_state_empty, 200000, False),
+    'drain_switch_states': (_bench_drain_switch_states, 200000, True),
+    'get_next_switch_state_queued': (_bench_get_next_switch_state_queued, 200000, True),
+    'drain_switch_states_queued': (_bench_drain_switch_states_queued, 200000, True),
+    'set_lamp_state': (_bench_set_lamp_state, 200000, False),
+    'set_lamp_state_suppressed': (_bench_set_lamp_state_suppressed, 200000, False),
+    'set_solenoid_state': (_bench_set_solenoid_state, 200000, False),
+    'lamp_handle': (_bench_lamp_handle, 200000, False),
+    'inventory': (_bench_inventory, 200, False),
+    'inventory_cached': (_bench_inventory_cached, 200000, False),
+    'device_index_shared_prefix': (_bench_device_index_shared_prefix, 20000, False),
+    'log_callback': (_bench_log_callback, 100000, True),
+}
+
+# (schneller, langsamer): der erste Benchmark muss pro Ereignis schneller
+# sein als der zweite, sonst hat der Batch-Pfad keinen Sinn
+EXPECTED_FASTER = (
+    ('drain_switch_states', 'get_next_switch_state'),
+    ('drain_switch_states_queued', 'get_next_switch_state_queued'),
+)
+
+
+def _open_backend(backend: str, config_file: str):
+    """
+    Erstellt eine PPUC-Instanz für das gewählte Backend.
+
+    Returns:
+        (ppuc, fake oder None, Aufräumfunktion)
+    """
+    if backend == 'fake':
+        from ppuc_fake import FakeLibrary
+        fake = FakeLibrary()
+        ppuc = PPUC(backend=fake)
+        ppuc.load_configuration(config_file)
+        return ppuc, fake, lambda: None
+
+    from ppuc_simulator import BoardSimulator
+    simulator = BoardSimulator(config_file)
+    port = simulator.start()
+    try:
+        ppuc = PPUC()
+        ppuc.load_configuration(config_file)
+        ppuc.set_serial(port)
+        if not ppuc.connect():
+            raise RuntimeError(f"Verbindung zum Simulator auf {port} fehlgeschlagen")
+        ppuc.start_updates()
+    except BaseException:
+        simulator.stop()
+        raise
+
+    def close():
+        ppuc.stop_updates()
+        ppuc.disconnect()
+        simulator.stop()
+    return ppuc, None, close
+
+
+def run_benchmarks(backend: str = 'fake', config_file: str = DEFAULT_CONFIG,
+                   repeat: int = 5, names=None) -> dict:
+    """
+    Führt die Hot-Path-Benchmarks aus.
+
+    Returns:
+        Name -> Nanosekunden pro Operation (bester von repeat Läufen, wie
+        bei timeit am wenigsten von anderer Last auf dem Rechner verfälscht)
+    """
+    ppuc, fake, close = _open_backend(backend, config_file)
+    results = {}
+    try:
+        for name, (func, count, fake_only) in BENCHMARKS.items():
+            if (names and name not in names) or (fake_only and fake is None):
+                continue
+            samples = []
+            for _ in range(repeat):
+                ppuc.invalidate_output_states()
+                samples.append(func(ppuc, fake, count) / count)
+            results[name] = min(samples)
+    finally:
+        close()
+    return results
+
+
+def check_expected_faster(results: dict):
+    """
+    Prüft EXPECTED_FASTER für die gemessenen Paare.
+
+    Returns:
+        Liste (schneller, langsamer, ns/op schneller, ns/op langsamer, erfüllt?)
+    """
+    rows = []
+    for fast, slow in EXPECTED_FASTER:
+        if fast in results and slow in results:
+            rows.append((fast, slow, results[fast], results[slow], results[fast] < results[slow]))
+    return rows
+
+
+def compare(results: dict, baseline: dict, threshold: float):
+    """
+    Vergleicht Ergebnisse mit einer Baseline.
+
+    Returns:
+        Liste (Name, Baseline, aktuell, Änderung in %, Regression?)
+    """
+    rows = []
+    for name, value in results.items():
+        old = baseline.get(name)
+        if old is None or old <= 0:
+            continue
+        change = (value - old) / old * 100
+        rows.append((name, old, value, change, change > threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks für den ppuc_wrapper")
+    parser.add_argument('--backend', choices=('fake', 'simulator'), default='fake',
+                        help="fake: ppuc_fake, simulator: echte Bibliothek am pty-Simulator")
+    parser.add_argument('--config', default=DEFAULT_CONFIG, help="YAML-Konfiguration")
+    parser.add_argument('--repeat', type=int, default=5, help="Wiederholungen pro Benchmark")
+    parser.add_argument('--only', nargs='*', help="Nur diese Benchmarks ausführen")
+    parser.add_argument('--no-startup', action='store_true', help="Import/Konstruktion nicht messen")
+    parser.add_argument('--save', metavar='JSON', help="Ergebnisse als Baseline speichern")
+    parser.add_argument('--compare', metavar='JSON', help="Mit gespeicherter Baseline vergleichen")
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help="Erlaubte Verschlechterung in Prozent (Standard: 10)")
+    args = parser.parse_args()
+
+    print(f"PPUC Benchmark ({args.backend})")
+    print("=" * 60)
+
+    try:
+        results = run_benchmarks(args.backend, args.config, args.repeat, args.only)
+    except PPUCLibraryError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+    if not args.no_startup and not args.only:
+        results['import'] = bench_import(args.repeat * 2) * 1000
+        try:
+            first_us, following_us = bench_construction(args.repeat)
+        except subprocess.CalledProcessError as e:
+            last_line = e.stderr.strip().splitlines()[-1] if e.stderr.strip() else e
+            print(f"PPUC(): nicht verfügbar ({last_line})")
+        else:
+            results['construction_first'] = first_us * 1000
+            results['construction'] = following_us * 1000
+
+    for name, value in results.items():
+        print(f"{name:30s} {value:14.1f} ns/op")
+
+    exit_code = 0
+    for fast, slow, fast_ns, slow_ns, ok in check_expected_faster(results):
+        if not ok:
+            print(f"✗ {fast} ({fast_ns:.1f} ns/op) ist nicht schneller als {slow} ({slow_ns:.1f} ns/op)")
+            exit_code = 2
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('backend') != args.backend:
+            print(f"Warnung: Baseline wurde mit Backend {baseline.get('backend')!r} erstellt")
+        print()
+        print(f"Vergleich mit {args.compare} (Schwelle {args.threshold:.0f} %)")
+        print("-" * 60)
+        for name, old, value, change, regression in compare(results, baseline['results'], args.threshold):
+            marker = "✗ REGRESSION" if regression else "✓"
+            print(f"{name:30s} {old:12.1f} -> {value:12.1f} ns  {change:+7.1f} %  {marker}")
+            if regression:
+                exit_code = 2
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({
+                'backend': args.backend,
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'results': results,
+            }, f, indent=2, sort_keys=True)
+        print(f"\nBaseline gespeichert: {args.save}")
+
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
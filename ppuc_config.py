@@ -0,0 +1,720 @@
+#!/usr/bin/env python3
+"""
+PPUC Konfigurations-Compiler
+Liest eine PPUC-YAML-Konfiguration (z.B. elektra.yml) einmal ein, prüft sie
+und legt dichte Tabellen als binären Snapshot ab. Spätere Starts blenden den
+Snapshot per mmap ein, solange sich der Inhalt der YAML-Datei nicht ändert.
+
+Der Snapshot dient der Python-Seite: PPUC.get_switches(), get_coils() und
+get_lamps() lesen das Inventar daraus statt einzeln aus der Bibliothek,
+dazu PPUC.get_compiled_configuration(), die LED-Zuordnung und ppuc_fake.
+ppuc_load_configuration() der C-Bibliothek liest die YAML-Datei weiterhin
+selbst, deren Ladezeit ändert sich dadurch nicht.
+
+Zum Kompilieren wird PyYAML benötigt (pip install pyyaml); vorhandene
+Snapshots lassen sich auch ohne einblenden. Fehlt es, liest PPUC das
+Inventar wie bisher aus der Bibliothek.
+
+Verwendung:
+    python3 ppuc_config.py elektra.yml [cache_verzeichnis]
+"""
+
+import glob
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from typing import Dict, Optional
+
+from ppuc_wrapper import (
+    PPUCConfigurationError, CoilInfo, LampInfo, SwitchInfo,
+    LED_TYPE_LAMP, LED_TYPE_FLASHER, LED_TYPE_GI,
+    PWM_TYPE_SOLENOID, PWM_TYPE_FLASHER, PWM_TYPE_LAMP, PWM_TYPE_MOTOR,
+    PLATFORM_WPC, PLATFORM_DATA_EAST, PLATFORM_SYS4, PLATFORM_SYS11,
+)
+
+# Zuordnungen der YAML-Schlüsselwörter zu den Konstanten des Wrappers
+PLATFORMS = {
+    'WPC': PLATFORM_WPC,
+    'DE': PLATFORM_DATA_EAST,
+    'SYS4': PLATFORM_SYS4,
+    'SYS11': PLATFORM_SYS11,
+}
+PWM_TYPES = {
+    'coil': PWM_TYPE_SOLENOID,
+    'flasher': PWM_TYPE_FLASHER,
+    'lamp': PWM_TYPE_LAMP,
+    'motor': PWM_TYPE_MOTOR,
+}
+LED_SECTIONS = (
+    ('lamps', LED_TYPE_LAMP),
+    ('flashers', LED_TYPE_FLASHER),
+    ('gi', LED_TYPE_GI),
+)
+
+# Spalten der Tabellen: Name -> array-Typecode
+TABLES = {
+    'board': (
+        ('number', 'B'), ('poll_events', 'B'), ('description', 'H'),
+    ),
+    'switch': (
+        ('number', 'H'), ('board', 'B'), ('port', 'B'), ('description', 'H'),
+    ),
+    'pwm': (
+        ('number', 'H'), ('board', 'B'), ('port', 'B'), ('type', 'B'),
+        ('power', 'B'), ('hold_power', 'B'), ('hold_power_activation_time', 'H'),
+        ('min_pulse_time', 'H'), ('max_pulse_time', 'H'), ('fast_flip_switch', 'H'),
+        ('description', 'H'),
+    ),
+    'stripe': (
+        ('board', 'B'), ('port', 'B'), ('led_type', 'H'), ('brightness', 'B'),
+        ('amount', 'H'), ('light_up', 'H'), ('after_glow', 'H'), ('description', 'H'),
+    ),
+    'led': (
+        ('number', 'H'), ('stripe', 'H'), ('led_number', 'H'), ('color', 'I'),
+        ('type', 'B'), ('description', 'H'),
+    ),
+    'meta': (
+        ('version', 'H'), ('platform', 'B'), ('coin_door_closed_switch', 'H'),
+        ('game_on_solenoid', 'H'), ('debug', 'B'), ('rom', 'H'), ('serial_port', 'H'),
+    ),
+}
+
+# Snapshot-Format: Kopf, Spaltenverzeichnis, 8-Byte-ausgerichtete Spaltendaten
+_MAGIC = b'PPUCCFG\x01'
+_HEADER = struct.Struct('<8s32s1sxxxI')          # Magic, SHA-256 der YAML, Byte-Order, Spaltenanzahl
+_DIRECTORY_ENTRY = struct.Struct('<32s1sxxxIQ')  # Spaltenname, Typecode, Anzahl, Offset
+_BYTEORDER = b'<' if sys.byteorder == 'little' else b'>'
+_SNAPSHOT_SUFFIX = '.ppucc'
+
+# Ab so vielen LEDs einer Nummer rechnet LedFanout.apply() mit NumPy;
+# darunter ist die Schleife schneller als der Aufbau der Index-Arrays
+_NUMPY_MIN_LEDS = 3
+
+
+def _numpy():
+    """NumPy, falls installiert (sonst None: LedFanout rechnet mit Schleifen)."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class CompiledConfig:
+    """
+    Kompilierte Konfiguration als dichte Spalten.
+
+    Jede Spalte ist ein array.array oder eine memoryview in den
+    eingeblendeten Snapshot (gleiche Schnittstelle: len() und Index).
+    Texte stehen in einer gemeinsamen Stringtabelle, die Spalten
+    enthalten nur deren Index.
+    """
+
+    def __init__(self, columns: Dict[str, object], strings, digest: bytes, mapping=None):
+        self.columns = columns
+        self.digest = digest
+        self._strings = strings
+        self._decoded = {}
+        self._mapping = mapping
+        self._fanouts = {}
+        # Hinweise, die das Laden nicht verhindern (nur nach dem Kompilieren gefüllt)
+        self.warnings = []
+
+    def column(self, name: str):
+        """Gibt eine Spalte zurück, z.B. column('switch.number')."""
+        return self.columns[name]
+
+    def table(self, name: str) -> Dict[str, object]:
+        """Gibt alle Spalten einer Tabelle als dict zurück."""
+        return {field: self.columns[f"{name}.{field}"] for field, _ in TABLES[name]}
+
+    def rows(self, name: str):
+        """Liefert die Zeilen einer Tabelle als dicts (Texte aufgelöst)."""
+        fields = [(field, self.columns[f"{name}.{field}"], field in _STRING_FIELDS)
+                  for field, _ in TABLES[name]]
+        for i in range(self.count(name)):
+            yield {field: self.string(values[i]) if is_string else values[i]
+                   for field, values, is_string in fields}
+
+    def count(self, name: str) -> int:
+        """Anzahl der Zeilen einer Tabelle."""
+        return len(self.columns[f"{name}.{TABLES[name][0][0]}"])
+
+    def string(self, index: int) -> str:
+        """Löst einen Index der Stringtabelle auf."""
+        text = self._decoded.get(index)
+        if text is None:
+            text = self._decoded[index] = sys.intern(self._strings[index])
+        return text
+
+    @property
+    def platform(self) -> int:
+        return self.columns['meta.platform'][0]
+
+    @property
+    def rom(self) -> str:
+        return self.string(self.columns['meta.rom'][0])
+
+    @property
+    def serial_port(self) -> str:
+        return self.string(self.columns['meta.serial_port'][0])
+
+    @property
+    def coin_door_closed_switch(self) -> int:
+        return self.columns['meta.coin_door_closed_switch'][0]
+
+    @property
+    def game_on_solenoid(self) -> int:
+        return self.columns['meta.game_on_solenoid'][0]
+
+    @property
+    def debug(self) -> bool:
+        return bool(self.columns['meta.debug'][0])
+
+    def devices(self, kind: str) -> tuple:
+        """
+        Inventar-Einträge wie PPUC.get_switches(), get_coils() bzw.
+        get_lamps() für kind 'switch', 'coil' oder 'lamp', direkt aus den
+        Spalten gebaut.
+        """
+        string = self.string
+        if kind == 'switch':
+            c = self.table('switch')
+            return tuple(SwitchInfo(*values[:-1], string(values[-1])) for values in zip(
+                c['board'], c['port'], c['number'], c['description']))
+        if kind == 'coil':
+            c = self.table('pwm')
+            return tuple(CoilInfo(*values[:-1], string(values[-1])) for values in zip(
+                c['board'], c['port'], c['type'], c['number'], c['description']))
+        if kind == 'lamp':
+            # Board und Port einer LED stehen an ihrem Streifen
+            c = self.table('led')
+            stripe_board = self.columns['stripe.board']
+            stripe_port = self.columns['stripe.port']
+            return tuple(LampInfo(stripe_board[stripe], stripe_port[stripe], led_type, number, string(description))
+                         for stripe, led_type, number, description in zip(
+                             c['stripe'], c['type'], c['number'], c['description']))
+        raise ValueError(f"Unbekannte Geräteart: {kind}")
+
+    def led_fanout(self, led_type: int = LED_TYPE_LAMP) -> 'LedFanout':
+        """Gibt die Zuordnung Nummer -> LEDs für Lampen, Flasher oder GI zurück."""
+        fanout = self._fanouts.get(led_type)
+        if fanout is None:
+            fanout = self._fanouts[led_type] = LedFanout(self, led_type)
+        return fanout
+
+    def close(self):
+        """Gibt den eingeblendeten Snapshot frei."""
+        self._fanouts.clear()
+        if self._mapping is not None:
+            for name in list(self.columns):
+                column = self.columns.pop(name)
+                if isinstance(column, memoryview):
+                    column.release()
+            self._strings = ()
+            self._mapping.close()
+            self._mapping = None
+
+
+class LedFanout:
+    """
+    Vorberechnete Abbildung von Lampen- (oder Flasher-/GI-) Nummern auf LEDs.
+
+    Eine Nummer kann auf mehrere LEDs in verschiedenen Streifen zeigen. Die
+    Einträge sind nach Nummer sortiert (CSR-Layout): die LEDs der Nummer n
+    stehen in leds[offsets[n]:offsets[n + 1]]. LED-Positionen sind global
+    über alle Streifen durchnummeriert (stripe_first[stripe] + ledNumber),
+    ein Frame enthält 3 Bytes (R, G, B) pro LED. Alle Tabellen sind
+    array.array und lassen sich z.B. mit numpy.frombuffer ohne Kopie nutzen.
+
+    Ist NumPy installiert, rechnen render() und apply() (bei vielen LEDs
+    einer Nummer) mit vorab berechneten Byte-Indizes statt Schleifen.
+    """
+
+    def __init__(self, compiled: CompiledConfig, led_type: int = LED_TYPE_LAMP):
+        led_stripe = compiled.column('led.stripe')
+        led_number = compiled.column('led.led_number')
+        amounts = compiled.column('stripe.amount')
+
+        # Ein Streifen belegt mindestens amount LEDs, bei LEDs jenseits von
+        # amount (siehe Warnungen des Compilers) entsprechend mehr
+        spans = array('I', amounts)
+        for stripe, led in zip(led_stripe, led_number):
+            if led >= spans[stripe]:
+                spans[stripe] = led + 1
+        self.stripe_first = array('I')
+        self.frame_size = 0
+        for span in spans:
+            self.stripe_first.append(self.frame_size)
+            self.frame_size += span
+        self.stripe_brightness = array('B', compiled.column('stripe.brightness'))
+        self.stripe_light_up = array('H', compiled.column('stripe.light_up'))
+        self.stripe_after_glow = array('H', compiled.column('stripe.after_glow'))
+
+        led_kinds = compiled.column('led.type')
+        entries = sorted((number, i) for i, number in enumerate(compiled.column('led.number'))
+                         if led_kinds[i] == led_type)
+        self.numbers = array('H', (number for number, _ in entries))
+        self.stripes = array('H', (led_stripe[i] for _, i in entries))
+        self.leds = array('I', (self.stripe_first[led_stripe[i]] + led_number[i] for _, i in entries))
+        self.colors = array('I', (compiled.column('led.color')[i] for _, i in entries))
+
+        size = self.numbers[-1] + 1 if entries else 0
+        self.offsets = array('I', [0]) * (size + 1)
+        for number in self.numbers:
+            self.offsets[number + 1] += 1
+        for number in range(size):
+            self.offsets[number + 1] += self.offsets[number]
+
+        # Farbe mit der Helligkeit des Streifens, fertig als RGB-Bytes
+        on = bytearray()
+        for color, stripe in zip(self.colors, self.stripes):
+            brightness = self.stripe_brightness[stripe]
+            on += bytes(((color >> shift) & 0xFF) * brightness // 255 for shift in (16, 8, 0))
+        self.on_rgb = bytes(on)
+
+        # Für NumPy: Nummer pro Eintrag, Frame-Byte-Positionen (3 pro
+        # Eintrag, R, G, B) und die Farbbytes
+        np = self._np = _numpy()
+        if np is not None:
+            self._np_numbers = np.frombuffer(self.numbers, dtype=np.uint16).astype(np.intp)
+            leds = np.frombuffer(self.leds, dtype=np.uint32).astype(np.intp)
+            self._np_bytes = (3 * leds[:, None] + np.arange(3)).ravel()
+            self._np_on = np.frombuffer(self.on_rgb, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    def leds_for(self, number: int):
+        """Globale LED-Positionen einer Nummer (leer, wenn nicht zugeordnet)."""
+        if not 0 <= number < len(self.offsets) - 1:
+            return self.leds[0:0]
+        return self.leds[self.offsets[number]:self.offsets[number + 1]]
+
+    def colors_for(self, number: int):
+        """Gepackte Farben (0xRRGGBB) der LEDs einer Nummer."""
+        if not 0 <= number < len(self.offsets) - 1:
+            return self.colors[0:0]
+        return self.colors[self.offsets[number]:self.offsets[number + 1]]
+
+    def new_frame(self) -> bytearray:
+        """Leerer Frame (alle LEDs aus)."""
+        return bytearray(3 * self.frame_size)
+
+    def apply(self, frame: bytearray, number: int, state):
+        """Überträgt den Zustand einer Nummer auf alle ihre LEDs im Frame."""
+        if not 0 <= number < len(self.offsets) - 1:
+            return
+        first, end = self.offsets[number], self.offsets[number + 1]
+        np = self._np
+        if np is not None and end - first >= _NUMPY_MIN_LEDS:
+            positions = self._np_bytes[3 * first:3 * end]
+            np.frombuffer(frame, dtype=np.uint8)[positions] = self._np_on[3 * first:3 * end] if state else 0
+            return
+        leds, on_rgb = self.leds, self.on_rgb
+        for i in range(first, end):
+            pos = 3 * leds[i]
+            frame[pos:pos + 3] = on_rgb[3 * i:3 * i + 3] if state else b'\0\0\0'
+
+    def render(self, states, frame: Optional[bytearray] = None) -> bytearray:
+        """
+        Baut einen vollständigen Frame aus den Zuständen aller Nummern.
+
+        Args:
+            states: Nach Nummer indizierbare Zustände; Werte größer 0 (bzw.
+                True) gelten als an, damit auch der Schatten von PPUC mit
+                seinem negativen Wert für "unbekannt" direkt verwendet
+                werden kann
+            frame: Vorhandener Frame, der überschrieben wird
+        """
+        if frame is None:
+            frame = self.new_frame()
+        else:
+            frame[:] = bytes(len(frame))
+        if self._np is not None:
+            return self._render_numpy(states, frame)
+        count = len(states)
+        on_rgb = self.on_rgb
+        for i, (number, led) in enumerate(zip(self.numbers, self.leds)):
+            if number < count and states[number] > 0:
+                pos = 3 * led
+                frame[pos:pos + 3] = on_rgb[3 * i:3 * i + 3]
+        return frame
+
+    def _render_numpy(self, states, frame: bytearray) -> bytearray:
+        """render() mit NumPy: Zustände per Fancy-Indexing, Bytes per repeat."""
+        np = self._np
+        if isinstance(states, (bytes, bytearray, memoryview)):
+            values = np.frombuffer(states, dtype=np.uint8)
+        else:
+            # Kopie statt Sicht: ein array.array mit exportiertem Puffer
+            # ließe sich sonst nicht mehr vergrößern (Schatten von PPUC)
+            values = np.array(states)
+        numbers = self._np_numbers
+        on = np.zeros(len(numbers), dtype=bool)
+        known = numbers < len(values)
+        on[known] = values[numbers[known]] > 0
+        on = on.repeat(3)
+        np.frombuffer(frame, dtype=np.uint8)[self._np_bytes[on]] = self._np_on[on]
+        return frame
+
+
+# Spalten, die Indizes in die Stringtabelle enthalten
+_STRING_FIELDS = frozenset(('description', 'led_type', 'rom', 'serial_port'))
+
+
+class _StringTable:
+    """Sammelt Texte beim Kompilieren, jeder Text bekommt genau einen Index."""
+
+    def __init__(self):
+        self.strings = []
+        self._index = {}
+
+    def add(self, text) -> int:
+        text = "" if text is None else str(text)
+        index = self._index.get(text)
+        if index is None:
+            index = self._index[text] = len(self.strings)
+            self.strings.append(text)
+        return index
+
+
+class _LazyStrings:
+    """Stringtabelle im Snapshot: Texte werden erst beim Zugriff dekodiert."""
+
+    def __init__(self, blob: memoryview, offsets):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __getitem__(self, index: int) -> str:
+        return bytes(self._blob[self._offsets[index]:self._offsets[index + 1]]).decode('utf-8')
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+
+def _file_digest(config_file: str) -> bytes:
+    """SHA-256 über den Inhalt der YAML-Datei."""
+    with open(config_file, 'rb') as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+def _parse_yaml(config_file: str):
+    """Parst die YAML-Datei mit PyYAML (wenn verfügbar mit libyaml)."""
+    try:
+        import yaml
+    except ImportError as e:
+        raise PPUCConfigurationError(
+            "Der Konfigurations-Compiler benötigt PyYAML (pip install pyyaml)") from e
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    with open(config_file, 'rb') as f:
+        try:
+            return yaml.load(f, Loader=loader)
+        except yaml.YAMLError as e:
+            raise PPUCConfigurationError(f"Ungültiges YAML in {config_file}: {e}") from e
+
+
+def _entries(config: dict, key: str) -> list:
+    """Gibt eine Liste der Konfiguration zurück; fehlend oder {} gilt als leer."""
+    value = config.get(key)
+    if value is None or value == {}:
+        return []
+    if not isinstance(value, list):
+        raise PPUCConfigurationError(f"'{key}' muss eine Liste sein")
+    return value
+
+
+def compile_configuration(config_file: str, digest: Optional[bytes] = None) -> CompiledConfig:
+    """
+    Parst und prüft eine YAML-Konfiguration und baut die dichten Tabellen.
+
+    Raises:
+        PPUCConfigurationError: Wenn die Konfiguration ungültig ist (alle
+            gefundenen Fehler in einer Meldung)
+    """
+    if digest is None:
+        digest = _file_digest(config_file)
+    config = _parse_yaml(config_file)
+    if not isinstance(config, dict):
+        raise PPUCConfigurationError(f"{config_file}: Konfiguration muss ein YAML-Mapping sein")
+
+    strings = _StringTable()
+    columns = {f"{table}.{field}": array(typecode)
+               for table, fields in TABLES.items() for field, typecode in fields}
+    errors = []
+    warnings = []
+
+    def integer(entry, key, where, maximum, default=None):
+        value = entry.get(key, default)
+        if isinstance(value, bool) or not isinstance(value, int) or not 0 <= value <= maximum:
+            errors.append(f"{where}: '{key}' muss eine Ganzzahl von 0 bis {maximum} sein (ist {value!r})")
+            return 0
+        return value
+
+    def append(table, **values):
+        for field, _ in TABLES[table]:
+            columns[f"{table}.{field}"].append(values[field])
+
+    # Allgemeine Einstellungen
+    platform = config.get('platform', 'WPC')
+    if platform not in PLATFORMS:
+        errors.append(f"Unbekannte Plattform {platform!r} (erlaubt: {', '.join(PLATFORMS)})")
+    append('meta',
+           version=integer(config, 'ppucVersion', 'Konfiguration', 0xFFFF, 1),
+           platform=PLATFORMS.get(platform, PLATFORM_WPC),
+           coin_door_closed_switch=integer(config, 'coinDoorClosedSwitch', 'Konfiguration', 0xFFFF, 0),
+           game_on_solenoid=integer(config, 'gameOnSolenoid', 'Konfiguration', 0xFFFF, 0),
+           debug=1 if config.get('debug') else 0,
+           rom=strings.add(config.get('rom')),
+           serial_port=strings.add(config.get('serialPort')))
+
+    # Boards (die Bibliothek erkennt Boards 0-15)
+    boards = set()
+    for i, board in enumerate(_entries(config, 'boards')):
+        where = f"boards[{i}]"
+        number = integer(board, 'number', where, 15)
+        if number in boards:
+            errors.append(f"{where}: Board {number} ist doppelt definiert")
+        boards.add(number)
+        append('board', number=number, poll_events=1 if board.get('pollEvents') else 0,
+               description=strings.add(board.get('description')))
+
+    def board_port(entry, where):
+        board = integer(entry, 'board', where, 15)
+        if boards and board not in boards:
+            errors.append(f"{where}: Board {board} ist unter 'boards' nicht definiert")
+        return board, integer(entry, 'port', where, 0xFF)
+
+    # Schalter
+    for i, switch in enumerate(_entries(config, 'switches')):
+        where = f"switches[{i}]"
+        board, port = board_port(switch, where)
+        append('switch', number=integer(switch, 'number', where, 0xFFFF), board=board, port=port,
+               description=strings.add(switch.get('description')))
+
+    # PWM-Ausgänge (Spulen, Flasher, ...)
+    for i, output in enumerate(_entries(config, 'pwmOutput')):
+        where = f"pwmOutput[{i}]"
+        board, port = board_port(output, where)
+        pwm_type = output.get('type', 'coil')
+        if pwm_type not in PWM_TYPES:
+            errors.append(f"{where}: Unbekannter Typ {pwm_type!r} (erlaubt: {', '.join(PWM_TYPES)})")
+        append('pwm', number=integer(output, 'number', where, 0xFFFF), board=board, port=port,
+               type=PWM_TYPES.get(pwm_type, PWM_TYPE_SOLENOID),
+               power=integer(output, 'power', where, 0xFF, 0),
+               hold_power=integer(output, 'holdPower', where, 0xFF, 0),
+               hold_power_activation_time=integer(output, 'holdPowerActivationTime', where, 0xFFFF, 0),
+               min_pulse_time=integer(output, 'minPulseTime', where, 0xFFFF, 0),
+               max_pulse_time=integer(output, 'maxPulseTime', where, 0xFFFF, 0),
+               fast_flip_switch=integer(output, 'fastFlipSwitch', where, 0xFFFF, 0),
+               description=strings.add(output.get('description')))
+
+    # LED-Streifen und die darauf abgebildeten Lampen, Flasher und GI
+    for stripe_index, stripe in enumerate(_entries(config, 'ledStripes')):
+        where = f"ledStripes[{stripe_index}]"
+        board, port = board_port(stripe, where)
+        led_type = str(stripe.get('ledType', 'RGB'))
+        if len(led_type) not in (3, 4) or set(led_type) - set('RGBW') or len(set(led_type)) != len(led_type):
+            errors.append(f"{where}: Ungültiger ledType {led_type!r}")
+        amount = integer(stripe, 'amount', where, 0xFFFF)
+        append('stripe', board=board, port=port, led_type=strings.add(led_type),
+               brightness=integer(stripe, 'brightness', where, 0xFF, 255), amount=amount,
+               light_up=integer(stripe, 'lightUp', where, 0xFFFF, 0),
+               after_glow=integer(stripe, 'afterGlow', where, 0xFFFF, 0),
+               description=strings.add(stripe.get('description')))
+
+        for section, led_kind in LED_SECTIONS:
+            for i, led in enumerate(_entries(stripe, section)):
+                led_where = f"{where}.{section}[{i}]"
+                led_number = integer(led, 'ledNumber', led_where, 0xFFFF)
+                if led_number >= amount:
+                    warnings.append(f"{led_where}: ledNumber {led_number} liegt außerhalb von amount {amount}")
+                color = str(led.get('color', 'FFFFFF'))
+                try:
+                    packed = int(color, 16) if len(color) == 6 else -1
+                except ValueError:
+                    packed = -1
+                if packed < 0:
+                    errors.append(f"{led_where}: Ungültige Farbe {color!r} (erwartet RRGGBB)")
+                    packed = 0
+                append('led', number=integer(led, 'number', led_where, 0xFFFF), stripe=stripe_index,
+                       led_number=led_number, color=packed, type=led_kind,
+                       description=strings.add(led.get('description')))
+
+    if errors:
+        raise PPUCConfigurationError(
+            f"{config_file}: {len(errors)} Fehler in der Konfiguration:\n  " + "\n  ".join(errors))
+    compiled = CompiledConfig(columns, strings.strings, digest)
+    compiled.warnings = warnings
+    return compiled
+
+
+def write_snapshot(compiled: CompiledConfig, path: str):
+    """Schreibt eine kompilierte Konfiguration atomar als Snapshot-Datei."""
+    # Stringtabelle als ein UTF-8-Block plus Offsets
+    encoded = [compiled.string(i).encode('utf-8') for i in range(len(compiled._strings))]
+    offsets = array('I', [0])
+    for text in encoded:
+        offsets.append(offsets[-1] + len(text))
+    columns = dict(compiled.columns)
+    columns['strings.offsets'] = offsets
+    columns['strings.blob'] = array('B', b''.join(encoded))
+
+    blobs = []
+    directory = []
+    offset = _HEADER.size + _DIRECTORY_ENTRY.size * len(columns)
+    for name, values in columns.items():
+        data = values.tobytes() if isinstance(values, array) else bytes(values)
+        offset = (offset + 7) & ~7
+        typecode = values.typecode if isinstance(values, array) else values.format
+        directory.append(_DIRECTORY_ENTRY.pack(name.encode('ascii'), typecode.encode('ascii'),
+                                               len(values), offset))
+        blobs.append((offset, data))
+        offset += len(data)
+
+    directory_name = os.path.dirname(path) or "."
+    os.makedirs(directory_name, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".ppucc-", dir=directory_name)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, compiled.digest, _BYTEORDER, len(columns)))
+            f.write(b''.join(directory))
+            for data_offset, data in blobs:
+                f.write(b'\0' * (data_offset - f.tell()))
+                f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def read_snapshot(path: str, digest: Optional[bytes] = None) -> Optional[CompiledConfig]:
+    """
+    Blendet einen Snapshot per mmap ein.
+
+    Returns:
+        Die Konfiguration oder None, wenn die Datei fehlt, nicht passt oder
+        zu einem anderen YAML-Inhalt gehört
+    """
+    try:
+        with open(path, 'rb') as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        magic, snapshot_digest, byteorder, column_count = _HEADER.unpack_from(mapping, 0)
+        if magic != _MAGIC or byteorder != _BYTEORDER or (digest is not None and snapshot_digest != digest):
+            mapping.close()
+            return None
+
+        view = memoryview(mapping)
+        columns = {}
+        for i in range(column_count):
+            raw_name, typecode, count, offset = _DIRECTORY_ENTRY.unpack_from(
+                mapping, _HEADER.size + i * _DIRECTORY_ENTRY.size)
+            typecode = typecode.decode('ascii')
+            size = array(typecode).itemsize
+            columns[raw_name.rstrip(b'\0').decode('ascii')] = view[offset:offset + count * size].cast(typecode)
+        view.release()
+
+        strings = _LazyStrings(columns.pop('strings.blob'), columns.pop('strings.offsets'))
+        if any(f"{table}.{field}" not in columns for table, fields in TABLES.items() for field, _ in fields):
+            raise ValueError("Spalten fehlen")
+    except (struct.error, ValueError, TypeError):
+        mapping.close()
+        return None
+    return CompiledConfig(columns, strings, snapshot_digest, mapping)
+
+
+def default_cache_dir() -> str:
+    """Standard-Verzeichnis für Snapshots ($XDG_CACHE_HOME/ppuc)."""
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "ppuc")
+
+
+def _snapshot_prefix(config_file: str) -> str:
+    """
+    Gemeinsamer Anfang der Snapshot-Namen einer YAML-Datei: Dateiname und
+    Hash des absoluten Pfads, damit gleichnamige Dateien in verschiedenen
+    Verzeichnissen sich nicht gegenseitig die Snapshots löschen.
+    """
+    path = os.path.abspath(config_file)
+    path_hash = hashlib.sha256(os.fsencode(path)).hexdigest()[:12]
+    return f"{os.path.basename(path)}.{path_hash}"
+
+
+def snapshot_path(config_file: str, digest: bytes, cache_dir: Optional[str] = None) -> str:
+    """Pfad des Snapshots für eine YAML-Datei (Pfad und Inhalts-Hash)."""
+    name = f"{_snapshot_prefix(config_file)}.{digest.hex()[:16]}{_SNAPSHOT_SUFFIX}"
+    return os.path.join(cache_dir or default_cache_dir(), name)
+
+
+def load_compiled_configuration(config_file: str, cache_dir: Optional[str] = None) -> CompiledConfig:
+    """
+    Gibt die kompilierte Konfiguration zurück.
+
+    Ist ein Snapshot zum aktuellen Inhalt der YAML-Datei vorhanden, wird er
+    nur eingeblendet. Sonst wird kompiliert, der Snapshot geschrieben und
+    ältere Snapshots derselben Datei (gleicher absoluter Pfad) werden
+    entfernt.
+    """
+    digest = _file_digest(config_file)
+    path = snapshot_path(config_file, digest, cache_dir)
+    compiled = read_snapshot(path, digest)
+    if compiled is not None:
+        return compiled
+
+    compiled = compile_configuration(config_file, digest)
+    try:
+        write_snapshot(compiled, path)
+    except OSError as e:
+        print(f"Warnung: Konnte Konfigurations-Snapshot nicht schreiben: {e}")
+        return compiled
+
+    # Ältere Stände genau dieser Datei (gleicher Pfad) entfernen
+    pattern = os.path.join(os.path.dirname(path), f"{glob.escape(_snapshot_prefix(config_file))}.*{_SNAPSHOT_SUFFIX}")
+    for stale in glob.glob(pattern):
+        if stale != path:
+            try:
+                os.unlink(stale)
+            except OSError:
+                pass
+    mapped = read_snapshot(path, digest)
+    if mapped is None:
+        return compiled
+    mapped.warnings = compiled.warnings
+    return mapped
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Verwendung: python3 ppuc_config.py config.yaml [cache_verzeichnis]")
+        sys.exit(1)
+    config_file = sys.argv[1]
+    cache_dir = sys.argv[2] if len(sys.argv) > 2 else None
+
+    try:
+        compiled = load_compiled_configuration(config_file, cache_dir)
+    except PPUCConfigurationError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+    print(f"✓ {config_file} kompiliert")
+    for warning in compiled.warnings:
+        print(f"  Warnung: {warning}")
+    print(f"  Snapshot: {snapshot_path(config_file, compiled.digest, cache_dir)}")
+    for table in ('board', 'switch', 'pwm', 'stripe', 'led'):
+        print(f"  {table:7s}: {compiled.count(table):4d} Einträge")
+    fanout = compiled.led_fanout(LED_TYPE_LAMP)
+    print(f"  Lampen auf LEDs: {len(set(fanout.numbers))} Nummern -> "
+          f"{len(fanout)} LEDs ({fanout.frame_size} LEDs im Frame)")
+
+
+if __name__ == "__main__":
+    main()
@@ -81,8 +81,9 @@ def wait_for_switch_changes(ppuc, max_changes=10):
     
     try:
         while change_count < max_changes and not keyboard_interrupt["pressed"]:
-            # get_next_switch_state() gibt nur bei echten Zustandsänderungen ein Ergebnis zurück
-            switch_state = ppuc.get_next_switch_state()
+            # wait_next_switch_state() gibt nur bei echten Zustandsänderungen ein Ergebnis zurück
+            # und wartet sonst bis zu 10ms auf das nächste Ereignis
+            switch_state = ppuc.wait_next_switch_state(timeout=0.01)
             
             if switch_state is not None:
                 # Es wurde eine echte Zustandsänderung empfangen
@@ -97,9 +98,6 @@ def wait_for_switch_changes(ppuc, max_changes=10):
                 
                 print(f"[{change_count:2d}/{max_changes}] [{elapsed:6.2f}s] Schalter {number:3d}: {status} ({change_type})")
             else:
-                # Keine Zustandsänderung verfügbar - kleine Pause um CPU zu entlasten
-                time.sleep(0.01)  # 10ms Pause
-                
                 # Status-Update alle 5 Sekunden wenn keine Aktivität
                 current_time = time.time()
                 if current_time - last_activity_time > 5.0:
@@ -0,0 +1,290 @@
+"""
+PPUC Fake-Backend
+Reine Python-Nachbildung der C-API von libppuc_wrapper.so ohne serielle
+Schnittstelle. Damit lassen sich der Wrapper und seine heißen Pfade allein
+messen und testen.
+
+Beispiel:
+    fake = FakeLibrary()
+    ppuc = PPUC(backend=fake)
+    ppuc.load_configuration("elektra.yml")
+    fake.push_switch_states([(5, 1), (5, 0)])
+    ppuc.get_next_switch_state()   # (5, 1)
+"""
+
+import ctypes
+import shutil
+import tempfile
+import weakref
+from collections import deque
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+from ppuc_wrapper import (
+    PPUCSwitchState, PPUCSwitch, PPUCCoil, PPUCLamp,
+)
+
+
+class FakeInstance:
+    """Zustand einer mit ppuc_new() erzeugten Fake-Instanz."""
+
+    def __init__(self):
+        self.config_file = None
+        self.debug = False
+        self.rom = b""
+        self.serial = b""
+        self.connected = False
+        self.updating = False
+        self.coin_door_closed_switch = 0
+        self.game_on_solenoid = 0
+
+        # Ausgänge, wie sie bei den Boards ankämen
+        self.lamps: Dict[int, int] = {}
+        self.solenoids: Dict[int, int] = {}
+        self.lamp_writes = 0
+        self.solenoid_writes = 0
+
+        # Programmierbare Queue der Schalter-Zustände
+        self.switch_queue = deque()
+        self.switch_state = PPUCSwitchState()
+        self.switch_state_ptr = ctypes.pointer(self.switch_state)
+
+        # Inventar als (board, port, [type,] number, description)-Tupel
+        self.coils: Sequence[tuple] = ()
+        self.lamp_devices: Sequence[tuple] = ()
+        self.switches: Sequence[tuple] = ()
+
+        self.log_callback = None
+        self.log_user_data = None
+
+
+class FakeLibrary:
+    """
+    Drop-in-Backend für PPUC(backend=...), das die Funktionen von
+    libppuc_wrapper.so mit denselben Namen und Rückgabetypen bereitstellt.
+
+    Schalter-Zustände werden mit push_switch_state(s) eingespielt, Lampen-
+    und Spulenbefehle landen in FakeInstance.lamps/solenoids. Listen aus
+    ppuc_get_coils() usw. bleiben bis zum passenden ppuc_free_*() am Leben;
+    outstanding_lists zeigt nicht freigegebene Listen an.
+
+    Snapshots aus ppuc_load_configuration() landen in cache_dir, ohne
+    Angabe in einem temporären Verzeichnis, das mit dem Fake gelöscht
+    wird. Der Cache des Benutzers bleibt so unberührt.
+    """
+
+    _NULL_SWITCH_STATE = ctypes.POINTER(PPUCSwitchState)()
+
+    def __init__(self, connect_result: bool = True, cache_dir: Optional[str] = None):
+        """
+        Args:
+            connect_result: Rückgabewert von ppuc_connect()
+            cache_dir: Verzeichnis für Konfigurations-Snapshots
+        """
+        self.connect_result = connect_result
+        self.cache_dir = cache_dir
+        self.instances: Dict[int, FakeInstance] = {}
+        self._next_handle = 1
+        self._lists = {}
+
+    # Hilfen für Benchmarks und Tests
+
+    def instance(self, obj: Optional[int] = None) -> FakeInstance:
+        """Gibt eine Instanz zurück (Standard: die zuletzt erzeugte)."""
+        if obj is None:
+            obj = self._next_handle - 1
+        return self.instances[obj]
+
+    def push_switch_state(self, number: int, state: int, obj: Optional[int] = None):
+        """Stellt einen Schalter-Zustand in die Queue."""
+        self.instance(obj).switch_queue.append((number, state))
+
+    def push_switch_states(self, states: Iterable[Tuple[int, int]], obj: Optional[int] = None):
+        """Stellt mehrere Schalter-Zustände in die Queue."""
+        self.instance(obj).switch_queue.extend(states)
+
+    def set_devices(self, coils: Sequence[tuple] = (), lamps: Sequence[tuple] = (),
+                    switches: Sequence[tuple] = (), obj: Optional[int] = None):
+        """
+        Setzt das Inventar direkt.
+
+        Args:
+            coils, lamps: (board, port, type, number, description)
+            switches: (board, port, number, description)
+        """
+        instance = self.instance(obj)
+        instance.coils = tuple(coils)
+        instance.lamp_devices = tuple(lamps)
+        instance.switches = tuple(switches)
+
+    def emit_log(self, message: str, obj: Optional[int] = None, args: Sequence = (), emitter=None):
+        """
+        Ruft den registrierten Log-Callback wie die Bibliothek auf.
+
+        Ohne emitter kommt message fertig formatiert und ohne va_list an.
+        Mit emitter ist message ein printf-Formatstring für args (ctypes-
+        Werte wie c_int(3)); emitter(callback, user_data, format, *args)
+        ist eine variadische C-Funktion, die daraus eine echte va_list baut
+        und den Callback damit aufruft.
+        """
+        instance = self.instance(obj)
+        if instance.log_callback is None:
+            return
+        if emitter is None:
+            instance.log_callback(message.encode('utf-8'), None, instance.log_user_data)
+        else:
+            emitter(instance.log_callback, instance.log_user_data, message.encode('utf-8'), *args)
+
+    @property
+    def outstanding_lists(self) -> int:
+        return len(self._lists)
+
+    # C-API
+
+    def ppuc_new(self) -> int:
+        obj = self._next_handle
+        self._next_handle += 1
+        self.instances[obj] = FakeInstance()
+        return obj
+
+    def ppuc_delete(self, obj):
+        self.instances.pop(obj, None)
+
+    def ppuc_set_log_message_callback(self, obj, callback, user_data):
+        instance = self.instances[obj]
+        instance.log_callback = callback
+        instance.log_user_data = user_data
+
+    def ppuc_load_configuration(self, obj, config_file: bytes):
+        """Übernimmt Inventar und Einstellungen über ppuc_config aus der YAML-Datei."""
+        from ppuc_config import load_compiled_configuration
+        instance = self.instances[obj]
+        instance.config_file = config_file
+        if self.cache_dir is None:
+            self.cache_dir = tempfile.mkdtemp(prefix="ppuc-fake-")
+            weakref.finalize(self, shutil.rmtree, self.cache_dir, True)
+        compiled = load_compiled_configuration(config_file.decode('utf-8'), self.cache_dir)
+        try:
+            instance.debug = compiled.debug
+            instance.rom = compiled.rom.encode('utf-8')
+            instance.serial = compiled.serial_port.encode('utf-8')
+            instance.coin_door_closed_switch = compiled.coin_door_closed_switch
+            instance.game_on_solenoid = compiled.game_on_solenoid
+            instance.switches = tuple((row['board'], row['port'], row['number'], row['description'])
+                                      for row in compiled.rows('switch'))
+            instance.coils = tuple((row['board'], row['port'], row['type'], row['number'], row['description'])
+                                   for row in compiled.rows('pwm'))
+            stripes = list(compiled.rows('stripe'))
+            instance.lamp_devices = tuple(
+                (stripes[row['stripe']]['board'], stripes[row['stripe']]['port'], row['type'],
+                 row['number'], row['description'])
+                for row in compiled.rows('led'))
+        finally:
+            compiled.close()
+
+    def ppuc_set_debug(self, obj, debug):
+        self.instances[obj].debug = bool(debug)
+
+    def ppuc_get_debug(self, obj) -> bool:
+        return self.instances[obj].debug
+
+    def ppuc_set_rom(self, obj, rom: bytes):
+        self.instances[obj].rom = rom
+
+    def ppuc_get_rom(self, obj) -> bytes:
+        return self.instances[obj].rom
+
+    def ppuc_set_serial(self, obj, serial: bytes):
+        self.instances[obj].serial = serial
+
+    def ppuc_get_serial(self, obj) -> bytes:
+        return self.instances[obj].serial
+
+    def ppuc_connect(self, obj) -> bool:
+        self.instances[obj].connected = self.connect_result
+        return self.connect_result
+
+    def ppuc_disconnect(self, obj):
+        instance = self.instances[obj]
+        instance.connected = False
+        instance.updating = False
+
+    def ppuc_start_updates(self, obj):
+        self.instances[obj].updating = True
+
+    def ppuc_stop_updates(self, obj):
+        self.instances[obj].updating = False
+
+    def ppuc_set_solenoid_state(self, obj, number, state):
+        instance = self.instances[obj]
+        instance.solenoids[number] = state
+        instance.solenoid_writes += 1
+
+    def ppuc_set_lamp_state(self, obj, number, state):
+        instance = self.instances[obj]
+        instance.lamps[number] = state
+        instance.lamp_writes += 1
+
+    def ppuc_get_next_switch_state(self, obj):
+        instance = self.instances[obj]
+        try:
+            number, state = instance.switch_queue.popleft()
+        except IndexError:
+            return self._NULL_SWITCH_STATE
+        switch_state = instance.switch_state
+        switch_state.number = number
+        switch_state.state = state
+        return instance.switch_state_ptr
+
+    def ppuc_get_coin_door_closed_switch(self, obj) -> int:
+        return self.instances[obj].coin_door_closed_switch
+
+    def ppuc_get_game_on_solenoid(self, obj) -> int:
+        return self.instances[obj].game_on_solenoid
+
+    def ppuc_coil_test(self, obj):
+        pass
+
+    def ppuc_lamp_test(self, obj):
+        pass
+
+    def ppuc_switch_test(self, obj):
+        pass
+
+    def ppuc_get_coils(self, obj, count):
+        return self._make_list(PPUCCoil, self.instances[obj].coils, count)
+
+    def ppuc_free_coils(self, devices):
+        self._free_list(devices)
+
+    def ppuc_get_lamps(self, obj, count):
+        return self._make_list(PPUCLamp, self.instances[obj].lamp_devices, count)
+
+    def ppuc_free_lamps(self, devices):
+        self._free_list(devices)
+
+    def ppuc_get_switches(self, obj, count):
+        return self._make_list(PPUCSwitch, self.instances[obj].switches, count)
+
+    def ppuc_free_switches(self, devices):
+        self._free_list(devices)
+
+    def _make_list(self, struct_cls, devices, count):
+        """Baut ein C-Array wie die Bibliothek; count wird per byref() gesetzt."""
+        count._obj.value = len(devices)
+        if not devices:
+            return ctypes.POINTER(struct_cls)()
+        items = (struct_cls * len(devices))()
+        for item, device in zip(items, devices):
+            *values, description = device
+            for (name, _), value in zip(struct_cls._fields_, values):
+                setattr(item, name, value)
+            item.description = description.encode('utf-8') if isinstance(description, str) else description
+        pointer = ctypes.cast(items, ctypes.POINTER(struct_cls))
+        self._lists[ctypes.addressof(items)] = items
+        return pointer
+
+    def _free_list(self, devices):
+        self._lists.pop(ctypes.addressof(devices.contents), None)
+
+
+__all__ = ['FakeLibrary', 'FakeInstance']
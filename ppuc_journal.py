@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+PPUC Journal
+Zeichnet alle Schalter-Ereignisse und alle gesendeten Lampen-/Spulenbefehle
+in ein binäres Journal mit festen 16-Byte-Einträgen auf und spielt es über
+die normalen PPUC-Schnittstellen wieder ab.
+
+Aufnahme:
+    journal = JournalWriter("spiel.ppj")
+    ppuc = PPUC(backend=JournalBackend(journal))
+    ...
+    journal.close()
+
+Wiedergabe (Originaltempo oder mit speed=None so schnell wie möglich):
+    ppuc = PPUC(backend=ReplayBackend("spiel.ppj"))
+    while (event := ppuc.wait_next_switch_state(1.0)):
+        ...
+
+Verwendung:
+    python3 ppuc_journal.py info spiel.ppj
+    python3 ppuc_journal.py dump spiel.ppj [von_s [bis_s]]
+"""
+
+import bisect
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from typing import Iterator, Optional, Tuple
+
+from ppuc_wrapper import load_library
+
+# Art eines Eintrags (gleiche Bytes wie die Quellen im RS485-Protokoll)
+JOURNAL_SWITCH = ord('W')
+JOURNAL_LAMP = ord('L')
+JOURNAL_SOLENOID = ord('S')
+KIND_NAMES = {JOURNAL_SWITCH: "Schalter", JOURNAL_LAMP: "Lampe", JOURNAL_SOLENOID: "Spule"}
+
+# Datei: Kopf, danach Einträge fester Länge. Zeit in ns seit Aufnahmebeginn.
+_MAGIC = b'PPUCJRN\x01'
+_HEADER = struct.Struct('<8sQQII')   # Magic, Start (time_ns), Start (monotonic_ns), Eintragsgröße, Chunk-Größe
+_RECORD = struct.Struct('<QBBHI')    # Zeit, Art, Zustand, Nummer, laufende Nummer
+_INDEX_ENTRY = struct.Struct('<QQ')  # Zeit des ersten Eintrags eines Chunks, Eintragsnummer
+_INDEX_SUFFIX = ".idx"
+HEADER_SIZE = _HEADER.size
+RECORD_SIZE = _RECORD.size
+
+JournalRecord = Tuple[int, int, int, int]  # (t_ns, Art, Nummer, Zustand)
+
+
+class JournalWriter:
+    """
+    Schreibt ein Journal nur anhängend.
+
+    Einträge werden im Speicher gesammelt und von einem Hintergrund-Thread
+    alle fsync_interval Sekunden geschrieben und mit fsync gesichert. Zu
+    jedem Chunk von chunk_records Einträgen kommt ein Eintrag in die
+    Indexdatei (<journal>.idx), über den der Reader nach Zeit sucht.
+    """
+
+    def __init__(self, path: str, chunk_records: int = 4096, fsync_interval: float = 1.0):
+        self.path = path
+        self.chunk_records = chunk_records
+        self.start_ns = time.monotonic_ns()
+        self._file = open(path, 'wb')
+        self._index = open(path + _INDEX_SUFFIX, 'wb')
+        self._file.write(_HEADER.pack(_MAGIC, time.time_ns(), self.start_ns, _RECORD.size, chunk_records))
+        self._buffer = bytearray()
+        self._index_buffer = bytearray()
+        self._count = 0
+        self._lock = threading.Lock()
+        # Hält Tausch und Schreiben zusammen, damit Chunks in Zeitreihenfolge
+        # in die Datei kommen, auch wenn flush() aus mehreren Threads läuft
+        self._io_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, args=(fsync_interval,),
+                                         name="ppuc-journal", daemon=True)
+        self._flusher.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def write(self, kind: int, number: int, state: int, t_ns: Optional[int] = None):
+        """
+        Hängt einen Eintrag an (t_ns: monotonic_ns, Standard: jetzt).
+
+        Ohne t_ns wird die Zeit erst unter dem Lock genommen, damit die
+        Zeiten bei mehreren schreibenden Threads in Dateireihenfolge steigen.
+        """
+        with self._lock:
+            if t_ns is None:
+                t_ns = time.monotonic_ns()
+            t_rel = t_ns - self.start_ns
+            if t_rel < 0:
+                t_rel = 0
+            count = self._count
+            if count % self.chunk_records == 0:
+                self._index_buffer += _INDEX_ENTRY.pack(t_rel, count)
+            self._buffer += _RECORD.pack(t_rel, kind, 1 if state else 0, number & 0xFFFF, count & 0xFFFFFFFF)
+            self._count = count + 1
+
+    def flush(self, sync: bool = True):
+        """Schreibt gesammelte Einträge und sichert sie auf Wunsch mit fsync."""
+        with self._io_lock:
+            # write() wartet nur auf den Tausch, nicht auf die Datei
+            with self._lock:
+                data, self._buffer = self._buffer, bytearray()
+                index, self._index_buffer = self._index_buffer, bytearray()
+            if data:
+                self._file.write(data)
+                self._file.flush()
+            if index:
+                self._index.write(index)
+                self._index.flush()
+            if sync and (data or index):
+                os.fsync(self._file.fileno())
+                os.fsync(self._index.fileno())
+
+    def close(self):
+        """Schreibt den Rest und schließt das Journal."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._flusher.join()
+        self.flush()
+        self._file.close()
+        self._index.close()
+
+    def _flush_loop(self, interval: float):
+        while not self._closed.wait(interval):
+            self.flush()
+
+
+class JournalReader:
+    """Liest ein Journal per mmap; Suche nach Zeit über den Chunk-Index."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                raise ValueError(f"{path}: kein PPUC-Journal")
+            self._mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.start_time_ns, self.start_ns, record_size, self.chunk_records = \
+            _HEADER.unpack_from(self._mapping, 0)
+        if magic != _MAGIC or record_size != _RECORD.size:
+            self._mapping.close()
+            raise ValueError(f"{path}: kein PPUC-Journal")
+        # Ein unvollständiger letzter Eintrag (Abbruch beim Schreiben) wird ignoriert
+        self._count = (size - _HEADER.size) // _RECORD.size
+        self._index = self._load_index()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[JournalRecord]:
+        return self.records()
+
+    def close(self):
+        self._mapping.close()
+
+    @property
+    def duration_ns(self) -> int:
+        """Zeit des letzten Eintrags seit Aufnahmebeginn."""
+        return self._time_at(self._count - 1) if self._count else 0
+
+    def find(self, t_ns: int) -> int:
+        """Nummer des ersten Eintrags mit Zeit >= t_ns (ns seit Aufnahmebeginn)."""
+        times = self._index[0]
+        # Letzter Chunk, der vor t_ns beginnt; gleiche Zeiten können schon
+        # im Chunk davor anfangen, deshalb bisect_left
+        chunk = max(bisect.bisect_left(times, t_ns) - 1, 0)
+        low = self._index[1][chunk] if times else 0
+        high = self._index[1][chunk + 1] if chunk + 1 < len(times) else self._count
+        # Binäre Suche innerhalb des Chunks
+        while low < high:
+            middle = (low + high) // 2
+            if self._time_at(middle) < t_ns:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def records(self, start_ns: Optional[int] = None, end_ns: Optional[int] = None,
+                kinds: Optional[Tuple[int, ...]] = None) -> Iterator[JournalRecord]:
+        """
+        Liefert Einträge als (t_ns, Art, Nummer, Zustand), t_ns seit Aufnahmebeginn.
+
+        Args:
+            start_ns, end_ns: Zeitfenster (end_ns ausschließlich)
+            kinds: Nur diese Arten (z.B. (JOURNAL_SWITCH,))
+        """
+        first = self.find(start_ns) if start_ns else 0
+        last = self.find(end_ns) if end_ns is not None else self._count
+        data = memoryview(self._mapping)[_HEADER.size + first * _RECORD.size:_HEADER.size + last * _RECORD.size]
+        try:
+            for t_ns, kind, state, number, _ in _RECORD.iter_unpack(data):
+                if kinds is None or kind in kinds:
+                    yield (t_ns, kind, number, state)
+        finally:
+            data.release()
+
+    def _time_at(self, position: int) -> int:
+        return struct.unpack_from('<Q', self._mapping, _HEADER.size + position * _RECORD.size)[0]
+
+    def _load_index(self):
+        """Lädt den Chunk-Index, ohne Indexdatei wird er aus dem Journal erzeugt."""
+        times, positions = [], []
+        try:
+            with open(self.path + _INDEX_SUFFIX, 'rb') as f:
+                data = f.read()
+            for t_ns, position in _INDEX_ENTRY.iter_unpack(data[:len(data) - len(data) % _INDEX_ENTRY.size]):
+                if position < self._count:
+                    times.append(t_ns)
+                    positions.append(position)
+        except OSError:
+            for position in range(0, self._count, self.chunk_records):
+                times.append(self._time_at(position))
+                positions.append(position)
+        return times, positions
+
+
+class JournalBackend:
+    """
+    Backend für PPUC, das ein anderes Backend (Standard: libppuc_wrapper.so)
+    durchreicht und dabei jedes ausgelesene Schalter-Ereignis und jeden
+    tatsächlich gesendeten Lampen-/Spulenbefehl ins Journal schreibt.
+
+    Befehle, die PPUC wegen unverändertem Zustand unterdrückt, erreichen
+    das Backend nicht und stehen daher auch nicht im Journal.
+    """
+
+    def __init__(self, journal: JournalWriter, backend=None):
+        self.journal = journal
+        self.backend = backend if backend is not None else load_library()
+        self._set_lamp = self.backend.ppuc_set_lamp_state
+        self._set_solenoid = self.backend.ppuc_set_solenoid_state
+        self._get_next = self.backend.ppuc_get_next_switch_state
+
+    def __getattr__(self, name):
+        # Alle übrigen Funktionen unverändert durchreichen (einmal gebunden)
+        value = getattr(self.backend, name)
+        setattr(self, name, value)
+        return value
+
+    def ppuc_set_lamp_state(self, obj, number, state):
+        self._set_lamp(obj, number, state)
+        self.journal.write(JOURNAL_LAMP, number, state)
+
+    def ppuc_set_solenoid_state(self, obj, number, state):
+        self._set_solenoid(obj, number, state)
+        self.journal.write(JOURNAL_SOLENOID, number, state)
+
+    def ppuc_get_next_switch_state(self, obj):
+        switch_state_ptr = self._get_next(obj)
+        if switch_state_ptr:
+            switch_state = switch_state_ptr.contents
+            self.journal.write(JOURNAL_SWITCH, switch_state.number, switch_state.state)
+        return switch_state_ptr
+
+
+class ReplayBackend:
+    """
+    Backend für PPUC, das die Schalter-Ereignisse eines Journals liefert.
+
+    Mit speed=1.0 kommen die Ereignisse im Originaltempo (gezählt ab dem
+    ersten Auslesen oder start()), mit speed=None so schnell wie möglich.
+    Die von der Spiellogik gesendeten Befehle stehen in commands und
+    lassen sich mit expected_commands() vergleichen. Alle übrigen
+    Funktionen liefert ein ppuc_fake.FakeLibrary (fake), das erst hier
+    importiert wird; Aufnahme und Lesen kommen ohne den Fake aus.
+    """
+
+    def __init__(self, path: str, speed: Optional[float] = 1.0,
+                 start_ns: Optional[int] = None, end_ns: Optional[int] = None):
+        from ppuc_fake import FakeLibrary
+        self.fake = FakeLibrary()
+        with JournalReader(path) as reader:
+            records = list(reader.records(start_ns, end_ns))
+        self._switches = [(t_ns, number, state) for t_ns, kind, number, state in records
+                          if kind == JOURNAL_SWITCH]
+        self._expected = [(kind, number, state) for _, kind, number, state in records
+                          if kind != JOURNAL_SWITCH]
+        self._offset_ns = self._switches[0][0] if self._switches else 0
+        self.speed = speed
+        self.commands = []
+        self._position = 0
+        self._clock_ns = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        # Übrige Funktionen und Hilfen (instance(), set_devices() ...) des Fakes
+        if name == 'fake':
+            raise AttributeError(name)
+        return getattr(self.fake, name)
+
+    @property
+    def finished(self) -> bool:
+        """True, wenn alle Schalter-Ereignisse ausgeliefert wurden."""
+        return self._position >= len(self._switches)
+
+    def start(self):
+        """Startet die Uhr für die Wiedergabe im Originaltempo."""
+        self._clock_ns = time.monotonic_ns()
+
+    def expected_commands(self):
+        """Die im Journal aufgezeichneten Befehle als (Art, Nummer, Zustand)."""
+        return list(self._expected)
+
+    def _next_due(self):
+        """Nächstes fälliges Schalter-Ereignis oder None."""
+        with self._lock:
+            position = self._position
+            if position >= len(self._switches):
+                return None
+            t_ns, number, state = self._switches[position]
+            if self.speed:
+                if self._clock_ns is None:
+                    self._clock_ns = time.monotonic_ns()
+                if (time.monotonic_ns() - self._clock_ns) * self.speed < t_ns - self._offset_ns:
+                    return None
+            self._position = position + 1
+            return number, state
+
+    def ppuc_get_next_switch_state(self, obj):
+        event = self._next_due()
+        if event is None:
+            return self.fake._NULL_SWITCH_STATE
+        instance = self.fake.instances[obj]
+        instance.switch_state.number, instance.switch_state.state = event
+        return instance.switch_state_ptr
+
+    def ppuc_set_lamp_state(self, obj, number, state):
+        self.fake.ppuc_set_lamp_state(obj, number, state)
+        self.commands.append((JOURNAL_LAMP, number, 1 if state else 0))
+
+    def ppuc_set_solenoid_state(self, obj, number, state):
+        self.fake.ppuc_set_solenoid_state(obj, number, state)
+        self.commands.append((JOURNAL_SOLENOID, number, 1 if state else 0))
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] not in ('info', 'dump'):
+        print("Verwendung: python3 ppuc_journal.py info|dump journal.ppj [von_s [bis_s]]")
+        sys.exit(1)
+    command, path = sys.argv[1], sys.argv[2]
+    start_ns = int(float(sys.argv[3]) * 1e9) if len(sys.argv) > 3 else None
+    end_ns = int(float(sys.argv[4]) * 1e9) if len(sys.argv) > 4 else None
+
+    with JournalReader(path) as reader:
+        if command == 'info':
+            counts = {}
+            for _, kind, _, _ in reader.records():
+                counts[kind] = counts.get(kind, 0) + 1
+            started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(reader.start_time_ns / 1e9))
+            print(f"Journal:  {path}")
+            print(f"Beginn:   {started}")
+            print(f"Dauer:    {reader.duration_ns / 1e9:.3f} s")
+            print(f"Einträge: {len(reader)}")
+            for kind, count in sorted(counts.items()):
+                print(f"  {KIND_NAMES.get(kind, chr(kind)):9s} {count}")
+        else:
+            for t_ns, kind, number, state in reader.records(start_ns, end_ns):
+                print(f"{t_ns / 1e9:12.6f}  {KIND_NAMES.get(kind, chr(kind)):9s} {number:5d}  {state}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+PPUC Latenz-Messung
+Misst die Zeit von einer Schalterflanke (z.B. Flipper-Taste) bis der
+zugehörige Spulenbefehl auf der Leitung erscheint, für jede Art, Schalter-
+Ereignisse zu verarbeiten: Polling, blockierendes Warten, Callbacks
+(SwitchDispatcher) und asyncio.
+
+Verwendung:
+    python3 ppuc_latency.py                        # gegen ppuc_fake
+    python3 ppuc_latency.py --backend simulator    # echte Bibliothek + pty-Simulator
+    python3 ppuc_latency.py --trials 20000 --styles wait callback
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from typing import List, Optional
+
+from ppuc_wrapper import PPUC, PPUCLibraryError, SwitchDispatcher
+
+DEFAULT_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "elektra.yml")
+STYLES = ('polling', 'wait', 'callback', 'asyncio')
+
+# Schlafintervall des Polling-Stils, wie in den Beispielskripten
+POLL_INTERVAL = 0.001
+
+
+class LatencyProbe:
+    """
+    Verbindet eingespielte Schalterflanken mit den Spulenbefehlen auf der
+    Leitung und sammelt die Latenzen in Nanosekunden.
+    """
+
+    def __init__(self, coil: int):
+        self.coil = coil
+        self._expected = None
+        self._arrived = threading.Event()
+        self._arrival_ns = 0
+
+    def on_command(self, number: int, state: int):
+        """Wird vom Backend aufgerufen, wenn ein Spulenbefehl ankommt."""
+        if number == self.coil and state == self._expected:
+            self._arrival_ns = time.monotonic_ns()
+            self._arrived.set()
+
+    def trial(self, inject, state: int, timeout: float) -> Optional[int]:
+        """
+        Spielt eine Flanke ein und wartet auf den Spulenbefehl.
+
+        Returns:
+            Latenz in Nanosekunden oder None bei Timeout
+        """
+        self._arrived.clear()
+        self._expected = state
+        start_ns = time.monotonic_ns()
+        inject(state)
+        if not self._arrived.wait(timeout):
+            self._expected = None
+            return None
+        return self._arrival_ns - start_ns
+
+
+def _flipper_mapping(config_file: str):
+    """Erster Ausgang mit fastFlipSwitch aus der Konfiguration: (Schalter, Spule)."""
+    from ppuc_config import load_compiled_configuration
+    compiled = load_compiled_configuration(config_file)
+    try:
+        for switch, coil in zip(compiled.column('pwm.fast_flip_switch'), compiled.column('pwm.number')):
+            if switch:
+                return switch, coil
+    finally:
+        compiled.close()
+    raise ValueError(f"{config_file}: kein Ausgang mit fastFlipSwitch gefunden")
+
+
+def _open_backend(backend: str, config_file: str, switch: int, probe: LatencyProbe):
+    """
+    Erstellt eine PPUC-Instanz und eine Funktion zum Einspielen der Flanke.
+
+    Returns:
+        (ppuc, inject(state), Aufräumfunktion)
+    """
+    if backend == 'fake':
+        from ppuc_fake import FakeLibrary
+
+        class TimedFakeLibrary(FakeLibrary):
+            def ppuc_set_solenoid_state(self, obj, number, state):
+                FakeLibrary.ppuc_set_solenoid_state(self, obj, number, state)
+                probe.on_command(number, state)
+
+        fake = TimedFakeLibrary()
+        ppuc = PPUC(backend=fake)
+        ppuc.load_configuration(config_file)
+        return ppuc, lambda state: fake.push_switch_state(switch, state), lambda: None
+
+    from ppuc_simulator import BoardSimulator, EVENT_SOURCE_SOLENOID
+
+    def listener(source, number, value):
+        if source == EVENT_SOURCE_SOLENOID:
+            probe.on_command(number, value)
+
+    simulator = BoardSimulator(config_file, listener=listener)
+    port = simulator.start()
+    try:
+        ppuc = PPUC()
+        ppuc.load_configuration(config_file)
+        ppuc.set_serial(port)
+        if not ppuc.connect():
+            raise RuntimeError(f"Verbindung zum Simulator auf {port} fehlgeschlagen")
+        ppuc.start_updates()
+    except BaseException:
+        simulator.stop()
+        raise
+
+    def close():
+        ppuc.stop_updates()
+        ppuc.disconnect()
+        simulator.stop()
+    return ppuc, lambda state: simulator.set_switch(switch, state), close
+
+
+def _start_consumer(style: str, ppuc: PPUC, switch: int, coil: int):
+    """
+    Startet die Flipper-Logik im gewählten Stil.
+
+    Returns:
+        Funktion, die den Verbraucher wieder beendet
+    """
+    set_solenoid = ppuc.set_solenoid_state
+
+    if style == 'callback':
+        dispatcher = SwitchDispatcher(ppuc)
+        dispatcher.on(switch, lambda number, state: set_solenoid(coil, state))
+        dispatcher.start()
+        return dispatcher.stop
+
+    running = True
+
+    if style == 'polling':
+        def run():
+            get_next = ppuc.get_next_switch_state
+            while running:
+                event = get_next()
+                if event is None:
+                    time.sleep(POLL_INTERVAL)
+                elif event[0] == switch:
+                    set_solenoid(coil, event[1])
+    elif style == 'wait':
+        def run():
+            wait_next = ppuc.wait_next_switch_state
+            while running:
+                event = wait_next(0.1)
+                if event is not None and event[0] == switch:
+                    set_solenoid(coil, event[1])
+    elif style == 'asyncio':
+        from ppuc_asyncio import AsyncPPUC
+        async_ppuc = AsyncPPUC(ppuc)
+        loop = asyncio.new_event_loop()
+
+        async def consume():
+            async for number, state in async_ppuc.switch_events():
+                if number == switch:
+                    await async_ppuc.set_solenoid_state(coil, state)
+
+        def run():
+            asyncio.set_event_loop(loop)
+            task = loop.create_task(consume())
+            try:
+                loop.run_until_complete(task)
+            except asyncio.CancelledError:
+                pass
+            finally:
+                loop.close()
+
+        thread = threading.Thread(target=run, name="ppuc-latency-asyncio", daemon=True)
+        thread.start()
+
+        def stop():
+            def cancel():
+                for task in asyncio.all_tasks(loop):
+                    task.cancel()
+            loop.call_soon_threadsafe(cancel)
+            thread.join()
+            async_ppuc.close()
+            ppuc.stop_switch_pump()
+        return stop
+    else:
+        raise ValueError(f"Unbekannter Stil: {style}")
+
+    thread = threading.Thread(target=run, name=f"ppuc-latency-{style}", daemon=True)
+    thread.start()
+
+    def stop():
+        nonlocal running
+        running = False
+        thread.join()
+        ppuc.stop_switch_pump()
+    return stop
+
+
+def percentile(sorted_samples: List[int], p: float) -> float:
+    """Perzentil nach dem Nearest-Rank-Verfahren (sorted_samples aufsteigend)."""
+    if not sorted_samples:
+        return math.nan
+    rank = max(1, math.ceil(p / 100 * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+def summarize(samples: List[int], timeouts: int) -> dict:
+    """Kennzahlen einer Messreihe in Mikrosekunden."""
+    ordered = sorted(samples)
+    to_us = 1e-3
+    return {
+        'trials': len(samples) + timeouts,
+        'timeouts': timeouts,
+        'min': ordered[0] * to_us if ordered else math.nan,
+        'p50': percentile(ordered, 50) * to_us,
+        'p99': percentile(ordered, 99) * to_us,
+        'p99.9': percentile(ordered, 99.9) * to_us,
+        'max': ordered[-1] * to_us if ordered else math.nan,
+        'jitter': statistics.pstdev(ordered) * to_us if len(ordered) > 1 else 0.0,
+    }
+
+
+def measure(style: str, backend: str = 'fake', config_file: str = DEFAULT_CONFIG,
+            trials: int = 20000, timeout: float = 0.5, max_gap: float = 0.0005,
+            switch: Optional[int] = None, coil: Optional[int] = None) -> dict:
+    """
+    Misst die Schalter-zu-Spule-Latenz für einen Verarbeitungsstil.
+
+    Zwischen den Versuchen wird eine zufällige Pause bis max_gap Sekunden
+    eingelegt, damit die Flanken nicht im Takt des Pollings liegen.
+    """
+    if switch is None or coil is None:
+        switch, coil = _flipper_mapping(config_file)
+    probe = LatencyProbe(coil)
+    ppuc, inject, close = _open_backend(backend, config_file, switch, probe)
+    stop = _start_consumer(style, ppuc, switch, coil)
+    rng = random.Random(0)
+    samples = []
+    timeouts = 0
+    try:
+        for i in range(trials):
+            latency = probe.trial(inject, (i + 1) & 1, timeout)
+            if latency is None:
+                timeouts += 1
+            else:
+                samples.append(latency)
+            if max_gap:
+                time.sleep(rng.uniform(0, max_gap))
+    finally:
+        stop()
+        close()
+    return summarize(samples, timeouts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Schalter-zu-Spule-Latenz des ppuc_wrapper")
+    parser.add_argument('--backend', choices=('fake', 'simulator'), default='fake',
+                        help="fake: ppuc_fake, simulator: echte Bibliothek am pty-Simulator")
+    parser.add_argument('--config', default=DEFAULT_CONFIG, help="YAML-Konfiguration")
+    parser.add_argument('--trials', type=int, default=20000, help="Versuche pro Stil")
+    parser.add_argument('--styles', nargs='*', choices=STYLES, default=list(STYLES))
+    parser.add_argument('--switch', type=int, help="Schalter (Standard: fastFlipSwitch aus der Konfiguration)")
+    parser.add_argument('--coil', type=int, help="Spule (Standard: Ausgang mit fastFlipSwitch)")
+    args = parser.parse_args()
+
+    switch, coil = args.switch, args.coil
+    if switch is None or coil is None:
+        switch, coil = _flipper_mapping(args.config)
+
+    print(f"PPUC Latenz Schalter {switch} -> Spule {coil} ({args.backend}, {args.trials} Versuche)")
+    print("=" * 78)
+    print(f"{'Stil':10s} {'p50':>9s} {'p99':>9s} {'p99.9':>9s} {'max':>9s} {'Jitter':>9s} {'Timeouts':>9s}  (µs)")
+    for style in args.styles:
+        try:
+            result = measure(style, args.backend, args.config, args.trials, switch=switch, coil=coil)
+        except PPUCLibraryError as e:
+            print(f"✗ {e}")
+            sys.exit(1)
+        print(f"{style:10s} {result['p50']:9.1f} {result['p99']:9.1f} {result['p99.9']:9.1f} "
+              f"{result['max']:9.1f} {result['jitter']:9.1f} {result['timeouts']:9d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""
+PPUC Metriken
+Laufzeit-Kennzahlen einer PPUC-Instanz: Schalter-Ereignisse und Lampen-/
+Spulenbefehle pro Sekunde, Tiefe und Höchststand der Switch-Queue,
+unterdrückte Schreibzugriffe, Link-Zähler sowie Histogramme der
+ctypes-Aufrufe, der Switch-Callbacks und (mit PPUC.enable_profiling())
+der PPUC-Methoden. Ausgabe im Prometheus-Textformat
+über einen HTTP-Endpunkt auf localhost oder als regelmäßig neu
+geschriebene Datei (node_exporter textfile collector).
+
+Beispiel:
+    ppuc = PPUC()
+    metrics = ppuc.enable_metrics()
+    metrics.serve(9464)                   # http://127.0.0.1:9464/metrics
+    metrics.write_textfile("/var/lib/node_exporter/ppuc.prom", interval=15)
+
+Verwendung:
+    python3 ppuc_metrics.py elektra.yml [port]   # Demo gegen ppuc_fake
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Tuple
+
+# Klassengrenzen (Sekunden) für die Histogramme im Prometheus-Format
+PROMETHEUS_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+                      1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 1e-1)
+
+# Über PPUC-Methoden aufgerufene Funktionen des C-Wrappers, deren Dauer
+# während der Stichproben-Fenster gemessen wird
+TIMED_FUNCTIONS = ('ppuc_set_lamp_state', 'ppuc_set_solenoid_state',
+                   'ppuc_get_next_switch_state')
+
+
+class Histogram:
+    """
+    Histogramm für Ganzzahlen (z.B. Nanosekunden) nach dem Vorbild von
+    HdrHistogram: pro Zweierpotenz 2**sub_bits gleich breite Klassen, also
+    eine relative Auflösung von 2**-sub_bits über den ganzen Wertebereich
+    bei fester Größe. record() kostet eine Handvoll Ganzzahl-Operationen.
+    """
+
+    def __init__(self, sub_bits: int = 5, max_value: int = 60 * 10**9):
+        """
+        Args:
+            sub_bits: Klassen pro Zweierpotenz als Zweierexponent
+            max_value: Größere Werte landen in der obersten Klasse
+        """
+        self.sub_bits = sub_bits
+        self._sub = 1 << sub_bits
+        self.max_value = max_value
+        self.counts = [0] * (self._index(max_value) + 1)
+        self.reset()
+
+    def _index(self, value: int) -> int:
+        sub = self._sub
+        if value < sub:
+            return value
+        shift = value.bit_length() - self.sub_bits - 1
+        return (shift + 1) * sub + (value >> shift) - sub
+
+    def _bounds(self, index: int) -> Tuple[int, int]:
+        """Kleinster und größter Wert einer Klasse."""
+        sub = self._sub
+        if index < 2 * sub:
+            return index, index
+        shift = index // sub - 1
+        low = (index % sub + sub) << shift
+        return low, low + (1 << shift) - 1
+
+    def record(self, value: int):
+        """Verbucht einen Wert (negative Werte zählen als 0)."""
+        if value < 0:
+            value = 0
+        sub = self._sub
+        if value < sub:
+            index = value
+        else:
+            if value > self.max_value:
+                value = self.max_value
+            shift = value.bit_length() - self.sub_bits - 1
+            index = (shift + 1) * sub + (value >> shift) - sub
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+        if value < self.min:
+            self.min = value
+
+    def reset(self):
+        counts = self.counts
+        for i in range(len(counts)):
+            counts[i] = 0
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.min = sys.maxsize
+
+    def merge(self, other: 'Histogram'):
+        """Addiert ein Histogramm mit gleicher Auflösung."""
+        if other.sub_bits != self.sub_bits or len(other.counts) != len(self.counts):
+            raise ValueError("Histogramme mit unterschiedlicher Auflösung")
+        counts = self.counts
+        for i, n in enumerate(other.counts):
+            if n:
+                counts[i] += n
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self.min = min(self.min, other.min)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> int:
+        """Wert, unter dem p Prozent der Einträge liegen (obere Klassengrenze)."""
+        if not self.count:
+            return 0
+        rank = max(1, int(p / 100 * self.count + 0.5))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self._bounds(index)[1], self.max)
+        return self.max
+
+    def cumulative(self, bounds: Iterable[float]) -> list:
+        """Anzahl der Einträge bis einschließlich jeder Grenze (aufsteigend)."""
+        result = []
+        seen = 0
+        index = 0
+        counts = self.counts
+        for bound in bounds:
+            while index < len(counts) and self._bounds(index)[1] <= bound:
+                seen += counts[index]
+                index += 1
+            result.append(seen)
+        return result
+
+    def summary(self) -> dict:
+        """Kennzahlen in den Einheiten der Werte."""
+        return {
+            'count': self.count,
+            'min': self.min if self.count else 0,
+            'mean': self.mean,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'p99.9': self.percentile(99.9),
+            'max': self.max,
+        }
+
+
+class TimingBackend:
+    """
+    Backend für PPUC, das ein anderes Backend durchreicht und die Dauer
+    jedes Aufrufs der TIMED_FUNCTIONS in ein Histogramm pro Funktion
+    schreibt. Metrics setzt es nur für kurze Stichproben-Fenster ein.
+    """
+
+    def __init__(self, metrics: 'Metrics', backend):
+        self.backend = backend
+        for name in TIMED_FUNCTIONS:
+            setattr(self, name, self._timed(getattr(backend, name), metrics.ctypes_histogram(name)))
+
+    def __getattr__(self, name):
+        # Alle übrigen Funktionen unverändert durchreichen (einmal gebunden)
+        value = getattr(self.backend, name)
+        setattr(self, name, value)
+        return value
+
+    @staticmethod
+    def _timed(function, histogram: Histogram):
+        record = histogram.record
+        perf_counter_ns = time.perf_counter_ns
+
+        def timed(*args):
+            start = perf_counter_ns()
+            result = function(*args)
+            record(perf_counter_ns() - start)
+            return result
+        return timed
+
+
+class Metrics:
+    """
+    Kennzahlen einer PPUC-Instanz (siehe PPUC.enable_metrics()).
+
+    Die Zähler führt PPUC selbst (get_output_stats() u.a.); Raten,
+    Queue-Stand, Link- und Log-Zähler werden erst beim Auslesen
+    (snapshot(), render_prometheus()) berechnet. Die Dauer der
+    ctypes-Aufrufe wird nur in Stichproben-Fenstern gemessen: ein eigener
+    Thread lässt PPUC in jeder timing_period für timing_window Sekunden ein
+    TimingBackend vor die Bibliothek legen, sodass der Aufwand außerhalb
+    der Fenster null ist.
+    """
+
+    def __init__(self, ppuc, timing_period: float = 1.0, timing_window: float = 0.01):
+        """
+        Args:
+            ppuc: Zugehörige PPUC-Instanz
+            timing_period: Abstand der Stichproben-Fenster in Sekunden
+            timing_window: Länge eines Fensters, 0 schaltet die Messung ab
+        """
+        self.ppuc = ppuc
+        self.timing_period = timing_period
+        self.timing_window = min(timing_window, timing_period)
+        self.ctypes_time: Dict[str, Histogram] = {}
+        self.callback_time = Histogram()
+        self._lock = threading.Lock()
+        self._last = (time.monotonic(), self._totals())
+        self._server = None
+        self._textfile = None
+        self._sampler = None
+        if self.timing_window > 0:
+            stop = threading.Event()
+            thread = threading.Thread(target=self._sample_timing, args=(stop,),
+                                      name="ppuc-metrics-sampler", daemon=True)
+            self._sampler = (thread, stop)
+            thread.start()
+
+    def ctypes_histogram(self, function: str) -> Histogram:
+        """Histogramm der Aufrufzeiten (ns) einer Funktion des C-Wrappers."""
+        histogram = self.ctypes_time.get(function)
+        if histogram is None:
+            histogram = self.ctypes_time[function] = Histogram()
+        return histogram
+
+    def _sample_timing(self, stop: threading.Event):
+        """Setzt das TimingBackend periodisch für ein Fenster ein."""
+        ppuc = self.ppuc
+        while not stop.wait(self.timing_period - self.timing_window):
+            # PPUC baut die Kette der Backends unter seinem Lock neu auf,
+            # damit enable_tracing() u.a. dazwischen nichts verlieren
+            ppuc._begin_timing(self)
+            try:
+                stop.wait(self.timing_window)
+            finally:
+                ppuc._end_timing(self)
+
+    def timed_callback(self, callback):
+        """Umhüllt einen Callback, dessen Laufzeit (ns) in callback_time landet."""
+        record = self.callback_time.record
+        perf_counter_ns = time.perf_counter_ns
+
+        def timed(*args):
+            start = perf_counter_ns()
+            try:
+                return callback(*args)
+            finally:
+                record(perf_counter_ns() - start)
+        return timed
+
+    def _totals(self, output=None) -> Tuple[int, int, int]:
+        """(Schalter-Ereignisse, Lampenbefehle, Spulenbefehle) seit Start."""
+        if output is None:
+            output = self.ppuc.get_output_stats()
+        return output['switch_events_read'], output['lamp_writes'], output['solenoid_writes']
+
+    def snapshot(self) -> dict:
+        """
+        Aktuelle Kennzahlen. Die Raten (pro Sekunde) beziehen sich auf die
+        Zeit seit dem vorherigen snapshot(), beim ersten Aufruf auf die
+        Zeit seit enable_metrics().
+        """
+        ppuc = self.ppuc
+        now = time.monotonic()
+        output = ppuc.get_output_stats()
+        totals = self._totals(output)
+        with self._lock:
+            last = self._last
+            self._last = (now, totals)
+        elapsed = now - last[0]
+        rates = tuple((a - b) / elapsed if elapsed > 0 else 0.0 for a, b in zip(totals, last[1]))
+        queue = ppuc.get_switch_queue_stats()
+        return {
+            'switch_events': totals[0],
+            'lamp_commands': totals[1],
+            'solenoid_commands': totals[2],
+            'switch_events_per_second': rates[0],
+            'lamp_commands_per_second': rates[1],
+            'solenoid_commands_per_second': rates[2],
+            'suppressed_writes': output['suppressed_writes'],
+            'queue_depth': queue['queued'],
+            'queue_high_water': queue['high_water'],
+            'queue_age_max_ns': queue['age_max_ns'],
+            'link': ppuc.get_link_counters(),
+            'log': ppuc.get_log_stats(),
+            'callback_time_ns': self.callback_time.summary(),
+            'ctypes_time_ns': {name: h.summary() for name, h in self.ctypes_time.items()},
+        }
+
+    def render_prometheus(self) -> str:
+        """Alle Kennzahlen im Prometheus-Textformat (Version 0.0.4)."""
+        s = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{labels} {value}")
+
+        metric("ppuc_switch_events_total", "counter", "Aus der Bibliothek gelesene Schalter-Ereignisse",
+               [("", s['switch_events'])])
+        metric("ppuc_commands_total", "counter", "An die Bibliothek gesendete Befehle",
+               [('{kind="lamp"}', s['lamp_commands']), ('{kind="solenoid"}', s['solenoid_commands'])])
+        metric("ppuc_suppressed_writes_total", "counter", "Wegen unveraendertem Zustand nicht gesendete Befehle",
+               [("", s['suppressed_writes'])])
+        metric("ppuc_switch_events_per_second", "gauge", "Schalter-Ereignisse pro Sekunde seit der letzten Abfrage",
+               [("", f"{s['switch_events_per_second']:.3f}")])
+        metric("ppuc_commands_per_second", "gauge", "Befehle pro Sekunde seit der letzten Abfrage",
+               [('{kind="lamp"}', f"{s['lamp_commands_per_second']:.3f}"),
+                ('{kind="solenoid"}', f"{s['solenoid_commands_per_second']:.3f}")])
+        metric("ppuc_switch_queue_depth", "gauge", "Wartende Ereignisse in der Switch-Queue",
+               [("", s['queue_depth'])])
+        metric("ppuc_switch_queue_high_water", "gauge", "Hoechststand der Switch-Queue",
+               [("", s['queue_high_water'])])
+        metric("ppuc_switch_queue_age_max_seconds", "gauge", "Laengste Wartezeit eines Ereignisses in der Queue",
+               [("", s['queue_age_max_ns'] / 1e9)])
+        metric("ppuc_link_events_total", "counter", "Link-Ereignisse aus den Log-Meldungen der Bibliothek",
+               [(f'{{event="{name}"}}', value) for name, value in s['link'].items()])
+        metric("ppuc_log_lines_total", "counter", "Log-Zeilen der Bibliothek nach Verbleib",
+               [(f'{{state="{name}"}}', value) for name, value in s['log'].items() if name != 'queued'])
+
+        def histogram(name, help_text, series):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            bounds_ns = [bound * 1e9 for bound in PROMETHEUS_BUCKETS]
+            for labels, h in series:
+                sep = "," if labels else ""
+                for bound, count in zip(PROMETHEUS_BUCKETS, h.cumulative(bounds_ns)):
+                    lines.append(f'{name}_bucket{{{labels}{sep}le="{bound:g}"}} {count}')
+                lines.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {h.count}')
+                suffix = f"{{{labels}}}" if labels else ""
+                lines.append(f"{name}_sum{suffix} {h.total / 1e9:.9f}")
+                lines.append(f"{name}_count{suffix} {h.count}")
+
+        histogram("ppuc_ctypes_call_seconds", "Dauer der Aufrufe des C-Wrappers in den Stichproben-Fenstern",
+                  [(f'function="{name}"', h) for name, h in sorted(self.ctypes_time.items())])
+        histogram("ppuc_callback_seconds", "Dauer der Switch-Handler im SwitchDispatcher",
+                  [("", self.callback_time)])
+        profile = self.ppuc.profile
+        if profile:
+            histogram("ppuc_method_seconds", "Dauer der PPUC-Methoden (enable_profiling)",
+                      [(f'method="{name}"', h) for name, h in sorted(profile.items()) if h.count])
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int = 9464, host: str = "127.0.0.1") -> Tuple[str, int]:
+        """
+        Startet einen HTTP-Endpunkt für Prometheus in einem eigenen Thread.
+
+        Returns:
+            (Host, Port), bei port=0 mit dem tatsächlich gewählten Port
+        """
+        if self._server is not None:
+            return self._server.server_address[:2]
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        thread = threading.Thread(target=server.serve_forever, name="ppuc-metrics-http", daemon=True)
+        thread.start()
+        self._server = server
+        return server.server_address[:2]
+
+    def write_textfile(self, path: str, interval: float = 15.0):
+        """
+        Schreibt die Kennzahlen alle interval Sekunden atomar nach path
+        (Endung .prom für den textfile collector des node_exporter).
+        """
+        self._stop_textfile()
+        stop = threading.Event()
+
+        def run():
+            while True:
+                try:
+                    self._write_once(path)
+                except OSError as e:
+                    print(f"Fehler beim Schreiben der Metriken nach {path}: {e}")
+                if stop.wait(interval):
+                    return
+
+        thread = threading.Thread(target=run, name="ppuc-metrics-textfile", daemon=True)
+        self._textfile = (thread, stop)
+        thread.start()
+
+    def _write_once(self, path: str):
+        directory_name = os.path.dirname(path) or "."
+        fd, tmp_path = tempfile.mkstemp(prefix=".ppuc-metrics-", dir=directory_name)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(self.render_prometheus())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def _stop_textfile(self):
+        if self._textfile is not None:
+            thread, stop = self._textfile
+            stop.set()
+            thread.join()
+            self._textfile = None
+
+    def stop(self):
+        """Beendet Stichproben, HTTP-Endpunkt und Textdatei-Thread."""
+        if self._sampler is not None:
+            thread, stop = self._sampler
+            stop.set()
+            if thread is not threading.current_thread():
+                thread.join()
+            self._sampler = None
+        self._stop_textfile()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Verwendung: python3 ppuc_metrics.py config.yaml [port]")
+        sys.exit(1)
+    config_file = sys.argv[1]
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 9464
+
+    from ppuc_fake import FakeLibrary
+    from ppuc_wrapper import PPUC, SwitchDispatcher
+
+    fake = FakeLibrary()
+    ppuc = PPUC(backend=fake)
+    ppuc.load_configuration(config_file)
+    metrics = ppuc.enable_metrics()
+    ppuc.connect()
+    dispatcher = SwitchDispatcher(ppuc)
+    dispatcher.set_default_handler(lambda number, state: ppuc.set_lamp_state(number, state))
+    dispatcher.start()
+    host, port = metrics.serve(port)
+    print(f"✓ Metriken unter http://{host}:{port}/metrics (Demo mit ppuc_fake)")
+    print("Drücke Ctrl+C zum Beenden")
+
+    try:
+        number = 0
+        while True:
+            fake.push_switch_state(number % 64 + 1, number & 1)
+            number += 1
+            time.sleep(0.001)
+    except KeyboardInterrupt:
+        print("\nDemo wird beendet")
+    finally:
+        dispatcher.stop()
+        metrics.stop()
+
+
+if __name__ == "__main__":
+    main()
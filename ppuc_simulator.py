@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+PPUC Board-Simulator
+Öffnet ein Pseudo-Terminal (pty) und beantwortet das RS485-Protokoll der
+PPUC-Boards aus einer Konfiguration wie elektra.yml. Die Bibliothek kann
+damit ohne Hardware verbunden werden (set_serial() auf den pty-Pfad).
+
+Verwendung:
+    python3 ppuc_simulator.py elektra.yml [schalter_pro_sekunde]
+"""
+
+import os
+import random
+import select
+import sys
+import threading
+import time
+import tty
+from collections import deque
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+# Quellen der Events (zweites Byte eines Frames)
+EVENT_SOURCE_SOLENOID = ord('S')
+EVENT_SOURCE_LIGHT = ord('L')
+EVENT_SOURCE_SWITCH = ord('W')
+EVENT_SOURCE_CONFIG = ord('C')
+EVENT_POLL_EVENTS = ord('P')
+EVENT_PONG = ord('Y')
+EVENT_NULL = ord('N')
+
+# Frames: FF Quelle IdHi IdLo Wert AA 55 bzw. für Konfiguration
+# FF 'C' Board Topic Index Key Wert(4 Bytes, big endian) AA 55
+START_BYTE = 0xFF
+STOP_BYTES = b'\xaa\x55'
+EVENT_FRAME_SIZE = 7
+CONFIG_FRAME_SIZE = 12
+
+# Die Bibliothek fragt bei der Verbindung die Boards 0-15 ab
+MAX_BOARDS = 16
+
+
+def encode_event(source: int, event_id: int, value: int) -> bytes:
+    """Baut einen Event-Frame."""
+    return bytes((START_BYTE, source, (event_id >> 8) & 0xFF, event_id & 0xFF, value & 0xFF)) + STOP_BYTES
+
+
+class BoardSimulator:
+    """
+    Simuliert die I/O-Boards einer PPUC-Konfiguration an einem pty.
+
+    Auf jedes Poll-Event ('P') eines konfigurierten Boards antwortet der
+    Simulator mit 'Y' (Board vorhanden), den anstehenden Schalter-Events
+    ('W') dieses Boards und 'N' (Ende der Antwort). Lampen- und
+    Spulenbefehle sowie Konfigurations-Events werden mitgeschrieben.
+    Schalter-Events können einzeln, als Skript oder zufällig mit fester
+    Rate eingespielt werden.
+    """
+
+    def __init__(self, config_file: Optional[str] = None, boards: Iterable[int] = (),
+                 switches: Optional[Dict[int, int]] = None,
+                 listener: Optional[Callable[[int, int, int], None]] = None):
+        """
+        Args:
+            config_file: YAML-Konfiguration, aus der Boards und Schalter
+                gelesen werden
+            boards: Zusätzliche Board-Nummern
+            switches: Zusätzliche Zuordnung Schalter-Nummer -> Board
+            listener: Wird im Simulator-Thread mit (Quelle, Nummer, Wert)
+                für jeden Lampen- und Spulenbefehl aufgerufen, sobald er
+                vom pty gelesen wurde
+        """
+        self.listener = listener
+        self.boards = set(boards)
+        self.switch_boards = dict(switches or {})
+        if config_file is not None:
+            from ppuc_config import load_compiled_configuration
+            compiled = load_compiled_configuration(config_file)
+            self.boards.update(compiled.column('board.number'))
+            self.switch_boards.update(zip(compiled.column('switch.number'), compiled.column('switch.board')))
+            compiled.close()
+        for board in self.boards:
+            if not 0 <= board < MAX_BOARDS:
+                raise ValueError(f"Ungültige Board-Nummer {board}")
+        self.boards.update(self.switch_boards.values())
+
+        # Zustand, wie ihn die Boards sehen
+        self.lamps: Dict[int, int] = {}
+        self.solenoids: Dict[int, int] = {}
+        self.switches: Dict[int, int] = {}
+        self.config_events = []
+
+        # Zähler
+        self.frames_received = 0
+        self.polls = 0
+        self.bad_frames = 0
+        self.switch_events_sent = 0
+
+        self._pending = {board: deque() for board in self.boards}
+        self._lock = threading.Lock()
+        self._master = None
+        self._slave = None
+        self.port = None
+        self._thread = None
+        self._traffic = None
+        self._running = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def start(self) -> str:
+        """Öffnet das pty und startet den Simulator; gibt den Port-Pfad zurück."""
+        if self._running:
+            return self.port
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="ppuc-simulator", daemon=True)
+        self._thread.start()
+        return self.port
+
+    def stop(self):
+        """Beendet Simulator und Schalter-Verkehr und schließt das pty."""
+        self.stop_traffic()
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                os.close(fd)
+        self._master = self._slave = None
+
+    def set_switch(self, number: int, state: int):
+        """Ändert einen Schalter; das Event geht beim nächsten Poll seines Boards raus."""
+        board = self.switch_boards.get(number)
+        if board is None:
+            raise KeyError(f"Schalter {number} ist keinem Board zugeordnet")
+        state = 1 if state else 0
+        with self._lock:
+            self.switches[number] = state
+            self._pending[board].append(encode_event(EVENT_SOURCE_SWITCH, number, state))
+
+    def play(self, script: Sequence[Tuple[float, int, int]]):
+        """
+        Spielt ein Skript aus (Verzögerung in s, Schalter, Zustand) ab.
+
+        Blockiert, bis das Skript abgespielt ist.
+        """
+        for delay, number, state in script:
+            if delay > 0:
+                time.sleep(delay)
+            self.set_switch(number, state)
+
+    def start_traffic(self, rate: float, switches: Optional[Sequence[int]] = None, seed: Optional[int] = None):
+        """
+        Erzeugt zufällige Schalter-Events mit der angegebenen Rate.
+
+        Args:
+            rate: Events pro Sekunde
+            switches: Schalter, die umgeschaltet werden (Standard: alle)
+            seed: Startwert des Zufallsgenerators für reproduzierbare Läufe
+        """
+        self.stop_traffic()
+        numbers = list(switches if switches is not None else self.switch_boards)
+        if rate <= 0 or not numbers:
+            return
+        stop = threading.Event()
+
+        def run():
+            rng = random.Random(seed)
+            interval = 1.0 / rate
+            deadline = time.monotonic()
+            while not stop.is_set():
+                number = rng.choice(numbers)
+                self.set_switch(number, not self.switches.get(number, 0))
+                deadline += interval
+                delay = deadline - time.monotonic()
+                if delay > 0:
+                    stop.wait(delay)
+
+        thread = threading.Thread(target=run, name="ppuc-simulator-traffic", daemon=True)
+        self._traffic = (thread, stop)
+        thread.start()
+
+    def stop_traffic(self):
+        """Beendet den zufälligen Schalter-Verkehr."""
+        if self._traffic is not None:
+            thread, stop = self._traffic
+            stop.set()
+            thread.join()
+            self._traffic = None
+
+    def _run(self):
+        """Liest Frames vom pty und beantwortet sie."""
+        buffer = bytearray()
+        while self._running:
+            readable, _, _ = select.select([self._master], [], [], 0.05)
+            if not readable:
+                continue
+            try:
+                buffer += os.read(self._master, 4096)
+            except OSError:
+                break
+            self._process(buffer)
+
+    def _process(self, buffer: bytearray):
+        """Verarbeitet alle vollständigen Frames im Puffer."""
+        while buffer:
+            if buffer[0] != START_BYTE:
+                # Synchronisation verloren: bis zum nächsten Startbyte verwerfen
+                start = buffer.find(START_BYTE)
+                self.bad_frames += 1
+                del buffer[:start if start >= 0 else len(buffer)]
+                continue
+            if len(buffer) < 2:
+                return
+            size = CONFIG_FRAME_SIZE if buffer[1] == EVENT_SOURCE_CONFIG else EVENT_FRAME_SIZE
+            if len(buffer) < size:
+                return
+            frame = bytes(buffer[:size])
+            if frame[-2:] != STOP_BYTES:
+                self.bad_frames += 1
+                del buffer[:1]
+                continue
+            del buffer[:size]
+            self.frames_received += 1
+            self._handle(frame)
+
+    def _handle(self, frame: bytes):
+        """Beantwortet einen einzelnen Frame."""
+        source = frame[1]
+        if source == EVENT_SOURCE_CONFIG:
+            board, topic, index, key = frame[2:6]
+            self.config_events.append((board, topic, index, key, int.from_bytes(frame[6:10], 'big')))
+            return
+
+        event_id = (frame[2] << 8) | frame[3]
+        value = frame[4]
+        if source == EVENT_POLL_EVENTS:
+            pending = self._pending.get(value)
+            if pending is None:
+                # Nicht konfiguriertes Board antwortet nicht (Timeout in der Bibliothek)
+                return
+            self.polls += 1
+            with self._lock:
+                events = list(pending)
+                pending.clear()
+            self.switch_events_sent += len(events)
+            response = encode_event(EVENT_PONG, 1, value) + b''.join(events) + encode_event(EVENT_NULL, 1, value)
+            self._write(response)
+        elif source == EVENT_SOURCE_LIGHT or source == EVENT_SOURCE_SOLENOID:
+            if source == EVENT_SOURCE_LIGHT:
+                self.lamps[event_id] = value
+            else:
+                self.solenoids[event_id] = value
+            if self.listener is not None:
+                self.listener(source, event_id, value)
+
+    def _write(self, data: bytes):
+        """Schreibt data vollständig auf das pty (os.write schreibt ggf. nur einen Teil)."""
+        view = memoryview(data)
+        while view:
+            try:
+                written = os.write(self._master, view)
+            except BlockingIOError:
+                # Puffer des pty voll: warten, bis die Bibliothek liest
+                select.select([], [self._master], [], 0.05)
+                continue
+            view = view[written:]
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Verwendung: python3 ppuc_simulator.py config.yaml [schalter_pro_sekunde]")
+        sys.exit(1)
+    config_file = sys.argv[1]
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+
+    simulator = BoardSimulator(config_file)
+    port = simulator.start()
+    print(f"✓ Simulator für Boards {sorted(simulator.boards)} läuft auf {port}")
+    print("Drücke Ctrl+C zum Beenden")
+    simulator.start_traffic(rate)
+
+    try:
+        while True:
+            time.sleep(1)
+            print(f"Frames: {simulator.frames_received}  Polls: {simulator.polls}  "
+                  f"Schalter gesendet: {simulator.switch_events_sent}  Lampen an: "
+                  f"{sum(simulator.lamps.values())}  Fehler: {simulator.bad_frames}")
+    except KeyboardInterrupt:
+        print("\nSimulator wird beendet")
+    finally:
+        simulator.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -99,22 +99,45 @@ class PPUCSwitchMonitor:
         self.running = True
         last_event_time = time.time()
         
+        # Index für die Beschreibung der Schalter pro Ereignis
+        try:
+            switch_index = self.ppuc.get_switch_index()
+        except Exception as e:
+            print(f"Warnung: Kein Schalter-Index verfügbar: {e}")
+            switch_index = None
+        
+        # Empfangszeit der letzten Flanke pro Schalter (für Prell-Intervalle)
+        last_edge_ns = {}
+        
         try:
             while self.running:
-                # Nächstes Switch-Event abrufen
-                event = self.ppuc.get_next_switch_state()
+                # Auf das nächste Switch-Event warten (blockierend, max. 1s)
+                event = self.ppuc.wait_next_switch_event(timeout=1.0)
                 
                 if event:
-                    switch_number, switch_state = event
+                    switch_number, switch_state, t_ns = event
                     state_text = "AKTIV" if switch_state else "INAKTIV"
-                    timestamp = time.strftime("%H:%M:%S")
                     
-                    print(f"[{timestamp}] Switch {switch_number:3d}: {state_text}")
+                    # Uhrzeit des Empfangs statt der Ausgabe
+                    age_ns = time.monotonic_ns() - t_ns
+                    received = time.time() - age_ns / 1e9
+                    timestamp = time.strftime("%H:%M:%S", time.localtime(received)) + f".{int(received * 1000) % 1000:03d}"
+                    
+                    interval = ""
+                    previous_ns = last_edge_ns.get(switch_number)
+                    if previous_ns is not None:
+                        interval = f" +{(t_ns - previous_ns) / 1e6:.1f} ms"
+                    last_edge_ns[switch_number] = t_ns
+                    
+                    description = ""
+                    if switch_index is not None:
+                        names = {switch.description for switch in switch_index.by_number(switch_number)}
+                        if names:
+                            description = f" ({' / '.join(sorted(names))})"
+                    
+                    print(f"[{timestamp}] Switch {switch_number:3d}: {state_text}{description}{interval}")
                     last_event_time = time.time()
                 else:
-                    # Kleine Pause wenn keine Events vorliegen
-                    time.sleep(0.001)  # 1ms Pause
-                    
                     # Lebenszeichen alle 10 Sekunden wenn keine Events
                     if time.time() - last_event_time > 10:
                         print(f"[{time.strftime('%H:%M:%S')}] Monitoring läuft... (keine Events)")
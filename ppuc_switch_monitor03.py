@@ -5,7 +5,6 @@ Einfache Ausgabe aller Switch-Ereignisse
 """
 
 import sys
-import time
 import signal
 from ppuc_wrapper import PPUC
 
@@ -67,16 +66,13 @@ def main():
         
         # Hauptschleife
         while running:
-            # Nächstes Switch-Event abrufen
-            event = ppuc_instance.get_next_switch_state()
+            # Auf das nächste Switch-Event warten (Timeout für Ctrl+C)
+            event = ppuc_instance.wait_next_switch_state(timeout=0.5)
             
             if event:
                 switch_number, switch_state = event
                 state_text = "AN" if switch_state else "AUS"
                 print(f"Switch {switch_number}: {state_text}")
-            else:
-                # Kurze Pause wenn keine Events
-                time.sleep(0.01)
     
     except Exception as e:
         print(f"Fehler: {e}")
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+PPUC Trace
+Schreibt Schalter-Ereignisse, gesendete Lampen-/Spulenbefehle, Spulen-,
+Lampen- und Schaltertests sowie Log-Meldungen im Trace Event Format
+(JSON) von Chrome. Die Datei lässt sich in https://ui.perfetto.dev oder
+chrome://tracing öffnen; jede Art von Ereignis hat eine eigene Spur.
+
+Aufnahme:
+    ppuc = PPUC()
+    trace = ppuc.enable_tracing("spiel.json")   # vor start_updates()
+    ...
+    ppuc.disable_tracing()
+
+Verwendung:
+    python3 ppuc_trace.py spiel.ppj spiel.json   # Journal (ppuc_journal) umwandeln
+"""
+
+import json
+import sys
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+# Spuren (tid) im Trace
+TRACK_SWITCH = 1
+TRACK_LAMP = 2
+TRACK_SOLENOID = 3
+TRACK_TEST = 4
+TRACK_LOG = 5
+TRACK_NAMES = {
+    TRACK_SWITCH: "Schalter",
+    TRACK_LAMP: "Lampen",
+    TRACK_SOLENOID: "Spulen",
+    TRACK_TEST: "Tests und Verbindung",
+    TRACK_LOG: "Log",
+}
+
+_PID = 1
+
+# Standard-Größe des Puffers (Ereignisse) und Schreibintervall (Sekunden)
+DEFAULT_BUFFER_SIZE = 100000
+DEFAULT_FLUSH_INTERVAL = 0.5
+
+
+class TraceWriter:
+    """
+    Schreibt Trace-Ereignisse fortlaufend in eine JSON-Datei.
+
+    Die Aufrufer hängen nur ein Tupel an eine begrenzte deque; ein
+    Hintergrund-Thread wandelt sie alle flush_interval Sekunden in JSON und
+    schreibt sie an. Ist der Puffer voll, wird das Ereignis verworfen und
+    gezählt (dropped), der Aufrufer wartet nie auf die Datei. Auch ohne
+    close() bleibt die Datei lesbar, da Trace-Viewer eine fehlende
+    schließende Klammer akzeptieren.
+    """
+
+    def __init__(self, path: str, buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL, start_ns: Optional[int] = None):
+        """
+        Args:
+            path: Ziel-Datei (.json)
+            buffer_size: Maximal wartende Ereignisse
+            flush_interval: Schreibintervall in Sekunden
+            start_ns: Nullpunkt der Zeitachse (monotonic_ns), Standard: jetzt
+        """
+        self.path = path
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.start_ns = time.monotonic_ns() if start_ns is None else start_ns
+        self.written = 0   # Ereignisse ohne die Metadaten der Spuren
+        self.dropped = 0
+        self._queue = deque()
+        self._file = open(path, 'w', encoding='utf-8')
+        self._file.write("[\n")
+        self._first = True
+        self._closed = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        for tid, name in sorted(TRACK_NAMES.items()):
+            self._write_event({'ph': 'M', 'pid': _PID, 'tid': tid, 'name': 'thread_name',
+                               'args': {'name': name}})
+        self._write_event({'ph': 'M', 'pid': _PID, 'tid': 0, 'name': 'process_name',
+                           'args': {'name': "PPUC"}})
+        self._thread = threading.Thread(target=self._run, name="ppuc-trace", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def instant(self, track: int, name: str, args: Optional[dict] = None, t_ns: Optional[int] = None):
+        """Zeitpunkt-Ereignis (t_ns: monotonic_ns, Standard: jetzt)."""
+        queue = self._queue
+        if len(queue) >= self.buffer_size:
+            self.dropped += 1
+            return
+        queue.append(('i', track, name, time.monotonic_ns() if t_ns is None else t_ns, 0, args))
+
+    def complete(self, track: int, name: str, start_ns: int, end_ns: int, args: Optional[dict] = None):
+        """Zeitspanne von start_ns bis end_ns (monotonic_ns)."""
+        queue = self._queue
+        if len(queue) >= self.buffer_size:
+            self.dropped += 1
+            return
+        queue.append(('X', track, name, start_ns, end_ns - start_ns, args))
+
+    def counter(self, name: str, values: dict, t_ns: Optional[int] = None):
+        """Zähler-Ereignis, wird als eigene Kurve dargestellt."""
+        queue = self._queue
+        if len(queue) >= self.buffer_size:
+            self.dropped += 1
+            return
+        queue.append(('C', 0, name, time.monotonic_ns() if t_ns is None else t_ns, 0, values))
+
+    def log(self, message: str):
+        """Log-Meldung als Zeitpunkt auf der Log-Spur."""
+        self.instant(TRACK_LOG, message)
+
+    def log_lines(self, messages, times=None):
+        """
+        Callback für PPUC.set_log_message_callback(..., batch=True,
+        timestamps=True); ohne times gilt für alle Zeilen der Zeitpunkt jetzt.
+        """
+        if times is None:
+            times = [time.monotonic_ns()] * len(messages)
+        for message, t_ns in zip(messages, times):
+            self.instant(TRACK_LOG, message, t_ns=t_ns)
+
+    def flush(self):
+        """Schreibt alle wartenden Ereignisse."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        queue = self._queue
+        start_ns = self.start_ns
+        try:
+            while True:
+                ph, track, name, t_ns, dur_ns, args = queue.popleft()
+                event = {'ph': ph, 'pid': _PID, 'tid': track, 'name': name, 'ts': (t_ns - start_ns) / 1000}
+                if ph == 'X':
+                    event['dur'] = dur_ns / 1000
+                elif ph == 'i':
+                    event['s'] = 't'
+                if args:
+                    event['args'] = args
+                self._write_event(event)
+                self.written += 1
+        except IndexError:
+            pass
+        self._file.flush()
+
+    def close(self):
+        """Schreibt den Rest, schließt das JSON-Array und die Datei."""
+        if self._closed:
+            return
+        self._stop.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        self.flush()
+        self._file.write("\n]\n")
+        self._file.close()
+        self._closed = True
+
+    def _write_event(self, event: dict):
+        if not self._first:
+            self._file.write(",\n")
+        self._first = False
+        self._file.write(json.dumps(event, ensure_ascii=False, separators=(',', ':')))
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"Fehler beim Schreiben des Traces nach {self.path}: {e}")
+
+
+class TraceBackend:
+    """
+    Backend für PPUC, das ein anderes Backend durchreicht und dabei
+    gelesene Schalter-Ereignisse, gesendete Lampen-/Spulenbefehle sowie
+    Tests und Verbindungsaufbau in den Trace schreibt.
+    """
+
+    def __init__(self, writer: TraceWriter, backend):
+        self.writer = writer
+        self.backend = backend
+        self._set_lamp = backend.ppuc_set_lamp_state
+        self._set_solenoid = backend.ppuc_set_solenoid_state
+        self._get_next = backend.ppuc_get_next_switch_state
+        for name, label in (('ppuc_coil_test', "Spulentest"), ('ppuc_lamp_test', "Lampentest"),
+                            ('ppuc_switch_test', "Schaltertest"), ('ppuc_connect', "Verbinden"),
+                            ('ppuc_disconnect', "Trennen")):
+            setattr(self, name, self._span(getattr(backend, name), label))
+
+    def __getattr__(self, name):
+        # Alle übrigen Funktionen unverändert durchreichen (einmal gebunden)
+        value = getattr(self.backend, name)
+        setattr(self, name, value)
+        return value
+
+    def _span(self, function, label: str):
+        writer = self.writer
+
+        def span(*args):
+            start_ns = time.monotonic_ns()
+            try:
+                return function(*args)
+            finally:
+                writer.complete(TRACK_TEST, label, start_ns, time.monotonic_ns())
+        return span
+
+    def ppuc_set_lamp_state(self, obj, number, state):
+        self._set_lamp(obj, number, state)
+        self.writer.instant(TRACK_LAMP, f"Lampe {number} {'an' if state else 'aus'}",
+                            {'number': number, 'state': state})
+
+    def ppuc_set_solenoid_state(self, obj, number, state):
+        self._set_solenoid(obj, number, state)
+        self.writer.instant(TRACK_SOLENOID, f"Spule {number} {'an' if state else 'aus'}",
+                            {'number': number, 'state': state})
+
+    def ppuc_get_next_switch_state(self, obj):
+        switch_state_ptr = self._get_next(obj)
+        if switch_state_ptr:
+            switch_state = switch_state_ptr.contents
+            self._switch(switch_state.number, switch_state.state)
+        return switch_state_ptr
+
+    def _switch(self, number: int, state: int):
+        self.writer.instant(TRACK_SWITCH, f"Schalter {number} {'an' if state else 'aus'}",
+                            {'number': number, 'state': state})
+
+
+def convert_journal(journal_path: str, trace_path: str) -> int:
+    """
+    Wandelt ein Journal (ppuc_journal) in einen Trace um.
+
+    Returns:
+        Anzahl der Ereignisse
+    """
+    from ppuc_journal import JOURNAL_LAMP, JOURNAL_SOLENOID, JournalReader
+    tracks = {JOURNAL_LAMP: (TRACK_LAMP, "Lampe"), JOURNAL_SOLENOID: (TRACK_SOLENOID, "Spule")}
+    count = 0
+    with JournalReader(journal_path) as reader:
+        records = reader.records()
+        with TraceWriter(trace_path, start_ns=0) as writer:
+            for t_ns, kind, number, state in records:
+                track, label = tracks.get(kind, (TRACK_SWITCH, "Schalter"))
+                writer.instant(track, f"{label} {number} {'an' if state else 'aus'}",
+                               {'number': number, 'state': state}, t_ns=t_ns)
+                count += 1
+                if count % (writer.buffer_size // 2) == 0:
+                    writer.flush()
+    return count
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Verwendung: python3 ppuc_trace.py journal.ppj trace.json")
+        sys.exit(1)
+    count = convert_journal(sys.argv[1], sys.argv[2])
+    print(f"✓ {count} Ereignisse nach {sys.argv[2]} geschrieben")
+
+
+if __name__ == "__main__":
+    main()
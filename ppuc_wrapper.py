@@ -3,10 +3,14 @@ PPUC Python Binding mit C-Wrapper
 Verwendet alle Funktionen der PPUC-Bibliothek über einen C-Wrapper.
 """
 
+import array
 import ctypes
 import os
-import platform
-from typing import Optional, Tuple, List
+import sys
+import threading
+import time
+from collections import deque
+from typing import Callable, Iterable, Optional, Tuple
 
 # Strukturen
 class PPUCSwitchState(ctypes.Structure):
@@ -41,6 +45,12 @@ class PPUCLamp(ctypes.Structure):
         ("description", ctypes.c_char_p)
     ]
 
+_SWITCH_STATE_SIZE = ctypes.sizeof(PPUCSwitchState)
+# int32-Sicht auf (Nummer, Zustand) einer PPUCSwitchState an fester Adresse
+_SwitchStateInts = ctypes.c_int * (_SWITCH_STATE_SIZE // ctypes.sizeof(ctypes.c_int))
+# Höchstzahl zwischengespeicherter Sichten (eine pro Adresse der Bibliothek)
+_SWITCH_VIEW_CACHE_SIZE = 64
+
 # Callback-Typ
 PPUC_LogMessageCallback = ctypes.CFUNCTYPE(
     None,
@@ -49,6 +59,106 @@ PPUC_LogMessageCallback = ctypes.CFUNCTYPE(
     ctypes.c_void_p
 )
 
+class PPUCLibraryError(RuntimeError):
+    """Die PPUC-Wrapper-Bibliothek konnte nicht geladen werden."""
+
+class PPUCConfigurationError(ValueError):
+    """Die PPUC-Konfiguration ist ungültig."""
+
+# Funktionssignaturen des C-Wrappers: (Name, restype, argtypes)
+_FUNCTION_SIGNATURES = (
+    # Konstruktor/Destruktor
+    ('ppuc_new', ctypes.c_void_p, []),
+    ('ppuc_delete', None, [ctypes.c_void_p]),
+    
+    # Logging
+    ('ppuc_set_log_message_callback', None, [ctypes.c_void_p, PPUC_LogMessageCallback, ctypes.c_void_p]),
+    
+    # Konfiguration
+    ('ppuc_load_configuration', None, [ctypes.c_void_p, ctypes.c_char_p]),
+    ('ppuc_set_debug', None, [ctypes.c_void_p, ctypes.c_bool]),
+    ('ppuc_get_debug', ctypes.c_bool, [ctypes.c_void_p]),
+    ('ppuc_set_rom', None, [ctypes.c_void_p, ctypes.c_char_p]),
+    ('ppuc_get_rom', ctypes.c_char_p, [ctypes.c_void_p]),
+    ('ppuc_set_serial', None, [ctypes.c_void_p, ctypes.c_char_p]),
+    ('ppuc_get_serial', ctypes.c_char_p, [ctypes.c_void_p]),
+    
+    # Verbindung
+    ('ppuc_connect', ctypes.c_bool, [ctypes.c_void_p]),
+    ('ppuc_disconnect', None, [ctypes.c_void_p]),
+    ('ppuc_start_updates', None, [ctypes.c_void_p]),
+    ('ppuc_stop_updates', None, [ctypes.c_void_p]),
+    
+    # Steuerung
+    ('ppuc_set_solenoid_state', None, [ctypes.c_void_p, ctypes.c_int, ctypes.c_int]),
+    ('ppuc_set_lamp_state', None, [ctypes.c_void_p, ctypes.c_int, ctypes.c_int]),
+    ('ppuc_get_next_switch_state', ctypes.POINTER(PPUCSwitchState), [ctypes.c_void_p]),
+    
+    # Spezielle Getter
+    ('ppuc_get_coin_door_closed_switch', ctypes.c_uint8, [ctypes.c_void_p]),
+    ('ppuc_get_game_on_solenoid', ctypes.c_uint8, [ctypes.c_void_p]),
+    
+    # Tests
+    ('ppuc_coil_test', None, [ctypes.c_void_p]),
+    ('ppuc_lamp_test', None, [ctypes.c_void_p]),
+    ('ppuc_switch_test', None, [ctypes.c_void_p]),
+    
+    # Listen-Funktionen
+    ('ppuc_get_coils', ctypes.POINTER(PPUCCoil), [ctypes.c_void_p, ctypes.POINTER(ctypes.c_int)]),
+    ('ppuc_free_coils', None, [ctypes.POINTER(PPUCCoil)]),
+    ('ppuc_get_lamps', ctypes.POINTER(PPUCLamp), [ctypes.c_void_p, ctypes.POINTER(ctypes.c_int)]),
+    ('ppuc_free_lamps', None, [ctypes.POINTER(PPUCLamp)]),
+    ('ppuc_get_switches', ctypes.POINTER(PPUCSwitch), [ctypes.c_void_p, ctypes.POINTER(ctypes.c_int)]),
+    ('ppuc_free_switches', None, [ctypes.POINTER(PPUCSwitch)]),
+)
+
+# Zusätzliche Bindungen unter eigenem Namen: (Alias, C-Funktion, restype, argtypes)
+_FUNCTION_ALIASES = (
+    # Rohe Adresse statt Pointer-Objekt (für drain_switch_states)
+    ('ppuc_get_next_switch_state_raw', 'ppuc_get_next_switch_state', ctypes.c_void_p, [ctypes.c_void_p]),
+)
+
+_library = None
+_library_lock = threading.Lock()
+
+def load_library() -> ctypes.CDLL:
+    """
+    Lädt die C-Wrapper-Bibliothek und setzt alle Funktionssignaturen.
+    
+    Das passiert einmal pro Prozess beim ersten Aufruf (normalerweise beim
+    ersten PPUC()); alle PPUC-Instanzen teilen sich die Bibliothek. Ein
+    reines `import ppuc_wrapper` lädt nichts.
+    """
+    global _library
+    lib = _library
+    if lib is not None:
+        return lib
+    
+    with _library_lock:
+        if _library is None:
+            lib_path = os.path.join(os.path.dirname(__file__), "libppuc_wrapper.so")
+            try:
+                lib = ctypes.CDLL(lib_path)
+            except OSError as e:
+                raise PPUCLibraryError(f"Konnte die PPUC-Wrapper-Bibliothek nicht laden: {e}") from e
+            _setup_function_signatures(lib)
+            _library = lib
+    return _library
+
+def _setup_function_signatures(lib: ctypes.CDLL):
+    """Setzt alle Funktionssignaturen für den C-Wrapper."""
+    for name, restype, argtypes in _FUNCTION_SIGNATURES:
+        function = getattr(lib, name)
+        function.restype = restype
+        function.argtypes = argtypes
+    
+    for alias, name, restype, argtypes in _FUNCTION_ALIASES:
+        # lib[name] liefert ein neues Funktionsobjekt, unabhängig von getattr(lib, name)
+        function = lib[name]
+        function.restype = restype
+        function.argtypes = argtypes
+        setattr(lib, alias, function)
+
 # Konstanten
 LED_TYPE_LAMP = 1
 LED_TYPE_FLASHER = 2
@@ -64,147 +174,832 @@ PLATFORM_DATA_EAST = 1
 PLATFORM_SYS4 = 2
 PLATFORM_SYS11 = 3
 
-class PPUC:
+# Log-Stufen (gleiche Werte wie im logging-Modul)
+LOG_DEBUG = 10
+LOG_INFO = 20
+LOG_WARNING = 30
+LOG_ERROR = 40
+
+# Log-Kategorien
+LOG_CATEGORY_SWITCH = 'switch'
+LOG_CATEGORY_EVENT = 'event'
+LOG_CATEGORY_CONFIG = 'config'
+LOG_CATEGORY_BOARD = 'board'
+LOG_CATEGORY_LINK = 'link'
+LOG_CATEGORY_GENERAL = 'general'
+
+# Geräte-Inventar
+class _DeviceInfo:
+    """Basis für unveränderliche Inventar-Einträge mit dict-kompatiblem Zugriff."""
+    __slots__ = ()
+    
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            object.__setattr__(self, name, value)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} ist unveränderlich")
+    
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+    
+    def __eq__(self, other):
+        return type(self) is type(other) and self.as_tuple() == other.as_tuple()
+    
+    def __hash__(self):
+        return hash(self.as_tuple())
+    
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+    
+    def as_tuple(self) -> tuple:
+        """Gibt die Felder als Tupel zurück."""
+        return tuple(getattr(self, name) for name in self.__slots__)
+    
+    def as_dict(self) -> dict:
+        """Gibt die Felder als dict zurück."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+class SwitchInfo(_DeviceInfo):
+    """Konfigurierter Schalter."""
+    __slots__ = ('board', 'port', 'number', 'description')
+
+class CoilInfo(_DeviceInfo):
+    """Konfigurierte Spule bzw. PWM-Ausgang."""
+    __slots__ = ('board', 'port', 'type', 'number', 'description')
+
+class LampInfo(_DeviceInfo):
+    """Konfigurierte Lampe bzw. LED."""
+    __slots__ = ('board', 'port', 'type', 'number', 'description')
+
+class DeviceIndex:
     """
-    PPUC Python-Wrapper mit vollständiger Funktionalität über C-Wrapper.
+    Index über Inventar-Einträge für Abfragen in konstanter Zeit.
+    
+    Eine Nummer, ein Board/Port-Paar oder eine Beschreibung kann in der
+    Konfiguration mehrfach vorkommen (z.B. mehrere LEDs für eine Lampe),
+    daher liefern alle Abfragen ein Tupel aller passenden Einträge.
+    """
+    
+    def __init__(self, devices):
+        """
+        Args:
+            devices: Inventar-Einträge, z.B. aus PPUC.get_switches()
+        """
+        self.devices = tuple(devices)
+        by_number = []
+        by_port = {}
+        by_description = {}
+        by_prefix = {}
+        # Erst in Listen sammeln und am Ende einmal in Tupel wandeln, sonst
+        # kopiert jedes Anhängen das bisherige Tupel (quadratisch bei vielen
+        # Einträgen mit gleichem Präfix)
+        for device in self.devices:
+            number = device.number
+            if number >= len(by_number):
+                by_number.extend([] for _ in range(number + 1 - len(by_number)))
+            by_number[number].append(device)
+            
+            by_port.setdefault((device.board, device.port), []).append(device)
+            
+            description = device.description
+            by_description.setdefault(description, []).append(device)
+            for length in range(1, len(description) + 1):
+                by_prefix.setdefault(description[:length], []).append(device)
+        
+        self._by_number = [tuple(devices) for devices in by_number]
+        self._by_port = {key: tuple(devices) for key, devices in by_port.items()}
+        self._by_description = {key: tuple(devices) for key, devices in by_description.items()}
+        self._by_prefix = {key: tuple(devices) for key, devices in by_prefix.items()}
+    
+    def __len__(self) -> int:
+        return len(self.devices)
+    
+    def __iter__(self):
+        return iter(self.devices)
+    
+    def by_number(self, number: int) -> tuple:
+        """Alle Einträge mit dieser Nummer."""
+        if 0 <= number < len(self._by_number):
+            return self._by_number[number]
+        return ()
+    
+    def by_port(self, board: int, port: int) -> tuple:
+        """Alle Einträge an diesem Board und Port."""
+        return self._by_port.get((board, port), ())
+    
+    def by_description(self, description: str) -> tuple:
+        """Alle Einträge mit genau dieser Beschreibung."""
+        return self._by_description.get(description, ())
+    
+    def by_prefix(self, prefix: str) -> tuple:
+        """Alle Einträge, deren Beschreibung mit prefix beginnt (leeres Präfix: alle)."""
+        if not prefix:
+            return self.devices
+        return self._by_prefix.get(prefix, ())
+    
+    def numbers(self) -> Tuple[int, ...]:
+        """Alle vorkommenden Nummern, aufsteigend."""
+        return tuple(number for number, devices in enumerate(self._by_number) if devices)
+
+class OutputHandle:
+    """
+    Lampe oder Spule mit vorab gebundenen Aufrufen.
+    
+    on(), off() und set() sind Funktionen mit Funktion des Backends,
+    Instanz-Handle, Nummer, Schatten-Speicher, Befehlszähler und
+    Unterdrückungs-Schalter als Default-Argumenten. Pro Aufruf bleiben nur
+    der Vergleich mit dem Schatten, das Zählen und der ctypes-Aufruf übrig.
+    force=True sendet auch einen unveränderten Zustand. Die Funktion liegt
+    wie Zähler und Schalter in einer mit PPUC geteilten Liste, sodass
+    Handles nach enable_tracing() u.a. das aktuelle Backend verwenden.
+    """
+    __slots__ = ('number', 'description', 'on', 'off', 'set')
+    
+    def __init__(self, ppuc: 'PPUC', number: int, description: str, shadow: 'array.array', native: list,
+                 writes: list, suppress: list):
+        _grow_shadow(shadow, number)
+        obj = ppuc.obj
+        
+        def on(force=False, _shadow=shadow, _number=number, _native=native, _obj=obj, _ppuc=ppuc,
+               _writes=writes, _suppress=suppress):
+            if _suppress[0] and not force and _shadow[_number] == 1:
+                _ppuc.suppressed_writes += 1
+                return
+            _native[0](_obj, _number, 1)
+            _shadow[_number] = 1
+            _writes[0] += 1
+        
+        def off(force=False, _shadow=shadow, _number=number, _native=native, _obj=obj, _ppuc=ppuc,
+                _writes=writes, _suppress=suppress):
+            if _suppress[0] and not force and _shadow[_number] == 0:
+                _ppuc.suppressed_writes += 1
+                return
+            _native[0](_obj, _number, 0)
+            _shadow[_number] = 0
+            _writes[0] += 1
+        
+        def set(state, force=False, _shadow=shadow, _number=number, _native=native, _obj=obj,
+                _ppuc=ppuc, _writes=writes, _suppress=suppress):
+            if _suppress[0] and not force and _shadow[_number] == state:
+                _ppuc.suppressed_writes += 1
+                return
+            _native[0](_obj, _number, state)
+            _shadow[_number] = state
+            _writes[0] += 1
+        
+        self.number = number
+        self.description = description
+        self.on = on
+        self.off = off
+        self.set = set
+    
+    def __repr__(self):
+        return f"OutputHandle(number={self.number}, description={self.description!r})"
+
+def _read_devices(get_devices, free_devices, obj, record_cls) -> tuple:
+    """Kopiert eine Geräteliste der Bibliothek in Inventar-Einträge."""
+    count = ctypes.c_int()
+    devices_ptr = get_devices(obj, ctypes.byref(count))
+    if not devices_ptr:
+        return ()
+    
+    fields = record_cls.__slots__[:-1]
+    descriptions = {}
+    records = []
+    try:
+        for i in range(count.value):
+            device = devices_ptr[i]
+            raw = device.description
+            description = descriptions.get(raw)
+            if description is None:
+                # Jede Beschreibung nur einmal dekodieren und internieren
+                description = sys.intern(raw.decode('utf-8')) if raw else ""
+                descriptions[raw] = description
+            records.append(record_cls(*[getattr(device, name) for name in fields], description))
+    finally:
+        free_devices(devices_ptr)
+    return tuple(records)
+
+# Schatten-Speicher für Ausgangszustände: ein int64 pro Nummer. Gesendet wird
+# ein C-int, daher ist jeder gültige Zustand darstellbar (auch Helligkeiten
+# oder PWM-Werte) und der kleinste int64 bleibt als "unbekannt" frei.
+# Die Bibliothek überträgt Nummern als 16 Bit.
+_SHADOW_UNKNOWN = -(1 << 63)
+_SHADOW_UNKNOWN_BLOCK = array.array('q', [_SHADOW_UNKNOWN])
+_SHADOW_INITIAL_SIZE = 256
+_SHADOW_MAX_NUMBER = 0xFFFF
+
+def _new_shadow() -> 'array.array':
+    """Erstellt einen Schatten-Speicher, in dem alle Zustände unbekannt sind."""
+    return _SHADOW_UNKNOWN_BLOCK * _SHADOW_INITIAL_SIZE
+
+def _grow_shadow(shadow: 'array.array', number: int):
+    """Vergrößert einen Schatten-Speicher in-place, sodass number hineinpasst."""
+    if not 0 <= number <= _SHADOW_MAX_NUMBER:
+        raise ValueError(f"Ungültige Ausgangs-Nummer: {number}")
+    if number >= len(shadow):
+        shadow.extend(_SHADOW_UNKNOWN_BLOCK * (number + 1 - len(shadow)))
+
+def _read_shadow(shadow: 'array.array', number: int) -> Optional[int]:
+    """Liest einen Zustand aus einem Schatten-Speicher."""
+    if 0 <= number < len(shadow):
+        state = shadow[number]
+        if state != _SHADOW_UNKNOWN:
+            return state
+    return None
+
+def _iter_output_states(states):
+    """Liefert (Nummer, Zustand)-Paare aus dict, Paar-Folge oder Vektor."""
+    if isinstance(states, dict):
+        return states.items()
+    if hasattr(states, 'tolist'):
+        # array.array und NumPy-Arrays einmalig in Python-Listen wandeln
+        states = states.tolist()
+    elif not hasattr(states, '__getitem__'):
+        states = list(states)
+    if len(states) and isinstance(states[0], (tuple, list)):
+        return states
+    return enumerate(states)
+
+# Methoden, die enable_profiling() nicht misst (Steuerung und Auswertung)
+_PROFILE_EXCLUDE = frozenset((
+    'enable_profiling', 'disable_profiling', 'get_profile', 'reset_profile',
+    'enable_metrics', 'disable_metrics', 'enable_tracing', 'disable_tracing',
+))
+
+# Log-Zeilen: Größe des Formatierungspuffers und der Warteschlange
+_LOG_LINE_SIZE = 1024
+_LOG_QUEUE_SIZE = 10000
+# Sammelzeit des Auslieferungs-Threads nach dem Aufwachen (Sekunden)
+_LOG_BATCH_INTERVAL = 0.005
+
+# Bekannte Formatstrings der Bibliothek: (Anfang, Kategorie, Stufe, Link-Zähler)
+_LOG_CLASSES = (
+    (b'Switch updated:', LOG_CATEGORY_SWITCH, LOG_DEBUG, 'switch_updated'),
+    (b'Sent Event', LOG_CATEGORY_EVENT, LOG_DEBUG, 'event_sent'),
+    (b'Received Event', LOG_CATEGORY_EVENT, LOG_DEBUG, 'event_received'),
+    (b'Polling board', LOG_CATEGORY_EVENT, LOG_DEBUG, 'board_poll'),
+    (b'Sent ConfigEvent', LOG_CATEGORY_CONFIG, LOG_DEBUG, 'config_sent'),
+    (b'Error when sending ConfigEvent', LOG_CATEGORY_CONFIG, LOG_ERROR, 'config_error'),
+    (b'Probe i/o board', LOG_CATEGORY_BOARD, LOG_DEBUG, 'board_probe'),
+    (b'Found i/o board', LOG_CATEGORY_BOARD, LOG_INFO, 'board_found'),
+    (b'RS485Comm run thread starting', LOG_CATEGORY_BOARD, LOG_INFO, 'thread_started'),
+    (b'RS485Comm run thread finished', LOG_CATEGORY_BOARD, LOG_INFO, 'thread_finished'),
+    (b'Timeout', LOG_CATEGORY_LINK, LOG_WARNING, 'timeout'),
+    (b'Received illegal source', LOG_CATEGORY_LINK, LOG_WARNING, 'illegal_source'),
+    (b'Received illegal event', LOG_CATEGORY_LINK, LOG_WARNING, 'illegal_event'),
+    (b'Received wrong', LOG_CATEGORY_LINK, LOG_WARNING, 'stop_byte_error'),
+    (b'RS485 Error', LOG_CATEGORY_LINK, LOG_ERROR, 'rs485_error'),
+    (b'Error: Lost sync', LOG_CATEGORY_LINK, LOG_ERROR, 'lost_sync'),
+)
+# Link-Zähler: aus Log-Zeilen, aus connect()/disconnect() und für
+# unbekannte Formatstrings
+_LINK_COUNTERS = tuple(entry[3] for entry in _LOG_CLASSES) + (
+    'connect', 'connect_failed', 'disconnect', 'other')
+# Obergrenze für zwischengespeicherte Formatstrings (die Bibliothek
+# verwendet feste Formate; vorformatierte Zeilen werden nicht gespeichert)
+_LOG_RULE_CACHE_SIZE = 1024
+
+def _log_class(message: bytes):
+    """Eintrag aus _LOG_CLASSES für einen Formatstring oder None."""
+    for entry in _LOG_CLASSES:
+        if message.startswith(entry[0]):
+            return entry
+    return None
+
+def classify_log_message(message) -> Tuple[str, int]:
+    """Ordnet einen Formatstring (oder eine Zeile) Kategorie und Stufe zu."""
+    if isinstance(message, str):
+        message = message.encode('utf-8', 'replace')
+    entry = _log_class(message)
+    if entry is not None:
+        return entry[1], entry[2]
+    if b'rror' in message:
+        return LOG_CATEGORY_GENERAL, LOG_ERROR
+    return LOG_CATEGORY_GENERAL, LOG_INFO
+
+class _LinkCounters:
+    """
+    Zähler und Zeitpunkt des letzten Auftretens pro Link-Ereignis.
+    
+    Im C-Callback wird nur der Formatstring über einen Cache einem Index
+    zugeordnet und eine Ganzzahl erhöht; formatiert wird dafür nichts.
+    """
+    
+    def __init__(self):
+        self.index = {name: i for i, name in enumerate(_LINK_COUNTERS)}
+        self.counts = [0] * len(_LINK_COUNTERS)
+        self.last_ns = [0] * len(_LINK_COUNTERS)
+        self._slots = {}
+        self._other = self.index['other']
+    
+    def count(self, format_str: bytes):
+        """Verbucht eine Log-Zeile der Bibliothek."""
+        slot = self._slots.get(format_str)
+        if slot is None:
+            entry = _log_class(format_str or b"")
+            slot = self.index[entry[3]] if entry is not None else self._other
+            if len(self._slots) < _LOG_RULE_CACHE_SIZE:
+                self._slots[format_str] = slot
+        self.counts[slot] += 1
+        self.last_ns[slot] = time.monotonic_ns()
+    
+    def note(self, name: str):
+        """Verbucht ein Ereignis der Python-Seite (z.B. connect)."""
+        slot = self.index[name]
+        self.counts[slot] += 1
+        self.last_ns[slot] = time.monotonic_ns()
+    
+    def reset(self):
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+            self.last_ns[i] = 0
+
+class _LogBucket:
+    """Token-Bucket einer Kategorie, geteilt von allen ihren Formatstrings."""
+    __slots__ = ('rate', 'burst', 'tokens', 'last_ns')
+    
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last_ns = time.monotonic_ns()
+
+class _LogRule:
+    """Zustand eines Formatstrings: Filterentscheidung, Bucket der Kategorie und Zähler."""
+    __slots__ = ('allowed', 'bucket', 'counters')
+    
+    def __init__(self, allowed, bucket, counters):
+        self.allowed = allowed
+        self.bucket = bucket
+        self.counters = counters
+
+class _LogFilter:
+    """
+    Stufen-Schwellen und Ratenbegrenzung pro Kategorie.
+    
+    Die Entscheidung fällt im C-Callback anhand des Formatstrings, noch vor
+    dem Formatieren. Pro Formatstring wird sie einmal berechnet und als
+    Regel zwischengespeichert; die Regel verweist auf den einen Token-Bucket
+    ihrer Kategorie. Die Grenze gilt so für die Kategorie als Ganzes, auch
+    für Formatstrings, die nach vollem Regel-Cache nicht mehr gespeichert
+    werden.
     """
     
     def __init__(self):
-        """Initialisiert die PPUC-Bibliothek über den C-Wrapper."""
-        # Lade die Wrapper-Bibliothek
-        lib_path = os.path.join(os.path.dirname(__file__), "libppuc_wrapper.so")
+        self.levels = {}       # Kategorie -> Schwelle (None = alle Kategorien)
+        self.rate_limits = {}  # Kategorie -> (Meldungen pro Sekunde, Burst)
+        self.counters = {}     # Kategorie -> [gefiltert, ratenbegrenzt]
+        self._rules = {}
+        self._buckets = {}     # Kategorie -> _LogBucket
+    
+    def set_level(self, level: int, category: Optional[str]):
+        self.levels[category] = level
+        self._rules.clear()
+    
+    def set_rate_limit(self, rate: Optional[float], burst: Optional[float], category: Optional[str]):
+        if rate is None:
+            self.rate_limits.pop(category, None)
+        else:
+            self.rate_limits[category] = (rate, burst if burst is not None else max(rate, 1.0))
+        self._rules.clear()
+        self._buckets.clear()
+    
+    def accept(self, format_str: bytes) -> bool:
+        """True, wenn die Zeile weitergegeben werden soll."""
+        rule = self._rules.get(format_str)
+        if rule is None:
+            rule = self._make_rule(format_str)
+        if not rule.allowed:
+            rule.counters[0] += 1
+            return False
+        bucket = rule.bucket
+        if bucket is not None:
+            now = time.monotonic_ns()
+            tokens = bucket.tokens + (now - bucket.last_ns) * bucket.rate / 1e9
+            bucket.last_ns = now
+            if tokens > bucket.burst:
+                tokens = bucket.burst
+            if tokens < 1.0:
+                bucket.tokens = tokens
+                rule.counters[1] += 1
+                return False
+            bucket.tokens = tokens - 1.0
+        return True
+    
+    def _make_rule(self, format_str: bytes) -> _LogRule:
+        category, level = classify_log_message(format_str or b"")
+        threshold = self.levels.get(category, self.levels.get(None, LOG_DEBUG))
+        bucket = self._buckets.get(category)
+        if bucket is None:
+            rate, burst = self.rate_limits.get(category, self.rate_limits.get(None, (0, 0)))
+            if rate:
+                bucket = self._buckets[category] = _LogBucket(rate, burst)
+        counters = self.counters.get(category)
+        if counters is None:
+            counters = self.counters[category] = [0, 0]
+        rule = _LogRule(level >= threshold, bucket, counters)
+        if len(self._rules) < _LOG_RULE_CACHE_SIZE:
+            self._rules[format_str] = rule
+        return rule
+
+_vsnprintf = None
+
+def _load_vsnprintf():
+    """
+    Bindet vsnprintf der C-Bibliothek (einmal pro Prozess).
+    
+    Über PyDLL, damit der GIL im Log-Callback nicht für jeden Aufruf
+    abgegeben und wieder geholt wird. None, wenn nicht verfügbar.
+    """
+    global _vsnprintf
+    if _vsnprintf is None:
         try:
-            self.lib = ctypes.CDLL(lib_path)
-        except OSError as e:
-            raise RuntimeError(f"Konnte die PPUC-Wrapper-Bibliothek nicht laden: {e}") from e
+            vsnprintf = ctypes.PyDLL(None).vsnprintf
+        except (OSError, AttributeError):
+            _vsnprintf = False
+        else:
+            vsnprintf.restype = ctypes.c_int
+            vsnprintf.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_char_p, ctypes.c_void_p]
+            _vsnprintf = vsnprintf
+    return _vsnprintf or None
+
+class _LogDelivery:
+    """
+    Nimmt Log-Zeilen im Callback der Bibliothek entgegen und liefert sie
+    gebündelt in einem eigenen Thread an Python aus.
+    
+    Im Callback (Thread der Bibliothek) wird nur mit vsnprintf formatiert
+    und die Zeile als Bytes mit ihrem Empfangszeitpunkt (monotonic_ns) an
+    eine begrenzte deque gehängt. Ist sie voll,
+    wird die Zeile verworfen und gezählt; die Bibliothek wartet nie auf
+    Python.
+    """
+    
+    def __init__(self, callback, batch: bool, capacity: int, log_filter: '_LogFilter',
+                 timestamps: bool = False):
+        self.callback = callback
+        self.log_filter = log_filter
+        self.batch = batch
+        self.timestamps = timestamps
+        self.capacity = capacity
+        self.received = 0
+        self.delivered = 0
+        self.dropped = 0
+        self._queue = deque()
+        self._wakeup = threading.Event()
+        self._running = True
+        self._local = threading.local()
+        self._vsnprintf = _load_vsnprintf()
+        self._thread = threading.Thread(target=self._run, name="ppuc-log", daemon=True)
+        self._thread.start()
+    
+    def on_message(self, format_str, va_list, user_data):
+        """C-Callback: formatieren und einreihen, sonst nichts."""
+        self.received += 1
+        if not self.log_filter.accept(format_str):
+            return
+        queue = self._queue
+        if len(queue) >= self.capacity:
+            self.dropped += 1
+            return
+        vsnprintf = self._vsnprintf
+        if vsnprintf is None or not va_list:
+            line = format_str or b""
+        else:
+            # Puffer pro Thread, die Bibliothek kann aus mehreren Threads loggen
+            buf = getattr(self._local, 'buf', None)
+            if buf is None:
+                buf = self._local.buf = ctypes.create_string_buffer(_LOG_LINE_SIZE)
+            length = vsnprintf(buf, _LOG_LINE_SIZE, format_str, va_list)
+            line = buf.raw[:min(length, _LOG_LINE_SIZE - 1)] if length > 0 else b""
+        queue.append((time.monotonic_ns(), line))
+        wakeup = self._wakeup
+        if not wakeup.is_set():
+            wakeup.set()
+    
+    def stop(self):
+        """Liefert den Rest aus und beendet den Thread."""
+        self._running = False
+        self._wakeup.set()
+        thread = self._thread
+        if thread is not threading.current_thread():
+            thread.join()
+    
+    def stats(self) -> dict:
+        return {
+            'received': self.received,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'queued': len(self._queue),
+        }
+    
+    def _run(self):
+        queue = self._queue
+        wakeup = self._wakeup
+        while True:
+            wakeup.wait()
+            if self._running:
+                # Kurz sammeln, damit nicht jede Zeile einen Thread-Wechsel kostet
+                time.sleep(_LOG_BATCH_INTERVAL)
+            wakeup.clear()
+            # Alles einsammeln, was bis jetzt anliegt
+            entries = []
+            try:
+                while True:
+                    entries.append(queue.popleft())
+            except IndexError:
+                pass
+            if entries:
+                messages = [line.decode('utf-8', 'replace').rstrip('\n') for _, line in entries]
+                self.delivered += len(messages)
+                try:
+                    callback = self.callback
+                    if self.timestamps:
+                        times = [t_ns for t_ns, _ in entries]
+                        if self.batch:
+                            callback(messages, times)
+                        else:
+                            for message, t_ns in zip(messages, times):
+                                callback(message, t_ns)
+                    elif self.batch:
+                        callback(messages)
+                    else:
+                        for message in messages:
+                            callback(message)
+                except Exception as e:
+                    print(f"Fehler im Log-Callback: {e}")
+            if not self._running and not queue:
+                return
+
+class PPUC:
+    """
+    PPUC Python-Wrapper mit vollständiger Funktionalität über C-Wrapper.
+    """
+    
+    # Schlafintervalle der Switch-Pumpe (Sekunden): kurz nach Ereignissen,
+    # bis zum Maximum verdoppelt solange die Bibliothek nichts liefert.
+    # Das Maximum bestimmt die Weckrate im Leerlauf (1 ms = ca. 1000/s),
+    # pro Instanz über start_switch_pump(max_sleep=...) änderbar.
+    SWITCH_PUMP_MIN_SLEEP = 0.0001
+    SWITCH_PUMP_MAX_SLEEP = 0.001
+    
+    def __init__(self, backend=None):
+        """
+        Initialisiert die PPUC-Bibliothek über den C-Wrapper.
         
-        # Definiere alle Funktionssignaturen
-        self._setup_function_signatures()
+        Args:
+            backend: Objekt mit den Funktionen des C-Wrappers (z.B.
+                ppuc_fake.FakeLibrary), Standard ist libppuc_wrapper.so
+        """
+        # Wrapper-Bibliothek (einmal pro Prozess geladen und konfiguriert)
+        self._base_lib = backend if backend is not None else load_library()
+        self.lib = self._base_lib
         
         # Erstelle PPUC-Instanz
         self.obj = self.lib.ppuc_new()
         if not self.obj:
             raise RuntimeError("Konnte keine PPUC-Instanz erstellen")
         
-        # Callback-Speicher
+        # Callback-Speicher und Auslieferung der Log-Zeilen
         self._log_callback = None
-    
-    def _setup_function_signatures(self):
-        """Setzt alle Funktionssignaturen für den C-Wrapper."""
-        
-        # Konstruktor/Destruktor
-        self.lib.ppuc_new.restype = ctypes.c_void_p
-        self.lib.ppuc_new.argtypes = []
+        self._log_delivery = None
+        self._log_filter = _LogFilter()
+        self._link_counters = _LinkCounters()
         
-        self.lib.ppuc_delete.restype = None
-        self.lib.ppuc_delete.argtypes = [ctypes.c_void_p]
+        # Switch-Pumpe für wait_next_switch_state()
+        # Queue-Einträge: (Nummer, Zustand, Empfangszeit in monotonic_ns)
+        self._switch_queue = deque()
+        self._switch_cond = threading.Condition()
+        self._switch_pump = None
+        self._switch_pump_running = False
+        self._switch_pump_max_sleep = self.SWITCH_PUMP_MAX_SLEEP
+        self._wakeup_fd = None
+        self._wakeup_signal = None
+        self.reset_switch_queue_stats()
         
-        # Logging
-        self.lib.ppuc_set_log_message_callback.restype = None
-        self.lib.ppuc_set_log_message_callback.argtypes = [ctypes.c_void_p, PPUC_LogMessageCallback, ctypes.c_void_p]
+        # Zuletzt gesendete Zustände der Lampen und Spulen
+        self._lamp_shadow = _new_shadow()
+        self._solenoid_shadow = _new_shadow()
+        self.suppressed_writes = 0
+        # Unveränderte Zustände nicht senden (als Liste für die Handles).
+        # Spulen standardmäßig nicht: ein Puls schaltet sie in der Bibliothek
+        # wieder aus, ohne dass der Schatten davon erfährt.
+        self._lamp_suppress = [True]
+        self._solenoid_suppress = [False]
+        # Tatsächlich gesendete Befehle und gelesene Schalter-Ereignisse
+        # (Befehle als Liste, damit die Handles direkt zählen können)
+        self._lamp_writes = [0]
+        self._solenoid_writes = [0]
+        # Funktionen des aktuellen Backends für Handles und Switch-Pumpe,
+        # von _rebuild_lib() nachgeführt
+        self._lamp_native = [self.lib.ppuc_set_lamp_state]
+        self._solenoid_native = [self.lib.ppuc_set_solenoid_state]
+        self._switch_native = [self.lib.ppuc_get_next_switch_state]
+        self.switch_events_read = 0
+        # Adresse -> int32-Sicht für drain_switch_states()
+        self._switch_state_views = {}
         
-        # Konfiguration
-        self.lib.ppuc_load_configuration.restype = None
-        self.lib.ppuc_load_configuration.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
+        # Geräte-Inventar, gültig bis load_configuration()/set_rom()
+        self._inventory = {}
+        self._config_file = None
         
-        self.lib.ppuc_set_debug.restype = None
-        self.lib.ppuc_set_debug.argtypes = [ctypes.c_void_p, ctypes.c_bool]
-        
-        self.lib.ppuc_get_debug.restype = ctypes.c_bool
-        self.lib.ppuc_get_debug.argtypes = [ctypes.c_void_p]
-        
-        self.lib.ppuc_set_rom.restype = None
-        self.lib.ppuc_set_rom.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
-        
-        self.lib.ppuc_get_rom.restype = ctypes.c_char_p
-        self.lib.ppuc_get_rom.argtypes = [ctypes.c_void_p]
-        
-        self.lib.ppuc_set_serial.restype = None
-        self.lib.ppuc_set_serial.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
-        
-        self.lib.ppuc_get_serial.restype = ctypes.c_char_p
-        self.lib.ppuc_get_serial.argtypes = [ctypes.c_void_p]
-        
-        # Verbindung
-        self.lib.ppuc_connect.restype = ctypes.c_bool
-        self.lib.ppuc_connect.argtypes = [ctypes.c_void_p]
-        
-        self.lib.ppuc_disconnect.restype = None
-        self.lib.ppuc_disconnect.argtypes = [ctypes.c_void_p]
-        
-        self.lib.ppuc_start_updates.restype = None
-        self.lib.ppuc_start_updates.argtypes = [ctypes.c_void_p]
-        
-        self.lib.ppuc_stop_updates.restype = None
-        self.lib.ppuc_stop_updates.argtypes = [ctypes.c_void_p]
-        
-        # Steuerung
-        self.lib.ppuc_set_solenoid_state.restype = None
-        self.lib.ppuc_set_solenoid_state.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int]
-        
-        self.lib.ppuc_set_lamp_state.restype = None
-        self.lib.ppuc_set_lamp_state.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int]
-        
-        self.lib.ppuc_get_next_switch_state.restype = ctypes.POINTER(PPUCSwitchState)
-        self.lib.ppuc_get_next_switch_state.argtypes = [ctypes.c_void_p]
-        
-        # Spezielle Getter
-        self.lib.ppuc_get_coin_door_closed_switch.restype = ctypes.c_uint8
-        self.lib.ppuc_get_coin_door_closed_switch.argtypes = [ctypes.c_void_p]
+        # Laufzeit-Kennzahlen (ppuc_metrics), nur nach enable_metrics()
+        self.metrics = None
+        # Methode -> Histogramm der Laufzeiten, nur nach enable_profiling()
+        self.profile = None
+        # Trace im Chrome Trace Event Format (ppuc_trace), nur nach enable_tracing()
+        self.trace = None
+        # self.lib = Basis-Backend, davor ggf. TraceBackend und TimingBackend
+        # (Stichproben der Metriken); wird nur unter dem Lock neu aufgebaut
+        self._backend_lock = threading.RLock()
+        self._trace_backend = None
+        self._timing_metrics = None
+    
+    def __del__(self):
+        """Säubert die PPUC-Instanz."""
+        if hasattr(self, '_switch_pump'):
+            self.stop_switch_pump()
+            self.close_switch_wakeup_fd()
+        if getattr(self, '_log_delivery', None) is not None:
+            self._log_delivery.stop()
+        if getattr(self, 'metrics', None) is not None:
+            self.metrics.stop()
+        if getattr(self, 'trace', None) is not None:
+            self.trace.close()
+        if hasattr(self, 'obj') and self.obj:
+            self.lib.ppuc_delete(self.obj)
+    
+    def set_log_message_callback(self, callback, batch: bool = False,
+                                 queue_size: int = _LOG_QUEUE_SIZE, timestamps: bool = False):
+        """
+        Setzt einen Logging-Callback.
         
-        self.lib.ppuc_get_game_on_solenoid.restype = ctypes.c_uint8
-        self.lib.ppuc_get_game_on_solenoid.argtypes = [ctypes.c_void_p]
+        Die Zeilen werden im Thread der Bibliothek nur formatiert (vsnprintf
+        mit den Argumenten der Bibliothek) und eingereiht; der Callback läuft
+        in einem eigenen Thread. Kommt Python nicht hinterher, werden Zeilen
+        verworfen statt die Bibliothek aufzuhalten (siehe get_log_stats()).
         
-        # Tests
-        self.lib.ppuc_coil_test.restype = None
-        self.lib.ppuc_coil_test.argtypes = [ctypes.c_void_p]
+        Args:
+            callback: callback(message) pro Zeile oder callback(messages)
+                mit einer Liste, wenn batch=True; None meldet den Callback
+                ab (wartende Zeilen werden vorher noch ausgeliefert)
+            batch: Alle anstehenden Zeilen auf einmal übergeben
+            queue_size: Maximal wartende Zeilen
+            timestamps: Zusätzlich den Empfangszeitpunkt (monotonic_ns) jeder
+                Zeile übergeben: callback(message, t_ns) bzw.
+                callback(messages, times)
+        """
+        previous = self._log_delivery
+        if callback is None:
+            # Der C-Callback bleibt für die Link-Zähler registriert
+            self._log_delivery = None
+        else:
+            self._log_delivery = _LogDelivery(callback, batch, queue_size, self._log_filter, timestamps)
+            self._install_log_callback()
+        if previous is not None:
+            previous.stop()
+    
+    def _install_log_callback(self):
+        """
+        Registriert den C-Callback (nur einmal). Er zählt die Link-Ereignisse
+        und leitet an die aktuelle Auslieferung weiter, falls vorhanden.
+        """
+        if self._log_callback is not None:
+            return
         
-        self.lib.ppuc_lamp_test.restype = None
-        self.lib.ppuc_lamp_test.argtypes = [ctypes.c_void_p]
+        def c_log_callback(format_str, va_list, user_data, _ppuc=self,
+                           _count=self._link_counters.count):
+            _count(format_str)
+            delivery = _ppuc._log_delivery
+            if delivery is not None:
+                delivery.on_message(format_str, va_list, user_data)
         
-        self.lib.ppuc_switch_test.restype = None
-        self.lib.ppuc_switch_test.argtypes = [ctypes.c_void_p]
+        self._log_callback = PPUC_LogMessageCallback(c_log_callback)
+        self.lib.ppuc_set_log_message_callback(self.obj, self._log_callback, None)
+    
+    def enable_link_counters(self):
+        """
+        Zählt die Link-Ereignisse der Bibliothek auch ohne Log-Callback.
         
-        # Listen-Funktionen
-        self.lib.ppuc_get_coils.restype = ctypes.POINTER(PPUCCoil)
-        self.lib.ppuc_get_coils.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_int)]
+        Mit set_log_message_callback() geschieht das automatisch. Meldungen
+        wie 'Sent Event' oder 'Polling board' schreibt die Bibliothek nur
+        mit set_debug(True); Fehler wie Timeouts immer.
+        """
+        self._install_log_callback()
+    
+    def get_link_counters(self) -> dict:
+        """
+        Zähler der RS485-Verbindung aus den Log-Meldungen der Bibliothek.
         
-        self.lib.ppuc_free_coils.restype = None
-        self.lib.ppuc_free_coils.argtypes = [ctypes.POINTER(PPUCCoil)]
+        Returns:
+            {Name: Anzahl}, z.B. timeout, rs485_error, lost_sync,
+            illegal_source, illegal_event, stop_byte_error, board_found,
+            board_probe, config_error, event_sent, event_received, connect,
+            connect_failed, disconnect, other
+        """
+        return dict(zip(_LINK_COUNTERS, self._link_counters.counts))
+    
+    def get_link_last_seen(self) -> dict:
+        """Zeitpunkt (monotonic_ns) des letzten Auftretens pro Zähler, 0 = nie."""
+        return dict(zip(_LINK_COUNTERS, self._link_counters.last_ns))
+    
+    def reset_link_counters(self):
+        """Setzt Link-Zähler und Zeitpunkte zurück."""
+        self._link_counters.reset()
+    
+    def get_log_stats(self) -> dict:
+        """
+        Zähler der Log-Auslieferung: received, delivered, dropped, queued
+        sowie filtered und rate_limited (Summe über alle Kategorien).
+        """
+        if self._log_delivery is None:
+            stats = {'received': 0, 'delivered': 0, 'dropped': 0, 'queued': 0}
+        else:
+            stats = self._log_delivery.stats()
+        counters = self._log_filter.counters.values()
+        stats['filtered'] = sum(c[0] for c in counters)
+        stats['rate_limited'] = sum(c[1] for c in counters)
+        return stats
+    
+    def set_log_level(self, level: int, category: Optional[str] = None):
+        """
+        Setzt die Mindest-Stufe (LOG_DEBUG ... LOG_ERROR) für Log-Zeilen.
         
-        self.lib.ppuc_get_lamps.restype = ctypes.POINTER(PPUCLamp)
-        self.lib.ppuc_get_lamps.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_int)]
+        Zeilen darunter werden schon im C-Callback anhand des Formatstrings
+        verworfen, ohne Formatierung und ohne Auslieferung.
         
-        self.lib.ppuc_free_lamps.restype = None
-        self.lib.ppuc_free_lamps.argtypes = [ctypes.POINTER(PPUCLamp)]
+        Args:
+            level: Mindest-Stufe
+            category: LOG_CATEGORY_*, None für alle Kategorien ohne eigene Schwelle
+        """
+        self._log_filter.set_level(level, category)
+    
+    def set_log_rate_limit(self, rate: Optional[float], burst: Optional[float] = None,
+                           category: Optional[str] = None):
+        """
+        Begrenzt Log-Zeilen per Token-Bucket, einer pro Kategorie.
         
-        self.lib.ppuc_get_switches.restype = ctypes.POINTER(PPUCSwitch)
-        self.lib.ppuc_get_switches.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_int)]
+        Alle Formatstrings einer Kategorie teilen sich den Bucket. Ohne
+        category gilt die Grenze für jede Kategorie ohne eigene Grenze,
+        jeweils mit eigenem Bucket.
         
-        self.lib.ppuc_free_switches.restype = None
-        self.lib.ppuc_free_switches.argtypes = [ctypes.POINTER(PPUCSwitch)]
-    
-    def __del__(self):
-        """Säubert die PPUC-Instanz."""
-        if hasattr(self, 'obj') and self.obj:
-            self.lib.ppuc_delete(self.obj)
+        Args:
+            rate: Zeilen pro Sekunde, None hebt die Begrenzung auf
+            burst: Größe des Buckets (Standard: rate, mindestens 1)
+            category: LOG_CATEGORY_*, None für alle Kategorien ohne eigene Grenze
+        """
+        self._log_filter.set_rate_limit(rate, burst, category)
     
-    def set_log_message_callback(self, callback):
-        """Setzt einen Logging-Callback."""
-        def c_log_callback(format_str, va_list, user_data):
-            try:
-                message = ctypes.string_at(format_str).decode('utf-8')
-                callback(message)
-            except Exception as e:
-                print(f"Fehler im Log-Callback: {e}")
-        
-        self._log_callback = PPUC_LogMessageCallback(c_log_callback)
-        self.lib.ppuc_set_log_message_callback(self.obj, self._log_callback, None)
+    def get_log_suppressed(self) -> dict:
+        """Unterdrückte Log-Zeilen pro Kategorie: {'filtered': n, 'rate_limited': n}."""
+        return {category: {'filtered': counters[0], 'rate_limited': counters[1]}
+                for category, counters in self._log_filter.counters.items()}
     
     def load_configuration(self, config_file: str):
-        """Lädt eine Konfigurationsdatei."""
+        """
+        Lädt eine Konfigurationsdatei.
+        
+        Die Bibliothek parst die YAML-Datei dabei selbst; der Snapshot aus
+        get_compiled_configuration() beschleunigt nur die Python-Seite
+        (Inventar von get_coils() usw., LED-Zuordnung).
+        """
+        self._inventory.clear()
+        self._config_file = config_file
         self.lib.ppuc_load_configuration(self.obj, config_file.encode('utf-8'))
     
+    def get_compiled_configuration(self, cache_dir: Optional[str] = None):
+        """
+        Gibt die kompilierte Form der geladenen Konfiguration zurück.
+        
+        Für diese Tabellen (Inventar, LED-Zuordnung) wird die YAML-Datei nur
+        beim ersten Aufruf nach einer Änderung in Python geparst; danach
+        wird der Snapshot aus dem Cache eingeblendet (siehe ppuc_config).
+        Das Laden in der Bibliothek (load_configuration()) betrifft das
+        nicht.
+        """
+        compiled = self._inventory.get('compiled')
+        if compiled is None:
+            if self._config_file is None:
+                raise PPUCConfigurationError("Es wurde noch keine Konfiguration geladen")
+            from ppuc_config import load_compiled_configuration
+            compiled = self._inventory['compiled'] = load_compiled_configuration(self._config_file, cache_dir)
+        return compiled
+    
+    def get_lamp_frame(self, frame: Optional[bytearray] = None) -> bytearray:
+        """
+        Übersetzt die zuletzt gesetzten Lampenzustände in einen LED-Frame.
+        
+        Verwendet die Zuordnung Lampe -> LEDs aus den ledStripes der
+        Konfiguration (3 Bytes RGB pro LED, siehe ppuc_config.LedFanout).
+        """
+        return self.get_compiled_configuration().led_fanout(LED_TYPE_LAMP).render(self._lamp_shadow, frame)
+    
     def set_debug(self, debug: bool):
         """Setzt den Debug-Modus."""
         self.lib.ppuc_set_debug(self.obj, debug)
@@ -215,6 +1010,7 @@ class PPUC:
     
     def set_rom(self, rom: str):
         """Setzt den ROM-Namen."""
+        self._inventory.clear()
         self.lib.ppuc_set_rom(self.obj, rom.encode('utf-8'))
     
     def get_rom(self) -> str:
@@ -231,11 +1027,17 @@ class PPUC:
     
     def connect(self) -> bool:
         """Verbindet mit den PPUC-Boards."""
-        return self.lib.ppuc_connect(self.obj)
+        # Nach dem Verbinden ist der Zustand der Ausgänge unbekannt
+        self.invalidate_output_states()
+        connected = self.lib.ppuc_connect(self.obj)
+        self._link_counters.note('connect' if connected else 'connect_failed')
+        return connected
     
     def disconnect(self):
         """Trennt die Verbindung."""
+        self.stop_switch_pump()
         self.lib.ppuc_disconnect(self.obj)
+        self._link_counters.note('disconnect')
     
     def start_updates(self):
         """Startet Updates."""
@@ -243,25 +1045,639 @@ class PPUC:
     
     def stop_updates(self):
         """Stoppt Updates."""
+        self.stop_switch_pump()
         self.lib.ppuc_stop_updates(self.obj)
     
-    def set_solenoid_state(self, number: int, state: int):
-        """Setzt den Zustand einer Spule."""
+    def set_solenoid_state(self, number: int, state: int, force: bool = False):
+        """
+        Setzt den Zustand einer Spule.
+        
+        Der Zustand wird unverändert an die Bibliothek gegeben. Spulen werden
+        standardmäßig immer gesendet; nach set_write_suppression(solenoids=True)
+        entfallen unveränderte Zustände, außer mit force=True.
+        """
+        shadow = self._solenoid_shadow
+        if not 0 <= number < len(shadow):
+            _grow_shadow(shadow, number)
+        elif self._solenoid_suppress[0] and not force and shadow[number] == state:
+            self.suppressed_writes += 1
+            return
         self.lib.ppuc_set_solenoid_state(self.obj, number, state)
+        shadow[number] = state
+        self._solenoid_writes[0] += 1
     
-    def set_lamp_state(self, number: int, state: int):
-        """Setzt den Zustand einer Lampe."""
+    def set_lamp_state(self, number: int, state: int, force: bool = False):
+        """
+        Setzt den Zustand einer Lampe.
+        
+        Der Zustand wird unverändert an die Bibliothek gegeben; ein bereits
+        gesendeter Zustand wird nicht erneut gesendet, außer mit force=True.
+        """
+        shadow = self._lamp_shadow
+        if not 0 <= number < len(shadow):
+            _grow_shadow(shadow, number)
+        elif self._lamp_suppress[0] and not force and shadow[number] == state:
+            self.suppressed_writes += 1
+            return
         self.lib.ppuc_set_lamp_state(self.obj, number, state)
+        shadow[number] = state
+        self._lamp_writes[0] += 1
+    
+    def set_lamp_states(self, states, force: bool = False):
+        """
+        Setzt mehrere Lampen in einem Aufruf.
+        
+        Args:
+            states: dict {Nummer: Zustand}, Folge von (Nummer, Zustand)-Paaren
+                    oder ein Vektor (Liste, bytes, array.array, NumPy-Array),
+                    dessen Index die Lampen-Nummer ist
+            force: Auch unveränderte Zustände senden
+        """
+        set_lamp = self.lib.ppuc_set_lamp_state
+        obj = self.obj
+        shadow = self._lamp_shadow
+        suppress = self._lamp_suppress[0] and not force
+        suppressed = 0
+        sent = 0
+        try:
+            for number, state in _iter_output_states(states):
+                if not 0 <= number < len(shadow):
+                    _grow_shadow(shadow, number)
+                elif suppress and shadow[number] == state:
+                    suppressed += 1
+                    continue
+                set_lamp(obj, number, state)
+                shadow[number] = state
+                sent += 1
+        finally:
+            self.suppressed_writes += suppressed
+            self._lamp_writes[0] += sent
+    
+    def set_write_suppression(self, lamps: Optional[bool] = None, solenoids: Optional[bool] = None):
+        """
+        Legt fest, ob unveränderte Zustände nicht gesendet werden.
+        
+        Standard: Lampen ja, Spulen nein. Gilt auch für bestehende Handles.
+        
+        Args:
+            lamps: Für Lampen unterdrücken (None = unverändert)
+            solenoids: Für Spulen unterdrücken (None = unverändert)
+        """
+        if lamps is not None:
+            self._lamp_suppress[0] = bool(lamps)
+        if solenoids is not None:
+            self._solenoid_suppress[0] = bool(solenoids)
+    
+    def get_output_stats(self) -> dict:
+        """
+        Zähler der Befehle und Schalter-Ereignisse: lamp_writes und
+        solenoid_writes (gesendet), suppressed_writes (unverändert, nicht
+        gesendet) und switch_events_read (aus der Bibliothek gelesen).
+        """
+        return {
+            'lamp_writes': self._lamp_writes[0],
+            'solenoid_writes': self._solenoid_writes[0],
+            'suppressed_writes': self.suppressed_writes,
+            'switch_events_read': self.switch_events_read,
+        }
+    
+    def get_lamp_state(self, number: int) -> Optional[int]:
+        """Gibt den zuletzt gesendeten Zustand einer Lampe zurück (None = unbekannt)."""
+        return _read_shadow(self._lamp_shadow, number)
+    
+    def get_solenoid_state(self, number: int) -> Optional[int]:
+        """Gibt den zuletzt gesendeten Zustand einer Spule zurück (None = unbekannt)."""
+        return _read_shadow(self._solenoid_shadow, number)
+    
+    def invalidate_output_states(self):
+        """
+        Markiert alle Lampen- und Spulenzustände als unbekannt, sodass der
+        nächste Befehl in jedem Fall gesendet wird.
+        """
+        for shadow in (self._lamp_shadow, self._solenoid_shadow):
+            # In-place, damit gehaltene Referenzen gültig bleiben
+            shadow[:] = _SHADOW_UNKNOWN_BLOCK * len(shadow)
     
     def get_next_switch_state(self) -> Optional[Tuple[int, int]]:
         """Gibt den nächsten Schalter-Zustand zurück."""
+        if self._switch_pump_running or self._switch_queue:
+            # Die Pumpe liest die Bibliothek aus, Ereignisse liegen in der Queue.
+            # Reste nach stop_switch_pump() werden vor neuen Ereignissen geliefert.
+            try:
+                number, state, t_ns = self._switch_queue.popleft()
+            except IndexError:
+                return None
+            self._note_queue_age(t_ns)
+            return (number, state)
+        
         switch_state_ptr = self.lib.ppuc_get_next_switch_state(self.obj)
         if not switch_state_ptr:
             return None
         
+        self.switch_events_read += 1
         switch_state = switch_state_ptr.contents
         return (switch_state.number, switch_state.state)
     
+    def get_next_switch_event(self) -> Optional[Tuple[int, int, int]]:
+        """
+        Gibt das nächste Schalter-Ereignis mit Zeitstempel zurück.
+        
+        Returns:
+            (Nummer, Zustand, t_ns) oder None. t_ns ist time.monotonic_ns()
+            beim Auslesen aus der Bibliothek: bei laufender Switch-Pumpe
+            durch die Pumpe, sonst in diesem Aufruf.
+        """
+        if self._switch_pump_running or self._switch_queue:
+            try:
+                event = self._switch_queue.popleft()
+            except IndexError:
+                return None
+            self._note_queue_age(event[2])
+            return event
+        
+        switch_state_ptr = self.lib.ppuc_get_next_switch_state(self.obj)
+        if not switch_state_ptr:
+            return None
+        
+        self.switch_events_read += 1
+        switch_state = switch_state_ptr.contents
+        return (switch_state.number, switch_state.state, time.monotonic_ns())
+    
+    def drain_switch_states(self, buf) -> int:
+        """
+        Schreibt alle anstehenden Schalter-Zustände in einen vorab angelegten Puffer.
+        
+        Pro Ereignis werden zwei int32-Werte (Nummer, Zustand) abgelegt.
+        Ohne laufende Switch-Pumpe werden die Einträge als Slice aus dem
+        Speicher der Bibliothek kopiert; die Sicht darauf wird pro Adresse
+        einmal angelegt, pro Ereignis entsteht kein Tupel. Läuft die Pumpe,
+        stammen die Einträge aus ihrer Queue, in der sie bereits als Tupel
+        liegen; dann spart drain nur die Rückgabe-Tupel und die Aufrufe.
+        
+        Args:
+            buf: Beschreibbarer Puffer, z.B. array.array('i', bytes(8 * n)),
+                 bytearray oder memoryview
+        
+        Returns:
+            Anzahl der geschriebenen Ereignisse (höchstens Puffergröße / 8 Bytes)
+        """
+        view = memoryview(buf)
+        if view.format != 'i':
+            view = view.cast('B').cast('i')
+        capacity = len(view) >> 1
+        if not capacity:
+            return 0
+        
+        count = 0
+        if self._switch_pump_running or self._switch_queue:
+            # Ereignisse hat bereits die Switch-Pumpe abgeholt
+            queue = self._switch_queue
+            oldest_ns = None
+            while count < capacity:
+                try:
+                    number, state, t_ns = queue.popleft()
+                except IndexError:
+                    break
+                if oldest_ns is None:
+                    oldest_ns = t_ns
+                view[count << 1] = number
+                view[(count << 1) + 1] = state
+                count += 1
+            if oldest_ns is not None:
+                self._note_queue_age(oldest_ns, count)
+            return count
+        
+        lib = self.lib
+        obj = self.obj
+        end = capacity << 1
+        index = 0
+        if not isinstance(lib, ctypes.CDLL):
+            # Andere Backends (Fake, Journal, Trace, Metrics) liefern nur die
+            # Pointer-Variante, über die auch ihre Aufzeichnung läuft
+            next_state = lib.ppuc_get_next_switch_state
+            last_ptr = source = None
+            while index < end:
+                switch_state_ptr = next_state(obj)
+                if not switch_state_ptr:
+                    break
+                if switch_state_ptr is not last_ptr:
+                    # Der Fake gibt stets dasselbe Pointer-Objekt auf dieselbe
+                    # Struktur zurück, die Sicht entsteht dann nur einmal
+                    last_ptr = switch_state_ptr
+                    source = memoryview(_SwitchStateInts.from_buffer(
+                        switch_state_ptr.contents)).cast('B').cast('i')
+                view[index:index + 2] = source
+                index += 2
+            count = index >> 1
+            self.switch_events_read += count
+            return count
+        
+        # Die CDLL liefert über den Alias direkt die Adresse
+        next_state = lib.ppuc_get_next_switch_state_raw
+        views = self._switch_state_views
+        while index < end:
+            state_address = next_state(obj)
+            if not state_address:
+                break
+            source = views.get(state_address)
+            if source is None:
+                if len(views) >= _SWITCH_VIEW_CACHE_SIZE:
+                    views.clear()
+                source = views[state_address] = memoryview(
+                    _SwitchStateInts.from_address(state_address)).cast('B').cast('i')
+            view[index:index + 2] = source
+            index += 2
+        count = index >> 1
+        self.switch_events_read += count
+        return count
+    
+    def wait_next_switch_state(self, timeout: Optional[float] = None) -> Optional[Tuple[int, int]]:
+        """
+        Wartet blockierend auf den nächsten Schalter-Zustand.
+        
+        Der Aufrufer schläft auf einer Condition-Variable, die von der
+        Switch-Pumpe signalisiert wird. Die Pumpe wird beim ersten Aufruf
+        gestartet.
+        
+        Args:
+            timeout: Maximale Wartezeit in Sekunden, None wartet unbegrenzt
+        
+        Returns:
+            (Nummer, Zustand) oder None, wenn das Timeout abgelaufen ist
+        """
+        event = self.wait_next_switch_event(timeout)
+        return (event[0], event[1]) if event is not None else None
+    
+    def wait_next_switch_event(self, timeout: Optional[float] = None) -> Optional[Tuple[int, int, int]]:
+        """
+        Wie wait_next_switch_state(), liefert aber (Nummer, Zustand, t_ns).
+        
+        t_ns ist time.monotonic_ns() beim Auslesen durch die Switch-Pumpe.
+        """
+        if not self._switch_pump_running:
+            self.start_switch_pump()
+        
+        queue = self._switch_queue
+        with self._switch_cond:
+            if not queue and not self._switch_cond.wait_for(
+                    lambda: queue or not self._switch_pump_running, timeout):
+                return None
+            try:
+                event = queue.popleft()
+            except IndexError:
+                return None
+        self._note_queue_age(event[2])
+        return event
+    
+    def get_switch_queue_age(self) -> int:
+        """Alter des ältesten wartenden Ereignisses in Nanosekunden (0 = Queue leer)."""
+        try:
+            return time.monotonic_ns() - self._switch_queue[0][2]
+        except IndexError:
+            return 0
+    
+    def get_switch_queue_stats(self) -> dict:
+        """
+        Statistik, wie lange Ereignisse in der Queue der Switch-Pumpe lagen.
+        
+        Gezählt werden nur Ereignisse, die über die Queue geliefert wurden
+        (ohne laufende Pumpe liest jeder Aufruf direkt aus der Bibliothek).
+        Alle Zeiten in Nanosekunden.
+        """
+        events = self._queue_age_events
+        return {
+            'events': events,
+            'queued': len(self._switch_queue),
+            'age_last_ns': self._queue_age_last_ns,
+            'age_mean_ns': self._queue_age_total_ns // events if events else 0,
+            'age_max_ns': self._queue_age_max_ns,
+            'age_oldest_waiting_ns': self.get_switch_queue_age(),
+            'high_water': self._queue_high_water,
+        }
+    
+    def reset_switch_queue_stats(self):
+        """Setzt die Queue-Statistik zurück."""
+        self._queue_age_events = 0
+        self._queue_age_total_ns = 0
+        self._queue_age_last_ns = 0
+        self._queue_age_max_ns = 0
+        self._queue_high_water = len(self._switch_queue)
+    
+    def _note_queue_age(self, t_ns: int, count: int = 1):
+        """Verbucht das Alter ausgelieferter Queue-Ereignisse."""
+        age = time.monotonic_ns() - t_ns
+        self._queue_age_events += count
+        self._queue_age_total_ns += age * count
+        self._queue_age_last_ns = age
+        if age > self._queue_age_max_ns:
+            self._queue_age_max_ns = age
+    
+    def start_switch_pump(self, max_sleep: Optional[float] = None):
+        """
+        Startet den Hintergrund-Thread, der Schalter-Ereignisse aus der
+        Bibliothek liest und wartende Aufrufer weckt.
+        
+        Die C-API bietet keine Benachrichtigung beim Eintreffen von
+        Ereignissen, daher fragt genau ein Thread die Bibliothek ab und alle
+        Verbraucher warten auf der Condition-Variable. Ohne Ereignisse
+        wacht die Pumpe alle max_sleep Sekunden auf; mit dem Standard von
+        1 ms sind das etwa 1000 Aufwachvorgänge pro Sekunde und eine
+        entsprechende Grundlast. Ein größerer Wert senkt sie, verlängert
+        aber die Latenz des ersten Ereignisses nach einer Pause bis auf
+        max_sleep.
+        
+        Args:
+            max_sleep: Längstes Schlafintervall in Sekunden, Standard:
+                       SWITCH_PUMP_MAX_SLEEP bzw. der zuletzt gesetzte Wert
+        """
+        if max_sleep is not None and max_sleep < self.SWITCH_PUMP_MIN_SLEEP:
+            raise ValueError(f"max_sleep muss mindestens {self.SWITCH_PUMP_MIN_SLEEP} s sein")
+        with self._switch_cond:
+            if max_sleep is not None:
+                # Wirkt auch auf eine laufende Pumpe ab dem nächsten Schlafen
+                self._switch_pump_max_sleep = max_sleep
+            if self._switch_pump_running:
+                return
+            self._switch_pump_running = True
+            self._switch_pump = threading.Thread(
+                target=self._switch_pump_loop, name="ppuc-switch-pump", daemon=True)
+            self._switch_pump.start()
+    
+    def stop_switch_pump(self):
+        """Stoppt die Switch-Pumpe und weckt alle wartenden Aufrufer."""
+        with self._switch_cond:
+            if not self._switch_pump_running:
+                return
+            self._switch_pump_running = False
+            self._switch_cond.notify_all()
+            pump = self._switch_pump
+            self._switch_pump = None
+        if pump is not None and pump is not threading.current_thread():
+            pump.join()
+    
+    def get_switch_wakeup_fd(self) -> int:
+        """
+        Gibt einen Dateideskriptor zurück, der lesbar wird, sobald
+        Schalter-Ereignisse in der Queue liegen (z.B. für select/asyncio).
+        
+        Die Pumpe signalisiert nach jedem Durchgang, der Ereignisse in die
+        Queue gelegt hat, auch wenn dort noch welche warten. Leser rufen
+        zuerst clear_switch_wakeup() auf und leeren danach die Queue mit
+        get_next_switch_state(); was währenddessen eintrifft, setzt den
+        Deskriptor erneut.
+        """
+        with self._switch_cond:
+            if self._wakeup_fd is None:
+                if hasattr(os, 'eventfd'):
+                    fd = os.eventfd(0, os.EFD_NONBLOCK | os.EFD_CLOEXEC)
+                    self._wakeup_fd = (fd, fd)
+                    self._wakeup_signal = lambda: os.eventfd_write(fd, 1)
+                else:
+                    read_fd, write_fd = os.pipe()
+                    os.set_blocking(read_fd, False)
+                    os.set_blocking(write_fd, False)
+                    self._wakeup_fd = (read_fd, write_fd)
+                    self._wakeup_signal = lambda: os.write(write_fd, b'\0')
+                if self._switch_queue:
+                    self._wakeup_signal()
+        if not self._switch_pump_running:
+            self.start_switch_pump()
+        return self._wakeup_fd[0]
+    
+    def clear_switch_wakeup(self):
+        """Setzt den Wakeup-Dateideskriptor zurück (nicht blockierend)."""
+        if self._wakeup_fd is None:
+            return
+        try:
+            os.read(self._wakeup_fd[0], 4096)
+        except BlockingIOError:
+            pass
+    
+    def close_switch_wakeup_fd(self):
+        """Schließt den Wakeup-Dateideskriptor."""
+        with self._switch_cond:
+            if self._wakeup_fd is None:
+                return
+            read_fd, write_fd = self._wakeup_fd
+            self._wakeup_fd = None
+            self._wakeup_signal = None
+        os.close(read_fd)
+        if write_fd != read_fd:
+            os.close(write_fd)
+    
+    def _switch_pump_loop(self):
+        """Liest Ereignisse aus der Bibliothek in die Queue (läuft im Pumpen-Thread)."""
+        switch_native = self._switch_native
+        obj = self.obj
+        queue = self._switch_queue
+        cond = self._switch_cond
+        monotonic_ns = time.monotonic_ns
+        min_sleep = self.SWITCH_PUMP_MIN_SLEEP
+        sleep = min_sleep
+        
+        while self._switch_pump_running:
+            # Pro Durchgang neu, damit Trace und Stichproben die Pumpe erfassen
+            get_next = switch_native[0]
+            switch_state_ptr = get_next(obj)
+            if not switch_state_ptr:
+                time.sleep(sleep)
+                max_sleep = self._switch_pump_max_sleep
+                if sleep != max_sleep:
+                    sleep = min(sleep * 2, max_sleep)
+                continue
+            
+            # Alle anstehenden Ereignisse einsammeln (jeweils mit dem
+            # Zeitpunkt des Auslesens), dann einmal wecken
+            t_ns = monotonic_ns()
+            read = 0
+            with cond:
+                while switch_state_ptr:
+                    switch_state = switch_state_ptr.contents
+                    queue.append((switch_state.number, switch_state.state, t_ns))
+                    read += 1
+                    switch_state_ptr = get_next(obj)
+                    t_ns = monotonic_ns()
+                self.switch_events_read += read
+                if len(queue) > self._queue_high_water:
+                    self._queue_high_water = len(queue)
+                cond.notify_all()
+                # Bei jedem Durchgang signalisieren: Verbraucher leeren die
+                # Queue ohne Lock, ein "war leer" wäre hier nicht verlässlich
+                if self._wakeup_signal is not None:
+                    try:
+                        self._wakeup_signal()
+                    except BlockingIOError:
+                        # Pipe voll: der Leser ist ohnehin schon geweckt
+                        pass
+            sleep = min_sleep
+    
+    def enable_metrics(self, timing_period: float = 1.0, timing_window: float = 0.01) -> 'Metrics':
+        """
+        Aktiviert die Laufzeit-Kennzahlen (siehe ppuc_metrics).
+        
+        Zähler, Queue-Stand und Link-Zähler führt PPUC ohnehin; zusätzlich
+        werden Switch-Handler eines danach gestarteten SwitchDispatcher
+        gemessen und in jedem timing_period für timing_window Sekunden die
+        ctypes-Aufrufe der PPUC-Methoden (Stichprobe, ca. 1 % der Zeit).
+        Handles aus lamp()/coil() werden nur während der Fenster gemessen,
+        egal wann sie erzeugt wurden.
+        
+        Returns:
+            Metrics-Objekt mit serve(), write_textfile() und snapshot()
+        """
+        with self._backend_lock:
+            if self.metrics is None:
+                from ppuc_metrics import Metrics
+                self.metrics = Metrics(self, timing_period, timing_window)
+            return self.metrics
+    
+    def disable_metrics(self):
+        """Beendet Kennzahlen, Stichproben und Export."""
+        with self._backend_lock:
+            metrics = self.metrics
+            self.metrics = None
+        if metrics is not None:
+            # Außerhalb des Locks: der Stichproben-Thread braucht ihn zum Beenden
+            metrics.stop()
+    
+    def _begin_timing(self, metrics: 'Metrics'):
+        """Legt für ein Stichproben-Fenster von metrics ein TimingBackend vor die Bibliothek."""
+        with self._backend_lock:
+            self._timing_metrics = metrics
+            self._rebuild_lib()
+    
+    def _end_timing(self, metrics: 'Metrics'):
+        """Entfernt das TimingBackend von metrics wieder."""
+        with self._backend_lock:
+            if self._timing_metrics is metrics:
+                self._timing_metrics = None
+                self._rebuild_lib()
+    
+    def _rebuild_lib(self):
+        """Baut self.lib aus Basis-Backend, Trace und Stichprobe neu auf (unter _backend_lock)."""
+        lib = self._base_lib
+        if self._trace_backend is not None:
+            lib = self._trace_backend
+        if self._timing_metrics is not None:
+            from ppuc_metrics import TimingBackend
+            lib = TimingBackend(self._timing_metrics, lib)
+        self.lib = lib
+        self._lamp_native[0] = lib.ppuc_set_lamp_state
+        self._solenoid_native[0] = lib.ppuc_set_solenoid_state
+        self._switch_native[0] = lib.ppuc_get_next_switch_state
+    
+    def enable_tracing(self, path: str, buffer_size: int = 100000,
+                       flush_interval: float = 0.5) -> 'TraceWriter':
+        """
+        Schreibt Schalter-Ereignisse, gesendete Lampen-/Spulenbefehle, Tests
+        und Log-Meldungen als Trace (Chrome Trace Event Format, siehe
+        ppuc_trace) fortlaufend nach path.
+        
+        Die Bibliothek wird dazu hinter ein aufzeichnendes Backend gelegt.
+        Vor start_updates() aufrufen; Switch-Pumpe, SwitchDispatcher und
+        Handles aus lamp()/coil() folgen dem Backend auch, wenn sie vorher
+        gestartet bzw. erzeugt wurden. Log-Meldungen landen
+        im Trace, solange kein eigener Log-Callback gesetzt ist; ein eigener
+        Callback kann sie an trace.log() weitergeben.
+        
+        Args:
+            path: Ziel-Datei (.json)
+            buffer_size: Maximal wartende Ereignisse, darüber wird verworfen
+            flush_interval: Schreibintervall in Sekunden
+        
+        Returns:
+            TraceWriter (written, dropped, log())
+        """
+        with self._backend_lock:
+            if self.trace is not None:
+                self.disable_tracing()
+            from ppuc_trace import TraceBackend, TraceWriter
+            self.trace = TraceWriter(path, buffer_size, flush_interval)
+            self._trace_backend = TraceBackend(self.trace, self._base_lib)
+            self._rebuild_lib()
+            if self._log_delivery is None:
+                self.set_log_message_callback(self.trace.log_lines, batch=True, timestamps=True)
+            return self.trace
+    
+    def disable_tracing(self):
+        """Beendet den Trace, schließt die Datei und entfernt das aufzeichnende Backend."""
+        with self._backend_lock:
+            trace = self.trace
+            if trace is None:
+                return
+            self.trace = None
+            self._trace_backend = None
+            self._rebuild_lib()
+            if self._log_delivery is not None and self._log_delivery.callback == trace.log_lines:
+                delivery = self._log_delivery
+                self._log_delivery = None
+                delivery.stop()
+        trace.close()
+    
+    def enable_profiling(self, methods: Optional[Iterable[str]] = None):
+        """
+        Misst die Laufzeit jedes Aufrufs öffentlicher Methoden in
+        Nanosekunden (Histogramme aus ppuc_metrics, siehe get_profile()).
+        
+        Die Messung wird als Instanz-Attribut vor die Methode gelegt; ohne
+        Profiling gibt es keinen zusätzlichen Aufruf. Funktionen, die vorher
+        gebunden wurden (z.B. in einem laufenden SwitchDispatcher), bleiben
+        ungemessen. Innere Aufrufe (wait_next_switch_state ->
+        wait_next_switch_event) werden einzeln gezählt.
+        
+        Args:
+            methods: Namen der Methoden, Standard: alle öffentlichen
+        """
+        from ppuc_metrics import Histogram
+        with self._backend_lock:
+            if self.profile is None:
+                self.profile = {}
+            if methods is None:
+                methods = [name for name, value in vars(PPUC).items()
+                           if callable(value) and not name.startswith('_') and name not in _PROFILE_EXCLUDE]
+            perf_counter_ns = time.perf_counter_ns
+            for name in methods:
+                if name in self.__dict__:
+                    continue
+                method = getattr(self, name)
+                histogram = self.profile.get(name)
+                if histogram is None:
+                    histogram = self.profile[name] = Histogram()
+                
+                def timed(*args, _method=method, _record=histogram.record, **kwargs):
+                    start = perf_counter_ns()
+                    try:
+                        return _method(*args, **kwargs)
+                    finally:
+                        _record(perf_counter_ns() - start)
+                
+                timed.__name__ = name
+                timed.__doc__ = method.__doc__
+                setattr(self, name, timed)
+    
+    def disable_profiling(self):
+        """Entfernt die Messungen; die Methoden sind wieder die der Klasse."""
+        with self._backend_lock:
+            if self.profile is not None:
+                for name in self.profile:
+                    self.__dict__.pop(name, None)
+                self.profile = None
+    
+    def get_profile(self) -> dict:
+        """
+        Laufzeiten pro Methode seit enable_profiling() in Nanosekunden:
+        {Name: {'count', 'min', 'mean', 'p50', 'p90', 'p99', 'p99.9', 'max'}},
+        nur aufgerufene Methoden.
+        """
+        if self.profile is None:
+            return {}
+        return {name: histogram.summary() for name, histogram in self.profile.items() if histogram.count}
+    
+    def reset_profile(self):
+        """Setzt die Histogramme des Profilings zurück."""
+        for histogram in (self.profile or {}).values():
+            histogram.reset()
+    
     def get_coin_door_closed_switch(self) -> int:
         """Gibt die Münztür-Schalter-Nummer zurück."""
         return self.lib.ppuc_get_coin_door_closed_switch(self.obj)
@@ -273,75 +1689,238 @@ class PPUC:
     def coil_test(self):
         """Führt einen Spulentest durch."""
         self.lib.ppuc_coil_test(self.obj)
+        self.invalidate_output_states()
     
     def lamp_test(self):
         """Führt einen Lampentest durch."""
         self.lib.ppuc_lamp_test(self.obj)
+        self.invalidate_output_states()
     
     def switch_test(self):
         """Führt einen Schaltertest durch."""
         self.lib.ppuc_switch_test(self.obj)
     
-    def get_coils(self) -> List[dict]:
-        """Gibt alle Spulen zurück."""
-        count = ctypes.c_int()
-        coils_ptr = self.lib.ppuc_get_coils(self.obj, ctypes.byref(count))
-        
-        coils = []
-        for i in range(count.value):
-            coil = coils_ptr[i]
-            coils.append({
-                'board': coil.board,
-                'port': coil.port,
-                'type': coil.type,
-                'number': coil.number,
-                'description': coil.description.decode('utf-8') if coil.description else ""
-            })
-        
-        self.lib.ppuc_free_coils(coils_ptr)
+    def get_coils(self) -> Tuple['CoilInfo', ...]:
+        """Gibt alle Spulen zurück (zwischengespeichert bis zur nächsten Konfiguration)."""
+        coils = self._inventory.get('coils')
+        if coils is None:
+            coils = self._compiled_devices('coil')
+            if coils is None:
+                coils = _read_devices(self.lib.ppuc_get_coils, self.lib.ppuc_free_coils, self.obj, CoilInfo)
+            self._inventory['coils'] = coils
         return coils
     
-    def get_lamps(self) -> List[dict]:
-        """Gibt alle Lampen zurück."""
-        count = ctypes.c_int()
-        lamps_ptr = self.lib.ppuc_get_lamps(self.obj, ctypes.byref(count))
-        
-        lamps = []
-        for i in range(count.value):
-            lamp = lamps_ptr[i]
-            lamps.append({
-                'board': lamp.board,
-                'port': lamp.port,
-                'type': lamp.type,
-                'number': lamp.number,
-                'description': lamp.description.decode('utf-8') if lamp.description else ""
-            })
-        
-        self.lib.ppuc_free_lamps(lamps_ptr)
+    def get_lamps(self) -> Tuple['LampInfo', ...]:
+        """Gibt alle Lampen zurück (zwischengespeichert bis zur nächsten Konfiguration)."""
+        lamps = self._inventory.get('lamps')
+        if lamps is None:
+            lamps = self._compiled_devices('lamp')
+            if lamps is None:
+                lamps = _read_devices(self.lib.ppuc_get_lamps, self.lib.ppuc_free_lamps, self.obj, LampInfo)
+            self._inventory['lamps'] = lamps
         return lamps
     
-    def get_switches(self) -> List[dict]:
-        """Gibt alle Schalter zurück."""
-        count = ctypes.c_int()
-        switches_ptr = self.lib.ppuc_get_switches(self.obj, ctypes.byref(count))
+    def _compiled_devices(self, kind: str) -> Optional[tuple]:
+        """
+        Inventar-Einträge aus dem Snapshot der geladenen Konfiguration.
         
-        switches = []
-        for i in range(count.value):
-            switch = switches_ptr[i]
-            switches.append({
-                'board': switch.board,
-                'port': switch.port,
-                'number': switch.number,
-                'description': switch.description.decode('utf-8') if switch.description else ""
-            })
-        
-        self.lib.ppuc_free_switches(switches_ptr)
+        Nur der erste Start nach einer Änderung der YAML-Datei kompiliert,
+        danach wird der Snapshot eingeblendet (siehe ppuc_config). None ohne
+        Konfiguration oder wenn sie sich nicht kompilieren lässt (z.B. ohne
+        PyYAML); dann liest der Aufrufer die Bibliothek aus.
+        """
+        if self._config_file is None:
+            return None
+        try:
+            compiled = self.get_compiled_configuration()
+        except (PPUCConfigurationError, OSError):
+            return None
+        return compiled.devices(kind)
+    
+    def get_coil_index(self) -> 'DeviceIndex':
+        """Gibt den Index über alle Spulen zurück."""
+        return self._get_index('coil_index', self.get_coils)
+    
+    def get_lamp_index(self) -> 'DeviceIndex':
+        """Gibt den Index über alle Lampen zurück."""
+        return self._get_index('lamp_index', self.get_lamps)
+    
+    def get_switch_index(self) -> 'DeviceIndex':
+        """Gibt den Index über alle Schalter zurück."""
+        return self._get_index('switch_index', self.get_switches)
+    
+    def lamp(self, description: str) -> 'OutputHandle':
+        """
+        Gibt einen Handle für die Lampe mit dieser Beschreibung zurück.
+        
+        Die Beschreibung wird einmal über das Inventar aufgelöst, danach
+        gehen handle.on()/off()/set() ohne weitere Nachschlagen direkt an
+        das aktuelle Backend.
+        """
+        return self._get_output_handle('lamp', description, self.get_lamp_index(),
+                                       self._lamp_shadow, self._lamp_native,
+                                       self._lamp_writes, self._lamp_suppress)
+    
+    def coil(self, description: str) -> 'OutputHandle':
+        """Gibt einen Handle für die Spule mit dieser Beschreibung zurück."""
+        return self._get_output_handle('coil', description, self.get_coil_index(),
+                                       self._solenoid_shadow, self._solenoid_native,
+                                       self._solenoid_writes, self._solenoid_suppress)
+    
+    def _get_output_handle(self, kind: str, description: str, index: 'DeviceIndex',
+                           shadow: 'array.array', native: list, writes: list,
+                           suppress: list) -> 'OutputHandle':
+        """Löst eine Beschreibung auf und erstellt den Handle (zwischengespeichert)."""
+        key = (kind, description)
+        handle = self._inventory.get(key)
+        if handle is not None:
+            return handle
+        
+        numbers = sorted({device.number for device in index.by_description(description)})
+        if not numbers:
+            raise KeyError(f"Keine Konfiguration für '{description}' gefunden")
+        if len(numbers) > 1:
+            raise ValueError(f"Beschreibung '{description}' ist mehrdeutig (Nummern {numbers})")
+        
+        handle = self._inventory[key] = OutputHandle(self, numbers[0], description, shadow, native, writes,
+                                                        suppress)
+        return handle
+    
+    def _get_index(self, key: str, get_devices) -> 'DeviceIndex':
+        """Baut einen DeviceIndex bei Bedarf und speichert ihn im Inventar-Cache."""
+        index = self._inventory.get(key)
+        if index is None:
+            index = self._inventory[key] = DeviceIndex(get_devices())
+        return index
+    
+    def get_switches(self) -> Tuple['SwitchInfo', ...]:
+        """Gibt alle Schalter zurück (zwischengespeichert bis zur nächsten Konfiguration)."""
+        switches = self._inventory.get('switches')
+        if switches is None:
+            switches = self._compiled_devices('switch')
+            if switches is None:
+                switches = _read_devices(self.lib.ppuc_get_switches, self.lib.ppuc_free_switches, self.obj, SwitchInfo)
+            self._inventory['switches'] = switches
         return switches
 
+class SwitchDispatcher:
+    """
+    Ruft registrierte Handler pro Schalter-Nummer und Flanke auf.
+    
+    Ein Hintergrund-Thread wartet mit wait_next_switch_state() auf
+    Ereignisse. Die Handler liegen in einer dichten Tabelle mit dem Index
+    Nummer * 2 + Zustand, der Aufwand pro Ereignis ist daher unabhängig von
+    der Anzahl der Schalter und Handler. Eine von start() gestartete
+    Switch-Pumpe beendet stop() wieder.
+    """
+    
+    def __init__(self, ppuc: PPUC, size: Optional[int] = None):
+        """
+        Args:
+            ppuc: Verbundene PPUC-Instanz
+            size: Anzahl der Tabellenplätze (höchste Schalter-Nummer + 1),
+                  ohne Angabe aus get_switches() bestimmt
+        """
+        if size is None:
+            size = max((switch['number'] for switch in ppuc.get_switches()), default=0) + 1
+        self.ppuc = ppuc
+        self._table = [()] * (size * 2)
+        self._default = ()
+        self._thread = None
+        self._running = False
+        self._started_pump = False
+    
+    def on(self, number: int, handler: Callable[[int, int], None], state: Optional[int] = None):
+        """
+        Registriert handler(number, state) für einen Schalter.
+        
+        Args:
+            number: Schalter-Nummer
+            handler: Aufrufbares Objekt mit (Nummer, Zustand)
+            state: 1 für Einschalten, 0 für Ausschalten, None für beide Flanken
+        """
+        if number < 0:
+            raise ValueError(f"Ungültige Schalter-Nummer: {number}")
+        table = self._table
+        if number * 2 + 1 >= len(table):
+            # In-place vergrößern, der Dispatch-Thread hält eine Referenz
+            table.extend([()] * (number * 2 + 2 - len(table)))
+        for index in self._indices(number, state):
+            table[index] = table[index] + (handler,)
+    
+    def remove(self, number: int, handler: Callable[[int, int], None], state: Optional[int] = None):
+        """Entfernt einen mit on() registrierten Handler."""
+        table = self._table
+        for index in self._indices(number, state):
+            if index < len(table):
+                table[index] = tuple(h for h in table[index] if h is not handler)
+    
+    def set_default_handler(self, handler: Optional[Callable[[int, int], None]]):
+        """Setzt den Handler für Schalter ohne eigenen Eintrag (None entfernt ihn)."""
+        self._default = (handler,) if handler is not None else ()
+    
+    def dispatch(self, number: int, state: int):
+        """Ruft die Handler für ein Ereignis im aktuellen Thread auf."""
+        state = 1 if state else 0
+        table = self._table
+        index = number * 2 + state
+        handlers = table[index] if 0 <= index < len(table) else ()
+        for handler in handlers or self._default:
+            try:
+                handler(number, state)
+            except Exception as e:
+                print(f"Fehler im Switch-Handler für Schalter {number}: {e}")
+    
+    def start(self):
+        """Startet den Dispatch-Thread."""
+        if self._running:
+            return
+        self._running = True
+        if not self.ppuc._switch_pump_running:
+            self.ppuc.start_switch_pump()
+            self._started_pump = True
+        self._thread = threading.Thread(target=self._run, name="ppuc-switch-dispatcher", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stoppt den Dispatch-Thread und die von start() gestartete Switch-Pumpe."""
+        self._running = False
+        thread = self._thread
+        self._thread = None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        if self._started_pump:
+            self._started_pump = False
+            self.ppuc.stop_switch_pump()
+    
+    @staticmethod
+    def _indices(number: int, state: Optional[int]):
+        """Tabellenindizes für Nummer und Flanke."""
+        if state is None:
+            return (number * 2, number * 2 + 1)
+        return (number * 2 + (1 if state else 0),)
+    
+    def _run(self):
+        """Hauptschleife des Dispatch-Threads."""
+        wait_next = self.ppuc.wait_next_switch_state
+        get_next = self.ppuc.get_next_switch_state
+        dispatch = self.dispatch
+        if self.ppuc.metrics is not None:
+            dispatch = self.ppuc.metrics.timed_callback(dispatch)
+        while self._running:
+            event = wait_next(0.1)
+            # Bursts ohne erneutes Warten abarbeiten
+            while event is not None:
+                dispatch(event[0], event[1])
+                event = get_next()
+
 # Exportiere alle Konstanten
 __all__ = [
-    'PPUC',
+    'PPUC', 'PPUCLibraryError', 'PPUCConfigurationError', 'load_library', 'SwitchDispatcher', 'DeviceIndex', 'OutputHandle', 'SwitchInfo', 'CoilInfo', 'LampInfo',
     'LED_TYPE_LAMP', 'LED_TYPE_FLASHER', 'LED_TYPE_GI',
     'PWM_TYPE_SOLENOID', 'PWM_TYPE_FLASHER', 'PWM_TYPE_LAMP', 'PWM_TYPE_MOTOR',
-    'PLATFORM_WPC', 'PLATFORM_DATA_EAST', 'PLATFORM_SYS4', 'PLATFORM_SYS11'
+    'PLATFORM_WPC', 'PLATFORM_DATA_EAST', 'PLATFORM_SYS4', 'PLATFORM_SYS11',
+    'LOG_DEBUG', 'LOG_INFO', 'LOG_WARNING', 'LOG_ERROR',
+    'LOG_CATEGORY_SWITCH', 'LOG_CATEGORY_EVENT', 'LOG_CATEGORY_CONFIG', 'LOG_CATEGORY_BOARD',
+    'LOG_CATEGORY_LINK', 'LOG_CATEGORY_GENERAL', 'classify_log_message'
 ]
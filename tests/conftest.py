@@ -0,0 +1,72 @@
+import os
+import sys
+
+import pytest
+
+# Module liegen flach im Wurzelverzeichnis des Repositories
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ppuc_fake import FakeLibrary  # noqa: E402
+from ppuc_wrapper import PPUC  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _cache_home(tmp_path, monkeypatch):
+    # Snapshots von ppuc_config nie in den Cache des Benutzers schreiben
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / "xdg-cache"))
+
+
+@pytest.fixture
+def fake():
+    return FakeLibrary()
+
+
+@pytest.fixture
+def ppuc(fake):
+    ppuc = PPUC(backend=fake)
+    yield ppuc
+    ppuc.stop_switch_pump()
+    ppuc.close_switch_wakeup_fd()
+
+
+# Ruft den Log-Callback wie die Bibliothek mit einer echten va_list auf
+_LOG_EMITTER_SOURCE = r"""
+#include <stdarg.h>
+
+typedef void (*ppuc_log_callback)(const char *format, va_list args, void *user_data);
+
+void ppuc_test_emit_log(ppuc_log_callback callback, void *user_data, const char *format, ...)
+{
+    va_list args;
+    va_start(args, format);
+    callback(format, args, user_data);
+    va_end(args);
+}
+"""
+
+
+@pytest.fixture(scope='session')
+def log_emitter(tmp_path_factory):
+    """C-Emitter für FakeLibrary.emit_log(..., emitter=...), sonst skip."""
+    import ctypes
+    import platform
+    import shutil
+    import subprocess
+
+    from ppuc_wrapper import PPUC_LogMessageCallback
+
+    # va_list wird nur auf x86-64 als Zeiger übergeben wie im Callback-Typ
+    if platform.machine() not in ('x86_64', 'AMD64') or os.name != 'posix':
+        pytest.skip("Log-Emitter nur auf x86-64 (POSIX)")
+    compiler = shutil.which(os.environ.get('CC', 'cc'))
+    if compiler is None:
+        pytest.skip("Kein C-Compiler für den Log-Emitter")
+    directory = tmp_path_factory.mktemp("log-emitter")
+    source = directory / "emitter.c"
+    source.write_text(_LOG_EMITTER_SOURCE)
+    library = directory / "libemitter.so"
+    subprocess.run([compiler, "-shared", "-fPIC", "-o", str(library), str(source)], check=True)
+    emit = ctypes.CDLL(str(library)).ppuc_test_emit_log
+    emit.restype = None
+    emit.argtypes = [PPUC_LogMessageCallback, ctypes.c_void_p, ctypes.c_char_p]
+    return emit
@@ -0,0 +1,96 @@
+import sys
+
+import numpy as np
+
+import ppuc_analysis
+from ppuc_analysis import (
+    activation_counts, bounce_counts, dead_switches, edge_counts, edge_intervals, hot_spots,
+    interval_histogram, load_switch_events, rates,
+)
+from ppuc_journal import JOURNAL_LAMP, JOURNAL_SWITCH, JournalWriter
+
+MS = 1_000_000
+
+
+def _journal(path, events, duration_ms=None):
+    """Schreibt (Zeit in ms, Nummer, Zustand) als Schalter-Ereignisse."""
+    with JournalWriter(str(path)) as journal:
+        for t_ms, number, state in events:
+            journal.write(JOURNAL_SWITCH, number, state, t_ns=journal.start_ns + t_ms * MS)
+            # Lampen dazwischen dürfen die Spalten nicht stören
+            journal.write(JOURNAL_LAMP, number, state, t_ns=journal.start_ns + t_ms * MS)
+        if duration_ms is not None:
+            journal.write(JOURNAL_LAMP, 0, 0, t_ns=journal.start_ns + duration_ms * MS)
+    return str(path)
+
+
+def _two_sessions(tmp_path):
+    first = _journal(tmp_path / "a.ppj", [(0, 3, 1), (2, 3, 0), (100, 3, 1), (200, 7, 1)], 1000)
+    second = _journal(tmp_path / "b.ppj", [(0, 3, 0), (1, 3, 1), (500, 7, 0)], 1000)
+    return load_switch_events([first, second])
+
+
+def test_load_switch_events_across_journals(tmp_path):
+    columns = _two_sessions(tmp_path)
+    assert len(columns) == 7
+    assert columns.number.tolist() == [3, 3, 3, 7, 3, 3, 7]
+    assert columns.state.tolist() == [1, 0, 1, 1, 0, 1, 0]
+    assert columns.session.tolist() == [0, 0, 0, 0, 1, 1, 1]
+    assert (columns.t_ns // MS).tolist() == [0, 2, 100, 200, 0, 1, 500]
+    assert columns.durations_ns.tolist() == [1000 * MS, 1000 * MS]
+    assert columns.total_duration_ns == 2000 * MS
+
+
+def test_load_single_path_and_empty_journal(tmp_path):
+    columns = load_switch_events(_journal(tmp_path / "leer.ppj", []))
+    assert len(columns) == 0
+    assert columns.number.dtype == np.uint16
+    assert rates(columns).tolist() == []
+
+
+def test_edge_intervals_stay_within_session(tmp_path):
+    number, intervals, state = edge_intervals(_two_sessions(tmp_path))
+    # Schalter 7 hat in jeder Aufnahme nur eine Flanke, also kein Intervall
+    assert number.tolist() == [3, 3, 3]
+    assert (intervals // MS).tolist() == [2, 98, 1]
+    assert state.tolist() == [0, 1, 1]
+
+
+def test_counts_and_rates(tmp_path):
+    columns = _two_sessions(tmp_path)
+    assert activation_counts(columns).tolist()[3:] == [3, 0, 0, 0, 1]
+    assert edge_counts(columns, minlength=10).tolist() == [0, 0, 0, 5, 0, 0, 0, 2, 0, 0]
+    assert rates(columns, minlength=8)[[3, 7]].tolist() == [1.5, 0.5]
+    numbers, counts = hot_spots(columns, top=5)
+    assert numbers.tolist() == [3, 7]
+    assert counts.tolist() == [3, 1]
+
+
+def test_bounce_counts(tmp_path):
+    columns = _two_sessions(tmp_path)
+    assert bounce_counts(columns, minlength=8).tolist()[3] == 2
+    assert bounce_counts(columns, threshold_ns=2 * MS).tolist()[3] == 1
+    assert bounce_counts(columns, threshold_ns=200 * MS).tolist()[3] == 3
+
+
+def test_interval_histogram(tmp_path):
+    bins, counts = interval_histogram(_two_sessions(tmp_path), bins_ns=[0, 5 * MS, 50 * MS, 500 * MS], minlength=10)
+    assert bins.tolist() == [0, 5 * MS, 50 * MS, 500 * MS]
+    assert counts.shape == (10, 3)
+    assert counts[3].tolist() == [2, 0, 1]
+    assert counts.sum() == 3
+
+
+def test_dead_switches(tmp_path):
+    assert dead_switches(_two_sessions(tmp_path), [7, 1, 3, 12, 1]).tolist() == [1, 12]
+
+
+def test_cli_with_open_edge_on_highest_switch(tmp_path, monkeypatch, capsys):
+    path = _journal(tmp_path / "offen.ppj", [(0, 5, 1), (10, 9, 0)], 1000)
+    monkeypatch.setattr(sys, 'argv', ['ppuc_analysis.py', path])
+    ppuc_analysis.main()
+    lines = capsys.readouterr().out.splitlines()
+    rows = {int(line.split()[0]): line.split() for line in lines if line[:4].strip().isdigit()}
+    assert sorted(rows) == [5, 9]
+    assert rows[5][1:3] == ['1', '1']
+    assert rows[9][1:3] == ['0', '1']
@@ -0,0 +1,106 @@
+import asyncio
+
+from ppuc_asyncio import AsyncPPUC
+
+
+async def _collect(iterator, count):
+    events = []
+    async for event in iterator:
+        events.append(event)
+        if len(events) == count:
+            break
+    return events
+
+
+def test_switch_events(ppuc, fake):
+    async def main():
+        async_ppuc = AsyncPPUC(ppuc)
+        try:
+            task = asyncio.ensure_future(_collect(async_ppuc.switch_events(), 3))
+            await asyncio.sleep(0.01)
+            fake.push_switch_states([(1, 1), (2, 1)])
+            await asyncio.sleep(0.01)
+            fake.push_switch_state(1, 0)
+            return await asyncio.wait_for(task, 2.0)
+        finally:
+            async_ppuc.close()
+    assert asyncio.run(main()) == [(1, 1), (2, 1), (1, 0)]
+
+
+def test_switch_events_with_timestamps(ppuc, fake):
+    async def main():
+        async_ppuc = AsyncPPUC(ppuc)
+        try:
+            fake.push_switch_states([(5, 1), (5, 0)])
+            return await asyncio.wait_for(_collect(async_ppuc.switch_events(timestamps=True), 2), 2.0)
+        finally:
+            async_ppuc.close()
+    events = asyncio.run(main())
+    assert [event[:2] for event in events] == [(5, 1), (5, 0)]
+    assert events[0][2] <= events[1][2]
+
+
+def test_only_one_reader(ppuc):
+    async def main():
+        async_ppuc = AsyncPPUC(ppuc)
+        try:
+            first = async_ppuc.switch_events()
+            task = asyncio.ensure_future(first.__anext__())
+            await asyncio.sleep(0.01)
+            try:
+                await async_ppuc.switch_events().__anext__()
+            except RuntimeError:
+                return True
+            finally:
+                task.cancel()
+            return False
+        finally:
+            async_ppuc.close()
+    assert asyncio.run(main())
+
+
+def test_commands(ppuc, fake):
+    async def main():
+        async_ppuc = AsyncPPUC(ppuc)
+        try:
+            await async_ppuc.set_lamp_state(21, 1)
+            await async_ppuc.set_lamp_state(21, 1)
+            await async_ppuc.set_lamp_state(21, 1, force=True)
+            await async_ppuc.set_solenoid_state(7, 1)
+            return await async_ppuc.connect()
+        finally:
+            async_ppuc.close()
+    assert asyncio.run(main())
+    instance = fake.instance()
+    assert instance.lamp_writes == 2
+    assert instance.solenoids[7] == 1
+
+
+def test_close_stops_pump_it_started(ppuc):
+    async def main():
+        async_ppuc = AsyncPPUC(ppuc)
+        iterator = async_ppuc.switch_events()
+        task = asyncio.ensure_future(iterator.__anext__())
+        await asyncio.sleep(0.01)
+        assert ppuc._switch_pump_running
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        async_ppuc.close()
+    asyncio.run(main())
+    assert not ppuc._switch_pump_running
+    assert ppuc._wakeup_fd is None
+
+
+def test_close_keeps_pump_started_elsewhere(ppuc):
+    ppuc.start_switch_pump()
+
+    async def main():
+        async_ppuc = AsyncPPUC(ppuc)
+        iterator = async_ppuc.switch_events()
+        task = asyncio.ensure_future(iterator.__anext__())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        async_ppuc.close()
+    asyncio.run(main())
+    assert ppuc._switch_pump_running
@@ -0,0 +1,116 @@
+import os
+import shutil
+
+import pytest
+
+import ppuc_config
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ELEKTRA = os.path.join(ROOT, "elektra.yml")
+
+
+def _snapshots(cache_dir):
+    return sorted(name for name in os.listdir(cache_dir) if name.endswith(".ppucc"))
+
+
+def test_compile_and_reuse_snapshot(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    compiled = ppuc_config.load_compiled_configuration(ELEKTRA, cache_dir)
+    try:
+        switches = compiled.count('switch')
+        assert switches > 0
+        assert compiled.count('led') > 0
+    finally:
+        compiled.close()
+    assert len(_snapshots(cache_dir)) == 1
+
+    mapped = ppuc_config.load_compiled_configuration(ELEKTRA, cache_dir)
+    try:
+        assert mapped.count('switch') == switches
+    finally:
+        mapped.close()
+    assert len(_snapshots(cache_dir)) == 1
+
+
+def test_same_name_in_other_directory_keeps_snapshot(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    first = tmp_path / "a" / "game.yml"
+    second = tmp_path / "b" / "game.yml"
+    for path in (first, second):
+        path.parent.mkdir()
+        shutil.copy(ELEKTRA, path)
+    with open(second, 'a', encoding='utf-8') as f:
+        f.write("\n# geändert\n")
+
+    for path in (first, second):
+        ppuc_config.load_compiled_configuration(str(path), cache_dir).close()
+    assert len(_snapshots(cache_dir)) == 2
+    assert ppuc_config.snapshot_path(str(first), b'\0' * 32, cache_dir) != \
+        ppuc_config.snapshot_path(str(second), b'\0' * 32, cache_dir)
+
+
+def test_changed_file_replaces_its_snapshot(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    config = tmp_path / "game.yml"
+    shutil.copy(ELEKTRA, config)
+    ppuc_config.load_compiled_configuration(str(config), cache_dir).close()
+    old = _snapshots(cache_dir)
+    with open(config, 'a', encoding='utf-8') as f:
+        f.write("\n# geändert\n")
+    ppuc_config.load_compiled_configuration(str(config), cache_dir).close()
+    new = _snapshots(cache_dir)
+    assert len(new) == 1 and new != old
+
+
+def test_invalid_configuration(tmp_path):
+    config = tmp_path / "broken.yml"
+    config.write_text("boards:\n  - number: x\n", encoding='utf-8')
+    with pytest.raises(ppuc_config.PPUCConfigurationError):
+        ppuc_config.load_compiled_configuration(str(config), str(tmp_path))
+
+
+def _count_calls(monkeypatch, fake, names):
+    calls = []
+    for name in names:
+        function = getattr(fake, name)
+        monkeypatch.setattr(fake, name, lambda *args, _f=function, _n=name: calls.append(_n) or _f(*args))
+    return calls
+
+
+def test_inventory_from_snapshot(monkeypatch):
+    from ppuc_fake import FakeLibrary
+    from ppuc_wrapper import PPUC, _read_devices, CoilInfo, LampInfo, SwitchInfo
+
+    fake = FakeLibrary()
+    ppuc = PPUC(backend=fake)
+    ppuc.load_configuration(ELEKTRA)
+    calls = _count_calls(monkeypatch, fake, ('ppuc_get_coils', 'ppuc_get_lamps', 'ppuc_get_switches'))
+    coils, lamps, switches = ppuc.get_coils(), ppuc.get_lamps(), ppuc.get_switches()
+    assert calls == []
+    # Gleiche Einträge wie aus der Bibliothek
+    obj = ppuc.obj
+    assert coils == _read_devices(fake.ppuc_get_coils, fake.ppuc_free_coils, obj, CoilInfo)
+    assert lamps == _read_devices(fake.ppuc_get_lamps, fake.ppuc_free_lamps, obj, LampInfo)
+    assert switches == _read_devices(fake.ppuc_get_switches, fake.ppuc_free_switches, obj, SwitchInfo)
+    assert switches[0]['description'] == "OUTHOLE"
+
+    # Ein weiterer Start blendet nur den Snapshot ein
+    monkeypatch.setattr(ppuc_config, 'compile_configuration', None)
+    other = PPUC(backend=fake)
+    other.load_configuration(ELEKTRA)
+    assert other.get_coils() == coils
+
+
+def test_inventory_without_pyyaml(monkeypatch):
+    import sys
+    from ppuc_fake import FakeLibrary
+    from ppuc_wrapper import PPUC
+
+    fake = FakeLibrary()
+    ppuc = PPUC(backend=fake)
+    ppuc.load_configuration(ELEKTRA)
+    # Ohne PyYAML und ohne Snapshot im Cache: Inventar aus der Bibliothek
+    monkeypatch.setitem(sys.modules, 'yaml', None)
+    calls = _count_calls(monkeypatch, fake, ('ppuc_get_switches',))
+    assert len(ppuc.get_switches()) == len(fake.instance().switches)
+    assert calls == ['ppuc_get_switches']
@@ -0,0 +1,33 @@
+from ppuc_wrapper import DeviceIndex, SwitchInfo
+
+
+def _switches(count, description="Target {}"):
+    return [SwitchInfo(1, i % 16, i, description.format(i)) for i in range(count)]
+
+
+def test_lookups():
+    devices = _switches(3) + [SwitchInfo(2, 0, 1, "Target 1")]
+    index = DeviceIndex(devices)
+    assert len(index) == 4
+    assert index.by_number(1) == (devices[1], devices[3])
+    assert index.by_number(99) == ()
+    assert index.by_port(1, 2) == (devices[2],)
+    assert index.by_description("Target 1") == (devices[1], devices[3])
+    assert index.by_prefix("Target") == tuple(devices)
+    assert index.by_prefix("Target 2") == (devices[2],)
+    assert index.by_prefix("") == tuple(devices)
+    assert index.by_prefix("X") == ()
+    assert index.numbers() == (0, 1, 2)
+    assert isinstance(index.by_number(0), tuple)
+
+
+def test_shared_prefix_buckets():
+    # Die Laufzeit bei vielen gemeinsamen Präfixen misst ppuc_benchmark
+    # (device_index_shared_prefix)
+    devices = _switches(20000, "Lamp {}")
+    index = DeviceIndex(devices)
+    assert len(index.by_prefix("Lamp")) == 20000
+    assert len(index.by_prefix("Lamp 1")) == 1 + 10 + 100 + 1000 + 10000
+    assert index.by_prefix("Lamp 19999") == (devices[19999],)
+    assert index.by_prefix("Lamp 1") == tuple(d for d in devices if d.description.startswith("Lamp 1"))
+    assert all(type(bucket) is tuple for bucket in index._by_prefix.values())
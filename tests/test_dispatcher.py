@@ -0,0 +1,110 @@
+import threading
+
+from ppuc_wrapper import SwitchDispatcher
+
+
+def _recorder():
+    calls = []
+    return calls, lambda number, state: calls.append((number, state))
+
+
+def test_size_from_switches(ppuc, fake):
+    fake.set_devices(switches=[(1, 0, 3, "Start"), (1, 1, 41, "Tilt")])
+    dispatcher = SwitchDispatcher(ppuc)
+    assert len(dispatcher._table) == 42 * 2
+
+
+def test_per_edge_and_both_edges(ppuc):
+    dispatcher = SwitchDispatcher(ppuc, size=8)
+    pressed, on_pressed = _recorder()
+    both, on_both = _recorder()
+    dispatcher.on(3, on_pressed, state=1)
+    dispatcher.on(3, on_both)
+    dispatcher.dispatch(3, 1)
+    dispatcher.dispatch(3, 0)
+    assert pressed == [(3, 1)]
+    assert both == [(3, 1), (3, 0)]
+
+
+def test_remove(ppuc):
+    dispatcher = SwitchDispatcher(ppuc, size=8)
+    calls, handler = _recorder()
+    dispatcher.on(2, handler)
+    dispatcher.remove(2, handler, state=1)
+    dispatcher.dispatch(2, 1)
+    dispatcher.dispatch(2, 0)
+    assert calls == [(2, 0)]
+    dispatcher.remove(2, handler)
+    dispatcher.dispatch(2, 0)
+    assert calls == [(2, 0)]
+    # Nicht registrierte Nummern außerhalb der Tabelle sind kein Fehler
+    dispatcher.remove(100, handler)
+
+
+def test_table_grows_past_size(ppuc):
+    dispatcher = SwitchDispatcher(ppuc, size=4)
+    table = dispatcher._table
+    calls, handler = _recorder()
+    dispatcher.on(50, handler, state=0)
+    assert dispatcher._table is table
+    assert len(table) == 51 * 2
+    dispatcher.dispatch(50, 0)
+    assert calls == [(50, 0)]
+
+
+def test_default_handler(ppuc):
+    dispatcher = SwitchDispatcher(ppuc, size=4)
+    defaults, on_default = _recorder()
+    calls, handler = _recorder()
+    dispatcher.set_default_handler(on_default)
+    dispatcher.on(1, handler)
+    dispatcher.dispatch(1, 1)
+    dispatcher.dispatch(2, 1)
+    dispatcher.dispatch(500, 0)
+    assert calls == [(1, 1)]
+    assert defaults == [(2, 1), (500, 0)]
+    dispatcher.set_default_handler(None)
+    dispatcher.dispatch(2, 1)
+    assert defaults == [(2, 1), (500, 0)]
+
+
+def test_handler_exception_does_not_stop_others(ppuc, capsys):
+    dispatcher = SwitchDispatcher(ppuc, size=4)
+    calls, handler = _recorder()
+
+    def broken(number, state):
+        raise RuntimeError("kaputt")
+
+    dispatcher.on(1, broken)
+    dispatcher.on(1, handler)
+    dispatcher.dispatch(1, 1)
+    assert calls == [(1, 1)]
+    assert "kaputt" in capsys.readouterr().out
+
+
+def test_thread_dispatches_and_stops_its_pump(ppuc, fake):
+    dispatcher = SwitchDispatcher(ppuc, size=8)
+    done = threading.Event()
+    calls = []
+
+    def handler(number, state):
+        calls.append((number, state))
+        if len(calls) == 3:
+            done.set()
+
+    dispatcher.set_default_handler(handler)
+    dispatcher.start()
+    assert ppuc._switch_pump_running
+    fake.push_switch_states([(1, 1), (2, 1), (1, 0)])
+    assert done.wait(2.0)
+    dispatcher.stop()
+    assert calls == [(1, 1), (2, 1), (1, 0)]
+    assert not ppuc._switch_pump_running
+
+
+def test_stop_keeps_pump_started_elsewhere(ppuc):
+    ppuc.start_switch_pump()
+    dispatcher = SwitchDispatcher(ppuc, size=8)
+    dispatcher.start()
+    dispatcher.stop()
+    assert ppuc._switch_pump_running
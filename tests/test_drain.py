@@ -0,0 +1,46 @@
+import array
+
+import ppuc_benchmark
+
+
+def test_drain_direct(ppuc, fake):
+    fake.push_switch_states([(1, 1), (2, 0), (3, 1)])
+    buf = array.array('i', bytes(8 * 2))
+    assert ppuc.drain_switch_states(buf) == 2
+    assert buf.tolist() == [1, 1, 2, 0]
+    assert ppuc.drain_switch_states(buf) == 1
+    assert buf.tolist()[:2] == [3, 1]
+    assert ppuc.drain_switch_states(buf) == 0
+    assert ppuc.switch_events_read == 3
+
+
+def test_drain_bytearray(ppuc, fake):
+    fake.push_switch_states([(7, 1)])
+    buf = bytearray(8 * 4)
+    assert ppuc.drain_switch_states(buf) == 1
+    assert array.array('i', bytes(buf[:8])).tolist() == [7, 1]
+
+
+def test_drain_from_pump_queue(ppuc, fake):
+    fake.push_switch_states([(4, 1), (4, 0)])
+    # Die Pumpe liest beide Ereignisse in einem Durchgang in ihre Queue
+    assert ppuc.wait_next_switch_state(1.0) == (4, 1)
+    buf = array.array('i', bytes(8 * 4))
+    assert ppuc.drain_switch_states(buf) == 1
+    assert buf.tolist()[:2] == [4, 0]
+
+
+def test_expected_faster_pairs_are_benchmarked():
+    # Die Zeiten selbst prüft nur der Benchmark-Lauf (ppuc_benchmark.py),
+    # hier nur, dass jedes Paar gemessen und verglichen wird
+    names = [name for pair in ppuc_benchmark.EXPECTED_FASTER for name in pair]
+    results = ppuc_benchmark.run_benchmarks('fake', repeat=1, names=names)
+    assert set(results) == set(names)
+    rows = ppuc_benchmark.check_expected_faster(results)
+    assert len(rows) == len(ppuc_benchmark.EXPECTED_FASTER)
+
+
+def test_check_expected_faster():
+    fast, slow = ppuc_benchmark.EXPECTED_FASTER[0]
+    assert ppuc_benchmark.check_expected_faster({fast: 1.0, slow: 2.0}) == [(fast, slow, 1.0, 2.0, True)]
+    assert ppuc_benchmark.check_expected_faster({fast: 3.0, slow: 2.0}) == [(fast, slow, 3.0, 2.0, False)]
@@ -0,0 +1,49 @@
+import array
+import os
+
+from ppuc_fake import FakeLibrary
+from ppuc_journal import JOURNAL_SWITCH, JournalBackend, JournalReader, JournalWriter
+from ppuc_wrapper import PPUC
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ELEKTRA = os.path.join(ROOT, "elektra.yml")
+
+
+def test_load_configuration_uses_private_cache(tmp_path, monkeypatch):
+    home_cache = tmp_path / "home-cache"
+    monkeypatch.setenv('XDG_CACHE_HOME', str(home_cache))
+    fake = FakeLibrary()
+    ppuc = PPUC(backend=fake)
+    ppuc.load_configuration(ELEKTRA)
+    # Der Fake selbst schreibt nicht in den Cache des Benutzers (das
+    # Inventar von get_switches() legt dort gewollt einen Snapshot an)
+    assert not home_cache.exists()
+    assert fake.instance().switches
+    cache_dir = fake.cache_dir
+    assert any(name.endswith(".ppucc") for name in os.listdir(cache_dir))
+    del ppuc, fake
+    assert not os.path.exists(cache_dir)
+
+
+def test_load_configuration_injected_cache(tmp_path):
+    fake = FakeLibrary(cache_dir=str(tmp_path))
+    PPUC(backend=fake).load_configuration(ELEKTRA)
+    assert any(name.endswith(".ppucc") for name in os.listdir(tmp_path))
+
+
+def test_no_raw_binding_in_fake():
+    assert not hasattr(FakeLibrary(), 'ppuc_get_next_switch_state_raw')
+
+
+def test_drain_goes_through_recording_backend(tmp_path):
+    path = str(tmp_path / "spiel.ppj")
+    fake = FakeLibrary()
+    with JournalWriter(path) as journal:
+        ppuc = PPUC(backend=JournalBackend(journal, fake))
+        fake.push_switch_states([(1, 1), (2, 0), (3, 1)])
+        buf = array.array('i', bytes(8 * 8))
+        assert ppuc.drain_switch_states(buf) == 3
+        assert buf.tolist()[:6] == [1, 1, 2, 0, 3, 1]
+    with JournalReader(path) as reader:
+        switches = [(number, state) for _, kind, number, state in reader.records() if kind == JOURNAL_SWITCH]
+    assert switches == [(1, 1), (2, 0), (3, 1)]
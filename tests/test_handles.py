@@ -0,0 +1,71 @@
+import pytest
+
+from ppuc_wrapper import OutputHandle
+
+
+@pytest.fixture
+def devices(ppuc, fake):
+    fake.set_devices(coils=[(1, 2, 0, 78, "Flipper"), (1, 3, 0, 79, "Doppelt"), (1, 4, 0, 80, "Doppelt")],
+                     lamps=[(1, 0, 0, 21, "8K-BONUS"), (1, 1, 0, 21, "8K-BONUS")])
+    return fake.instance()
+
+
+def test_unknown_description(ppuc, devices):
+    with pytest.raises(KeyError):
+        ppuc.lamp("GIBT ES NICHT")
+    with pytest.raises(KeyError):
+        # Lampen und Spulen werden getrennt aufgelöst
+        ppuc.coil("8K-BONUS")
+
+
+def test_ambiguous_description(ppuc, devices):
+    with pytest.raises(ValueError):
+        ppuc.coil("Doppelt")
+    # Mehrere LEDs mit derselben Nummer sind eine Lampe
+    assert ppuc.lamp("8K-BONUS").number == 21
+
+
+def test_handles_cached(ppuc, devices):
+    lamp = ppuc.lamp("8K-BONUS")
+    assert isinstance(lamp, OutputHandle)
+    assert ppuc.lamp("8K-BONUS") is lamp
+    assert ppuc.coil("Flipper") is not ppuc.lamp("8K-BONUS")
+    assert repr(lamp) == "OutputHandle(number=21, description='8K-BONUS')"
+
+
+def test_shadow_and_counters(ppuc, devices):
+    lamp = ppuc.lamp("8K-BONUS")
+    lamp.on()
+    assert ppuc.get_lamp_state(21) == 1
+    lamp.on()
+    lamp.off()
+    assert ppuc.get_lamp_state(21) == 0
+    stats = ppuc.get_output_stats()
+    assert stats['lamp_writes'] == 2
+    assert stats['suppressed_writes'] == 1
+    assert devices.lamp_writes == 2
+    # Handle und Methode teilen sich den Schatten
+    ppuc.set_lamp_state(21, 0)
+    assert devices.lamp_writes == 2
+    ppuc.set_lamp_state(21, 7)
+    lamp.set(7)
+    assert devices.lamp_writes == 3
+
+    coil = ppuc.coil("Flipper")
+    coil.on()
+    coil.off()
+    assert ppuc.get_solenoid_state(78) == 0
+    assert ppuc.get_output_stats()['solenoid_writes'] == 2
+    ppuc.invalidate_output_states()
+    assert ppuc.get_solenoid_state(78) is None
+
+
+def test_handles_follow_backend(ppuc, fake, devices):
+    lamp = ppuc.lamp("8K-BONUS")
+    calls = []
+    ppuc._lamp_native[0] = lambda obj, number, state: calls.append((number, state))
+    lamp.on()
+    assert calls == [(21, 1)]
+    ppuc._rebuild_lib()
+    lamp.off()
+    assert devices.lamps[21] == 0
@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "elektra.yml")
+
+
+def test_records_are_key_compatible(ppuc, fake):
+    fake.set_devices(coils=[(1, 2, 0, 78, "Flipper")], lamps=[(1, 0, 0, 21, "8K-BONUS")],
+                     switches=[(0, 4, 5, "FLIPPER BUTTON LEFT")])
+    coil, = ppuc.get_coils()
+    lamp, = ppuc.get_lamps()
+    switch, = ppuc.get_switches()
+    # Zugriff wie in ppuc_lamp_test01.py und ppuc_switch_monitor.py
+    assert (coil['number'], coil['board'], coil['port'], coil['type'], coil['description']) == \
+        (78, 1, 2, 0, "Flipper")
+    assert (lamp['number'], lamp['description'], lamp['type']) == (21, "8K-BONUS", 0)
+    assert (switch['number'], switch['board'], switch['port']) == (5, 0, 4)
+    assert switch.as_dict() == {'board': 0, 'port': 4, 'number': 5, 'description': "FLIPPER BUTTON LEFT"}
+    with pytest.raises(KeyError):
+        switch['type']
+    with pytest.raises(AttributeError):
+        switch.number = 6
+
+
+def test_inventory_cached(ppuc, fake):
+    fake.set_devices(lamps=[(1, 0, 0, 21, "8K-BONUS")])
+    lamps = ppuc.get_lamps()
+    fake.set_devices(lamps=[(1, 0, 0, 22, "ANDERE")])
+    assert ppuc.get_lamps() is lamps
+    assert fake.outstanding_lists == 0
+
+
+def test_set_rom_invalidates(ppuc, fake):
+    fake.set_devices(lamps=[(1, 0, 0, 21, "8K-BONUS")], switches=[(0, 1, 3, "Start")])
+    lamp_index = ppuc.get_lamp_index()
+    switches = ppuc.get_switches()
+    handle = ppuc.lamp("8K-BONUS")
+    fake.set_devices(lamps=[(1, 0, 0, 22, "8K-BONUS")], switches=[(0, 1, 4, "Start")])
+    ppuc.set_rom("el_l4")
+    assert ppuc.get_lamp_index() is not lamp_index
+    assert ppuc.get_switches() is not switches
+    assert [switch['number'] for switch in ppuc.get_switches()] == [4]
+    new_handle = ppuc.lamp("8K-BONUS")
+    assert new_handle is not handle
+    assert new_handle.number == 22
+
+
+def test_load_configuration_invalidates(ppuc, fake):
+    fake.set_devices(coils=[(1, 2, 0, 250, "Flipper")], switches=[(0, 1, 3, "Start")])
+    coil_index = ppuc.get_coil_index()
+    assert [coil['number'] for coil in ppuc.get_coils()] == [250]
+    ppuc.load_configuration(CONFIG)
+    assert ppuc.get_coil_index() is not coil_index
+    coils = ppuc.get_coils()
+    assert 250 not in [coil['number'] for coil in coils]
+    assert len(coils) == len(fake.instance().coils)
+    switches = ppuc.get_switches()
+    assert switches[0]['description'] == "OUTHOLE"
+    with pytest.raises(KeyError):
+        ppuc.coil("Flipper")
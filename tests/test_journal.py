@@ -0,0 +1,175 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from ppuc_fake import FakeLibrary
+from ppuc_journal import (
+    JOURNAL_LAMP, JOURNAL_SOLENOID, JOURNAL_SWITCH, JournalBackend, JournalReader, JournalWriter,
+    ReplayBackend,
+)
+from ppuc_wrapper import PPUC
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _record(path):
+    fake = FakeLibrary()
+    with JournalWriter(path) as journal:
+        ppuc = PPUC(backend=JournalBackend(journal, fake))
+        fake.push_switch_states([(5, 1), (6, 1), (5, 0)])
+        while (event := ppuc.get_next_switch_state()) is not None:
+            number, state = event
+            ppuc.set_lamp_state(number, state)
+        ppuc.set_solenoid_state(78, 1)
+
+
+def test_record_and_replay(tmp_path):
+    path = str(tmp_path / "spiel.ppj")
+    _record(path)
+    with JournalReader(path) as reader:
+        kinds = [kind for _, kind, _, _ in reader.records()]
+    assert kinds.count(JOURNAL_SWITCH) == 3
+    assert kinds.count(JOURNAL_LAMP) == 3
+    assert kinds.count(JOURNAL_SOLENOID) == 1
+
+    replay = ReplayBackend(path, speed=None)
+    ppuc = PPUC(backend=replay)
+    while (event := ppuc.get_next_switch_state()) is not None:
+        number, state = event
+        ppuc.set_lamp_state(number, state)
+    ppuc.set_solenoid_state(78, 1)
+    assert replay.finished
+    assert replay.commands == replay.expected_commands()
+    assert replay.instance().lamp_writes == 3
+
+
+def test_concurrent_writes_are_time_ordered(tmp_path):
+    path = str(tmp_path / "threads.ppj")
+    with JournalWriter(path) as journal:
+        def writer(number):
+            for _ in range(5000):
+                journal.write(JOURNAL_SWITCH, number, 1)
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    with JournalReader(path) as reader:
+        times = [t_ns for t_ns, _, _, _ in reader.records()]
+    assert len(times) == 20000
+    assert times == sorted(times)
+
+
+def test_import_does_not_load_fake():
+    code = "import sys, ppuc_journal; print('ppuc_fake' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
+
+
+def test_flush_from_several_threads_keeps_order(tmp_path):
+    path = str(tmp_path / "flush.ppj")
+    stop = threading.Event()
+    with JournalWriter(path, chunk_records=16, fsync_interval=0.0001) as journal:
+        def flusher():
+            while not stop.is_set():
+                journal.flush(sync=False)
+
+        threads = [threading.Thread(target=flusher) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for i in range(20000):
+            journal.write(JOURNAL_SWITCH, i & 0xFF, 1)
+        stop.set()
+        for thread in threads:
+            thread.join()
+    with JournalReader(path) as reader:
+        times = [t_ns for t_ns, _, _, _ in reader.records()]
+        index_times, positions = reader._index
+    assert len(times) == 20000
+    assert times == sorted(times)
+    assert positions == list(range(0, 20000, 16))
+    assert index_times == sorted(index_times)
+
+
+def _write_timed(path, times, chunk_records=4):
+    with JournalWriter(path, chunk_records=chunk_records) as journal:
+        for i, t_ns in enumerate(times):
+            journal.write(JOURNAL_SWITCH, i, 1, t_ns=journal.start_ns + t_ns)
+
+
+def _check_windows(reader, times):
+    assert len(reader) == len(times)
+    assert reader.duration_ns == times[-1]
+    assert reader.find(0) == 0
+    assert reader.find(times[-1] + 1) == len(times)
+    for t_ns in times:
+        assert reader.find(t_ns) == times.index(t_ns)
+        assert reader.find(t_ns + 1) == sum(1 for t in times if t <= t_ns)
+    start, end = times[5], times[15]
+    window = [t_ns for t_ns, _, _, _ in reader.records(start, end)]
+    assert window == [t for t in times if start <= t < end]
+    assert [r[0] for r in reader.records(end_ns=times[3])] == times[:3]
+
+
+def test_find_and_windows_through_index(tmp_path):
+    path = str(tmp_path / "index.ppj")
+    # Mehrere Einträge mit gleicher Zeit, auch über Chunk-Grenzen hinweg
+    times = [i * 1000 for i in range(10)] + [10000] * 6 + [20000 + i for i in range(9)]
+    _write_timed(path, times)
+    with JournalReader(path) as reader:
+        assert reader._index[1] == list(range(0, len(times), 4))
+        _check_windows(reader, times)
+
+
+def test_journal_without_index_file(tmp_path):
+    path = str(tmp_path / "ohne-index.ppj")
+    times = [i * 500 for i in range(25)]
+    _write_timed(path, times)
+    os.unlink(path + ".idx")
+    with JournalReader(path) as reader:
+        # Index aus dem Journal selbst erzeugt
+        assert reader._index == ([times[i] for i in range(0, 25, 4)], list(range(0, 25, 4)))
+        _check_windows(reader, times)
+
+
+def test_replay_in_original_tempo(tmp_path):
+    path = str(tmp_path / "tempo.ppj")
+    with JournalWriter(path) as journal:
+        for number, t_ms in ((1, 100), (2, 150), (3, 250)):
+            journal.write(JOURNAL_SWITCH, number, 1, t_ns=journal.start_ns + t_ms * 1_000_000)
+    replay = ReplayBackend(path, speed=1.0)
+    ppuc = PPUC(backend=replay)
+    replay.start()
+    start = time.monotonic()
+    arrivals = []
+    while not replay.finished and time.monotonic() - start < 2.0:
+        event = ppuc.get_next_switch_state()
+        if event is None:
+            time.sleep(0.001)
+            continue
+        arrivals.append((event[0], time.monotonic() - start))
+    assert [number for number, _ in arrivals] == [1, 2, 3]
+    # Abstände ab dem ersten Ereignis wie aufgezeichnet (0, 50, 150 ms)
+    offsets = [t - arrivals[0][1] for _, t in arrivals]
+    assert arrivals[0][1] < 0.04
+    assert offsets[1] >= 0.045
+    assert offsets[2] >= 0.145
+    assert offsets[2] < 1.0
+
+
+def test_replay_speed_scales_tempo(tmp_path):
+    path = str(tmp_path / "speed.ppj")
+    with JournalWriter(path) as journal:
+        journal.write(JOURNAL_SWITCH, 1, 1, t_ns=journal.start_ns)
+        journal.write(JOURNAL_SWITCH, 2, 1, t_ns=journal.start_ns + 400_000_000)
+    replay = ReplayBackend(path, speed=4.0)
+    ppuc = PPUC(backend=replay)
+    replay.start()
+    assert ppuc.get_next_switch_state() == (1, 1)
+    # Bei vierfachem Tempo nach etwa 100 ms fällig, nicht sofort
+    assert ppuc.get_next_switch_state() is None
+    time.sleep(0.12)
+    assert ppuc.get_next_switch_state() == (2, 1)
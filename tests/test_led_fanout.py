@@ -0,0 +1,63 @@
+from array import array
+import os
+
+import pytest
+
+import ppuc_config
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(params=["elektra.yml", "elektra_0.yml"])
+def fanout(request, tmp_path):
+    compiled = ppuc_config.load_compiled_configuration(os.path.join(ROOT, request.param), str(tmp_path))
+    yield compiled.led_fanout(ppuc_config.LED_TYPE_LAMP)
+    compiled.close()
+
+
+def _states():
+    # Unbekannt (Schatten), aus, an und Helligkeitswerte gemischt
+    return array('q', [-(1 << 63) if i % 5 == 0 else (i % 3) * 100 for i in range(300)])
+
+
+def test_render_numpy_matches_loop(fanout):
+    if fanout._np is None:
+        pytest.skip("NumPy nicht installiert")
+    states = _states()
+    vectorized = fanout.render(states)
+    numpy, fanout._np = fanout._np, None
+    try:
+        assert fanout.render(states) == vectorized
+        assert fanout.render(list(states)) == vectorized
+    finally:
+        fanout._np = numpy
+    assert fanout.render(list(states)) == vectorized
+
+
+def test_apply_numpy_matches_loop(fanout):
+    if fanout._np is None:
+        pytest.skip("NumPy nicht installiert")
+    numpy = fanout._np
+    by_loop = fanout.new_frame()
+    by_numpy = fanout.new_frame()
+    for number in range(len(fanout.offsets)):
+        for state in (1, 0, 1):
+            fanout._np = None
+            fanout.apply(by_loop, number, state)
+            fanout._np = numpy
+            fanout.apply(by_numpy, number, state)
+    assert by_loop == by_numpy
+    assert by_numpy == fanout.render([1] * len(fanout.offsets))
+
+
+def test_render_uses_shadow(ppuc, fake, tmp_path):
+    ppuc.load_configuration(os.path.join(ROOT, "elektra.yml"))
+    ppuc.get_compiled_configuration(str(tmp_path))
+    fanout = ppuc.get_compiled_configuration().led_fanout(ppuc_config.LED_TYPE_LAMP)
+    number = fanout.numbers[0]
+    assert ppuc.get_lamp_frame() == fanout.new_frame()
+    ppuc.set_lamp_state(number, 1)
+    frame = ppuc.get_lamp_frame()
+    expected = fanout.new_frame()
+    fanout.apply(expected, number, 1)
+    assert frame == expected and any(frame)
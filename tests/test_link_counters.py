@@ -0,0 +1,19 @@
+def test_link_counters_from_log(ppuc, fake):
+    ppuc.enable_link_counters()
+    fake.emit_log("Timeout")
+    fake.emit_log("Timeout")
+    fake.emit_log("Error: Lost sync")
+    fake.emit_log("irgendetwas anderes")
+    counters = ppuc.get_link_counters()
+    assert counters['timeout'] == 2
+    assert counters['lost_sync'] == 1
+    assert counters['other'] == 1
+    assert counters['rs485_error'] == 0
+
+
+def test_link_counters_connect(ppuc):
+    assert ppuc.connect()
+    ppuc.disconnect()
+    counters = ppuc.get_link_counters()
+    assert counters['connect'] == 1
+    assert counters['disconnect'] == 1
@@ -0,0 +1,91 @@
+import ctypes
+import threading
+import time
+
+from ppuc_wrapper import _LOG_LINE_SIZE, LOG_CATEGORY_LINK
+
+
+class _Blocking:
+    """Callback, der bei der ersten Auslieferung wartet, bis release() kommt."""
+
+    def __init__(self):
+        self.calls = []
+        self.entered = threading.Event()
+        self._release = threading.Event()
+
+    def __call__(self, *args):
+        self.calls.append(args)
+        self.entered.set()
+        self._release.wait(5)
+
+    def release(self):
+        self._release.set()
+
+
+def test_vsnprintf_formats_real_arguments(ppuc, fake, log_emitter):
+    lines = []
+    ppuc.set_log_message_callback(lines.append)
+    fake.emit_log("Timeout on board %d: %s (%.1f V)", emitter=log_emitter,
+                  args=(ctypes.c_int(3), ctypes.c_char_p(b"Port 7"), ctypes.c_double(4.5)))
+    fake.emit_log("Found i/o board %d\n", emitter=log_emitter, args=(ctypes.c_int(12),))
+    fake.emit_log("%s", emitter=log_emitter, args=(ctypes.c_char_p(b"x" * 3000),))
+    ppuc.set_log_message_callback(None)
+    assert lines[:2] == ["Timeout on board 3: Port 7 (4.5 V)", "Found i/o board 12"]
+    # Zu lange Zeilen werden auf den Puffer gekürzt
+    assert lines[2] == "x" * (_LOG_LINE_SIZE - 1)
+    # Die Link-Zähler erkennen die Meldung am Formatstring
+    assert ppuc.get_link_counters()['timeout'] == 1
+
+
+def test_filter_uses_format_string(ppuc, fake, log_emitter):
+    lines = []
+    ppuc.set_log_message_callback(lines.append)
+    ppuc.set_log_rate_limit(0.001, 1, LOG_CATEGORY_LINK)
+    for board in range(3):
+        fake.emit_log("Timeout on board %d", emitter=log_emitter, args=(ctypes.c_int(board),))
+    ppuc.set_log_message_callback(None)
+    assert lines == ["Timeout on board 0"]
+
+
+def test_batch_delivery(ppuc, fake):
+    callback = _Blocking()
+    ppuc.set_log_message_callback(callback, batch=True)
+    fake.emit_log("erste")
+    assert callback.entered.wait(5)
+    # Während der Callback läuft, sammeln sich die Zeilen für einen Aufruf
+    for i in range(3):
+        fake.emit_log(f"Zeile {i}")
+    callback.release()
+    ppuc.set_log_message_callback(None)
+    assert callback.calls == [(["erste"],), (["Zeile 0", "Zeile 1", "Zeile 2"],)]
+
+
+def test_timestamps_per_line(ppuc, fake):
+    received = []
+    ppuc.set_log_message_callback(lambda message, t_ns: received.append((message, t_ns)), timestamps=True)
+    before = time.monotonic_ns()
+    fake.emit_log("eins")
+    fake.emit_log("zwei")
+    after = time.monotonic_ns()
+    ppuc.set_log_message_callback(None)
+    assert [message for message, _ in received] == ["eins", "zwei"]
+    times = [t_ns for _, t_ns in received]
+    # Empfangszeitpunkt im Callback der Bibliothek, nicht bei der Auslieferung
+    assert before <= times[0] <= times[1] <= after
+
+
+def test_full_queue_drops_lines(ppuc, fake):
+    callback = _Blocking()
+    ppuc.set_log_message_callback(callback, queue_size=3)
+    fake.emit_log("erste")
+    assert callback.entered.wait(5)
+    for i in range(5):
+        fake.emit_log(f"Zeile {i}")
+    stats = ppuc.get_log_stats()
+    assert stats['received'] == 6
+    assert stats['queued'] == 3
+    assert stats['dropped'] == 2
+    callback.release()
+    ppuc.set_log_message_callback(None)
+    # Die Bibliothek wurde nie aufgehalten, ausgeliefert wird der Rest der Queue
+    assert [args[0] for args in callback.calls] == ["erste", "Zeile 0", "Zeile 1", "Zeile 2"]
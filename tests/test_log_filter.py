@@ -0,0 +1,54 @@
+from ppuc_wrapper import (LOG_CATEGORY_LINK, LOG_WARNING, _LOG_RULE_CACHE_SIZE,
+                          _LogFilter)
+
+
+def test_bucket_shared_by_category():
+    log_filter = _LogFilter()
+    log_filter.set_rate_limit(0.001, 2, LOG_CATEGORY_LINK)
+    assert log_filter.accept(b"Timeout on board %d")
+    assert log_filter.accept(b"Received illegal source %d")
+    # Anderer Formatstring derselben Kategorie: Bucket ist leer
+    assert not log_filter.accept(b"Received wrong stop byte %d")
+    assert not log_filter.accept(b"Timeout on board %d")
+    assert log_filter.counters[LOG_CATEGORY_LINK] == [0, 2]
+    # Andere Kategorien sind nicht begrenzt
+    assert all(log_filter.accept(b"Polling board %d") for _ in range(10))
+
+
+def test_rate_limit_with_full_rule_cache():
+    log_filter = _LogFilter()
+    log_filter.set_rate_limit(0.001, 3, LOG_CATEGORY_LINK)
+    for i in range(_LOG_RULE_CACHE_SIZE):
+        log_filter.accept(f"Zeile {i}".encode())
+    accepted = sum(log_filter.accept(f"Timeout {i}".encode()) for i in range(100))
+    assert accepted == 3
+
+
+def test_level_filters_via_callback(ppuc, fake):
+    lines = []
+    ppuc.set_log_message_callback(lines.append)
+    ppuc.set_log_level(LOG_WARNING + 1, LOG_CATEGORY_LINK)
+    fake.emit_log("Timeout")
+    fake.emit_log("Found i/o board 1")
+    # Abmelden liefert die wartenden Zeilen noch aus
+    ppuc.set_log_message_callback(None)
+    assert lines == ["Found i/o board 1"]
+    assert ppuc.get_log_stats()['filtered'] == 1
+
+
+def test_unregister_callback(ppuc, fake):
+    lines = []
+    ppuc.set_log_message_callback(lines.append)
+    fake.emit_log("Found i/o board 1")
+    delivery = ppuc._log_delivery
+    ppuc.set_log_message_callback(None)
+    assert ppuc._log_delivery is None
+    assert not delivery._thread.is_alive()
+    assert lines == ["Found i/o board 1"]
+    fake.emit_log("Found i/o board 2")
+    assert lines == ["Found i/o board 1"]
+    assert ppuc.get_log_stats()['received'] == 0
+    # Die Link-Zähler laufen ohne Auslieferung weiter
+    assert ppuc.get_link_counters()['board_found'] == 2
+    # Zweimal abmelden schadet nicht
+    ppuc.set_log_message_callback(None)
@@ -0,0 +1,153 @@
+import threading
+import time
+
+from ppuc_metrics import Histogram, TimingBackend
+from ppuc_trace import TraceBackend
+
+
+def _chain(lib):
+    """Typen der Backends von außen nach innen."""
+    chain = []
+    while isinstance(lib, (TraceBackend, TimingBackend)):
+        chain.append(type(lib))
+        lib = lib.backend
+    return chain, lib
+
+
+def test_histogram_percentiles():
+    histogram = Histogram()
+    for value in range(1, 1001):
+        histogram.record(value * 1000)
+    summary = histogram.summary()
+    assert summary['count'] == 1000
+    assert summary['min'] == 1000
+    assert summary['max'] == 1000000
+    # Relative Auflösung 2**-5
+    assert abs(summary['p50'] - 500000) <= 500000 / 32
+    assert abs(summary['p99'] - 990000) <= 990000 / 32
+
+
+def test_snapshot_and_prometheus(ppuc, fake):
+    metrics = ppuc.enable_metrics(timing_window=0)
+    try:
+        ppuc.set_lamp_state(21, 1)
+        ppuc.set_lamp_state(21, 1)
+        fake.push_switch_state(3, 1)
+        assert ppuc.get_next_switch_state() is not None
+        snapshot = metrics.snapshot()
+        assert snapshot['lamp_commands'] == 1
+        assert snapshot['suppressed_writes'] == 1
+        assert snapshot['switch_events'] == 1
+        text = metrics.render_prometheus()
+        assert 'ppuc_commands_total{kind="lamp"} 1' in text
+    finally:
+        ppuc.disable_metrics()
+
+
+def test_sampler_times_calls_and_restores_lib(ppuc, fake):
+    metrics = ppuc.enable_metrics(timing_period=0.002, timing_window=0.001)
+    try:
+        histogram = metrics.ctypes_histogram('ppuc_set_lamp_state')
+        deadline = time.monotonic() + 5
+        i = 0
+        while not histogram.count and time.monotonic() < deadline:
+            ppuc.set_lamp_state(21, i & 1)
+            i += 1
+        assert histogram.count
+    finally:
+        ppuc.disable_metrics()
+    assert ppuc.lib is fake
+
+
+def _toggle_tracing(ppuc, fake, path, rounds, stop_first):
+    for i in range(rounds):
+        trace = ppuc.enable_tracing(str(path / f"trace{i}.json"), flush_interval=10)
+        ppuc.enable_profiling(['set_lamp_state'])
+        ppuc.set_lamp_state(21, i & 1)
+        chain, base = _chain(ppuc.lib)
+        assert base is fake
+        assert TraceBackend in chain
+        if stop_first:
+            ppuc.disable_profiling()
+            ppuc.disable_tracing()
+        else:
+            ppuc.disable_tracing()
+            ppuc.disable_profiling()
+        chain, base = _chain(ppuc.lib)
+        assert base is fake
+        assert TraceBackend not in chain
+        assert trace._closed
+
+
+def _run_race(ppuc, fake, path, metrics_first):
+    errors = []
+    stop = threading.Event()
+
+    def commands():
+        # Ständige Aufrufe über self.lib, während die Kette umgebaut wird
+        try:
+            n = 0
+            while not stop.is_set():
+                ppuc.set_lamp_state(22, n & 1)
+                n += 1
+        except Exception as e:  # pragma: no cover - nur bei Fehlern
+            errors.append(e)
+
+    thread = threading.Thread(target=commands)
+    if metrics_first:
+        ppuc.enable_metrics(timing_period=0.0005, timing_window=0.0004)
+    else:
+        ppuc.enable_tracing(str(path / "first.json"), flush_interval=10)
+    thread.start()
+    try:
+        if metrics_first:
+            _toggle_tracing(ppuc, fake, path, 100, stop_first=False)
+            _toggle_tracing(ppuc, fake, path, 100, stop_first=True)
+            ppuc.disable_metrics()
+        else:
+            ppuc.enable_metrics(timing_period=0.0005, timing_window=0.0004)
+            ppuc.disable_tracing()
+            _toggle_tracing(ppuc, fake, path, 100, stop_first=True)
+            ppuc.enable_tracing(str(path / "last.json"), flush_interval=10)
+            ppuc.disable_metrics()
+            chain, base = _chain(ppuc.lib)
+            assert chain == [TraceBackend] and base is fake
+            ppuc.disable_tracing()
+    finally:
+        stop.set()
+        thread.join()
+    assert not errors
+    assert ppuc.lib is fake
+
+
+def test_tracing_toggled_while_sampling(ppuc, fake, tmp_path):
+    _run_race(ppuc, fake, tmp_path, metrics_first=True)
+
+
+def test_metrics_toggled_around_tracing(ppuc, fake, tmp_path):
+    _run_race(ppuc, fake, tmp_path, metrics_first=False)
+
+
+def test_handle_created_while_sampling_stops_timing(ppuc, fake):
+    fake.set_devices(coils=[(1, 2, 0, 78, "Flipper")])
+    metrics = ppuc.enable_metrics(timing_period=0.002, timing_window=0.001)
+    histogram = metrics.ctypes_histogram('ppuc_set_solenoid_state')
+    coil = None
+    deadline = time.monotonic() + 5
+    while coil is None and time.monotonic() < deadline:
+        # Unter dem Lock kann das Fenster nicht enden
+        with ppuc._backend_lock:
+            if ppuc._timing_metrics is metrics:
+                coil = ppuc.coil("Flipper")
+                coil.on()
+                coil.off()
+    assert coil is not None
+    assert histogram.count == 2
+    ppuc.disable_metrics()
+    assert ppuc.lib is fake
+    for _ in range(50):
+        coil.on()
+        coil.off()
+    # Nach disable_metrics() misst auch der im Fenster erzeugte Handle nicht mehr
+    assert histogram.count == 2
+    assert fake.instance().solenoid_writes == 102
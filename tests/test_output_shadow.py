@@ -0,0 +1,92 @@
+import pytest
+
+from ppuc_fake import FakeLibrary
+from ppuc_wrapper import PPUC
+
+
+@pytest.fixture
+def ppuc_devices():
+    fake = FakeLibrary()
+    ppuc = PPUC(backend=fake)
+    fake.set_devices(coils=[(1, 2, 0, 78, "Flipper")], lamps=[(1, 0, 0, 21, "8K-BONUS")])
+    return ppuc, fake.instance()
+
+
+def test_lamp_suppression_and_force(ppuc, fake):
+    instance = fake.instance()
+    ppuc.set_lamp_state(21, 1)
+    ppuc.set_lamp_state(21, 1)
+    assert instance.lamp_writes == 1
+    assert ppuc.suppressed_writes == 1
+    ppuc.set_lamp_state(21, 1, force=True)
+    assert instance.lamp_writes == 2
+
+
+def test_state_passed_through(ppuc, fake):
+    instance = fake.instance()
+    ppuc.set_lamp_state(21, 200)
+    assert instance.lamps[21] == 200
+    assert ppuc.get_lamp_state(21) == 200
+    ppuc.set_lamp_state(21, 1000)
+    assert instance.lamps[21] == 1000
+    ppuc.set_lamp_state(21, 1000)
+    assert instance.lamp_writes == 2
+    # Frühere Sperrwerte des Schattens sind gewöhnliche Zustände
+    ppuc.set_lamp_state(22, 2)
+    ppuc.set_lamp_state(22, 2)
+    assert instance.lamps[22] == 2
+    assert instance.lamp_writes == 3
+
+
+def test_solenoids_not_suppressed_by_default(ppuc, fake):
+    instance = fake.instance()
+    ppuc.set_solenoid_state(78, 1)
+    ppuc.set_solenoid_state(78, 1)
+    assert instance.solenoid_writes == 2
+    assert ppuc.get_solenoid_state(78) == 1
+    ppuc.set_write_suppression(solenoids=True)
+    ppuc.set_solenoid_state(78, 1)
+    assert instance.solenoid_writes == 2
+    ppuc.set_solenoid_state(78, 1, force=True)
+    assert instance.solenoid_writes == 3
+
+
+def test_set_lamp_states(ppuc, fake):
+    instance = fake.instance()
+    ppuc.set_lamp_states({1: 1, 2: 128})
+    ppuc.set_lamp_states([(1, 1), (2, 128)])
+    assert instance.lamp_writes == 2
+    ppuc.set_lamp_states([0, 1, 128], force=True)
+    assert instance.lamp_writes == 5
+    assert instance.lamps == {0: 0, 1: 1, 2: 128}
+
+
+def test_invalidate_output_states(ppuc, fake):
+    ppuc.set_lamp_state(21, 1)
+    ppuc.invalidate_output_states()
+    assert ppuc.get_lamp_state(21) is None
+    ppuc.set_lamp_state(21, 1)
+    assert fake.instance().lamp_writes == 2
+
+
+def test_handles(ppuc_devices):
+    ppuc, instance = ppuc_devices
+    lamp = ppuc.lamp("8K-BONUS")
+    lamp.set(150)
+    lamp.set(150)
+    assert instance.lamps[21] == 150
+    assert instance.lamp_writes == 1
+    lamp.on()
+    lamp.on()
+    lamp.on(force=True)
+    assert instance.lamp_writes == 3
+
+    coil = ppuc.coil("Flipper")
+    coil.on()
+    coil.on()
+    assert instance.solenoid_writes == 2
+    ppuc.set_write_suppression(solenoids=True)
+    coil.on()
+    assert instance.solenoid_writes == 2
+    coil.set(1, force=True)
+    assert instance.solenoid_writes == 3
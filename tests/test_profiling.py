@@ -0,0 +1,15 @@
+from ppuc_wrapper import PPUC
+
+
+def test_profiling_records_and_disappears(ppuc):
+    ppuc.enable_profiling(['set_lamp_state', 'get_switch_queue_stats'])
+    assert 'set_lamp_state' in vars(ppuc)
+    ppuc.set_lamp_state(21, 1)
+    ppuc.set_lamp_state(21, 0)
+    profile = ppuc.get_profile()
+    assert profile['set_lamp_state']['count'] == 2
+    assert 'get_switch_queue_stats' not in profile
+    ppuc.disable_profiling()
+    assert 'set_lamp_state' not in vars(ppuc)
+    assert ppuc.set_lamp_state.__func__ is PPUC.set_lamp_state
+    assert ppuc.get_profile() == {}
@@ -0,0 +1,83 @@
+import os
+import select
+import time
+
+import pytest
+
+import ppuc_simulator
+from ppuc_simulator import (
+    BoardSimulator, EVENT_NULL, EVENT_POLL_EVENTS, EVENT_PONG, EVENT_SOURCE_SWITCH, encode_event,
+)
+from ppuc_wrapper import PPUC, PPUCLibraryError
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ELEKTRA = os.path.join(ROOT, "elektra.yml")
+
+
+def _read_exactly(fd, size, timeout=2.0):
+    data = b''
+    deadline = time.monotonic() + timeout
+    while len(data) < size:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+            break
+        data += os.read(fd, size - len(data))
+    return data
+
+
+@pytest.fixture
+def simulator():
+    simulator = BoardSimulator(boards=[0], switches={5: 0, 6: 0})
+    simulator.start()
+    fd = os.open(simulator.port, os.O_RDWR | os.O_NOCTTY)
+    yield simulator, fd
+    os.close(fd)
+    simulator.stop()
+
+
+def test_poll_answer(simulator):
+    simulator, fd = simulator
+    simulator.set_switch(5, 1)
+    os.write(fd, encode_event(EVENT_POLL_EVENTS, 1, 0))
+    expected = (encode_event(EVENT_PONG, 1, 0) + encode_event(EVENT_SOURCE_SWITCH, 5, 1)
+                + encode_event(EVENT_NULL, 1, 0))
+    assert _read_exactly(fd, len(expected)) == expected
+    assert simulator.switch_events_sent == 1
+
+
+def test_partial_writes_are_completed(simulator, monkeypatch):
+    simulator, fd = simulator
+    real_write = os.write
+
+    def short_write(target, data):
+        # Wie ein voller pty-Puffer: höchstens 3 Bytes pro Aufruf
+        return real_write(target, bytes(data[:3]))
+
+    monkeypatch.setattr(ppuc_simulator.os, 'write', short_write)
+    for number in (5, 6):
+        simulator.set_switch(number, 1)
+    real_write(fd, encode_event(EVENT_POLL_EVENTS, 1, 0))
+    expected = (encode_event(EVENT_PONG, 1, 0) + encode_event(EVENT_SOURCE_SWITCH, 5, 1)
+                + encode_event(EVENT_SOURCE_SWITCH, 6, 1) + encode_event(EVENT_NULL, 1, 0))
+    assert _read_exactly(fd, len(expected)) == expected
+
+
+def test_real_library_receives_switch_event(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+    try:
+        ppuc = PPUC()
+    except PPUCLibraryError as e:
+        pytest.skip(f"libppuc_wrapper.so nicht ladbar: {e}")
+
+    with BoardSimulator(ELEKTRA) as simulator:
+        ppuc.load_configuration(ELEKTRA)
+        ppuc.set_serial(simulator.port)
+        assert ppuc.connect()
+        ppuc.start_updates()
+        try:
+            number = sorted(simulator.switch_boards)[0]
+            simulator.set_switch(number, 1)
+            assert ppuc.wait_next_switch_state(5.0) == (number, 1)
+        finally:
+            ppuc.stop_updates()
+            ppuc.disconnect()
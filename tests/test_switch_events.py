@@ -0,0 +1,70 @@
+import array
+import time
+
+
+def _wait_queued(ppuc, count, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while ppuc.get_switch_queue_stats()['queued'] < count:
+        assert time.monotonic() < deadline, "Pumpe hat die Ereignisse nicht gelesen"
+        time.sleep(0.001)
+
+
+def test_event_stamped_on_direct_read(ppuc, fake):
+    fake.push_switch_states([(1, 1), (2, 0)])
+    before = time.monotonic_ns()
+    first = ppuc.get_next_switch_event()
+    second = ppuc.get_next_switch_event()
+    after = time.monotonic_ns()
+    assert first[:2] == (1, 1) and second[:2] == (2, 0)
+    assert before <= first[2] <= second[2] <= after
+    assert ppuc.get_next_switch_event() is None
+
+
+def test_event_stamped_at_pump_read(ppuc, fake):
+    ppuc.start_switch_pump()
+    before = time.monotonic_ns()
+    fake.push_switch_states([(3, 1), (3, 0), (4, 1)])
+    _wait_queued(ppuc, 3)
+    read = time.monotonic_ns()
+    time.sleep(0.05)
+    events = [ppuc.get_next_switch_event(), ppuc.wait_next_switch_event(1.0), ppuc.get_next_switch_event()]
+    assert [event[:2] for event in events] == [(3, 1), (3, 0), (4, 1)]
+    stamps = [event[2] for event in events]
+    assert stamps == sorted(stamps)
+    # Zeitpunkt des Auslesens durch die Pumpe, nicht der Entnahme
+    assert before <= stamps[0] and stamps[-1] <= read
+
+
+def test_queue_age(ppuc, fake):
+    ppuc.start_switch_pump()
+    assert ppuc.get_switch_queue_age() == 0
+    fake.push_switch_states([(5, 1), (5, 0)])
+    _wait_queued(ppuc, 2)
+    time.sleep(0.05)
+    assert ppuc.get_switch_queue_age() >= 50_000_000
+    assert ppuc.get_next_switch_state() == (5, 1)
+    assert ppuc.get_next_switch_state() == (5, 0)
+    stats = ppuc.get_switch_queue_stats()
+    assert stats['events'] == 2
+    assert stats['queued'] == 0
+    assert stats['age_max_ns'] >= 50_000_000
+    assert stats['age_mean_ns'] >= 50_000_000
+    assert stats['age_last_ns'] >= 50_000_000
+    assert stats['high_water'] == 2
+    assert stats['age_oldest_waiting_ns'] == 0
+
+    ppuc.reset_switch_queue_stats()
+    stats = ppuc.get_switch_queue_stats()
+    assert (stats['events'], stats['age_max_ns'], stats['age_mean_ns'], stats['age_last_ns'],
+            stats['high_water']) == (0, 0, 0, 0, 0)
+
+
+def test_queue_age_counts_drained_events(ppuc, fake):
+    ppuc.start_switch_pump()
+    fake.push_switch_states([(6, 1), (6, 0), (7, 1)])
+    _wait_queued(ppuc, 3)
+    time.sleep(0.02)
+    assert ppuc.drain_switch_states(array.array('i', bytes(8 * 4))) == 3
+    stats = ppuc.get_switch_queue_stats()
+    assert stats['events'] == 3
+    assert stats['age_max_ns'] >= 20_000_000
@@ -0,0 +1,46 @@
+import time
+
+import pytest
+
+from ppuc_fake import FakeLibrary
+from ppuc_wrapper import PPUC
+
+
+class CountingFake(FakeLibrary):
+    """Zählt die Abfragen der Switch-Pumpe."""
+
+    def __init__(self):
+        super().__init__()
+        self.polls = 0
+
+    def ppuc_get_next_switch_state(self, obj):
+        self.polls += 1
+        return super().ppuc_get_next_switch_state(obj)
+
+
+def test_wait_next_switch_state(ppuc, fake):
+    fake.push_switch_states([(5, 1), (5, 0)])
+    assert ppuc.wait_next_switch_state(1.0) == (5, 1)
+    assert ppuc.wait_next_switch_state(1.0) == (5, 0)
+    assert ppuc.wait_next_switch_state(0.01) is None
+
+
+def test_max_sleep_limits_idle_polls():
+    fake = CountingFake()
+    ppuc = PPUC(backend=fake)
+    try:
+        ppuc.start_switch_pump(max_sleep=0.05)
+        time.sleep(0.3)
+        fake.polls = 0
+        time.sleep(0.5)
+        # 1 ms Standard wären ca. 500 Abfragen
+        assert fake.polls <= 15
+        fake.push_switch_state(3, 1)
+        assert ppuc.wait_next_switch_state(1.0) == (3, 1)
+    finally:
+        ppuc.stop_switch_pump()
+
+
+def test_max_sleep_below_minimum_rejected(ppuc):
+    with pytest.raises(ValueError):
+        ppuc.start_switch_pump(max_sleep=0.0)
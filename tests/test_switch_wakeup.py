@@ -0,0 +1,46 @@
+import select
+import threading
+import time
+
+
+def _readable(fd, timeout=1.0):
+    return bool(select.select([fd], [], [], timeout)[0])
+
+
+def test_wakeup_fd_signals_every_batch(ppuc, fake):
+    fd = ppuc.get_switch_wakeup_fd()
+    fake.push_switch_state(1, 1)
+    assert _readable(fd)
+    ppuc.clear_switch_wakeup()
+    # Das erste Ereignis liegt noch in der Queue, das zweite muss trotzdem wecken
+    fake.push_switch_state(2, 1)
+    assert _readable(fd)
+    ppuc.clear_switch_wakeup()
+    assert ppuc.get_next_switch_state() == (1, 1)
+    assert ppuc.get_next_switch_state() == (2, 1)
+    assert not _readable(fd, 0.05)
+
+
+def test_wakeup_fd_no_lost_events(ppuc, fake):
+    fd = ppuc.get_switch_wakeup_fd()
+    count = 2000
+    received = []
+
+    def reader():
+        while len(received) < count:
+            if not _readable(fd, 2.0):
+                return
+            ppuc.clear_switch_wakeup()
+            event = ppuc.get_next_switch_state()
+            while event is not None:
+                received.append(event)
+                event = ppuc.get_next_switch_state()
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    for i in range(count):
+        fake.push_switch_state(i, 1)
+        if i % 50 == 0:
+            time.sleep(0.001)
+    thread.join(10.0)
+    assert [number for number, _ in received] == list(range(count))
@@ -0,0 +1,87 @@
+import json
+import time
+
+from ppuc_trace import TRACK_LAMP, TRACK_LOG, TRACK_SWITCH, TraceWriter
+
+
+def _events(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_trace_records_commands_and_switches(ppuc, fake, tmp_path):
+    path = tmp_path / "trace.json"
+    trace = ppuc.enable_tracing(str(path))
+    ppuc.set_lamp_state(21, 1)
+    fake.push_switch_state(3, 1)
+    assert ppuc.get_next_switch_state() is not None
+    ppuc.disable_tracing()
+    events = [event for event in _events(path) if event['ph'] != 'M']
+    assert [(event['tid'], event['args']) for event in events] == [
+        (TRACK_LAMP, {'number': 21, 'state': 1}),
+        (TRACK_SWITCH, {'number': 3, 'state': 1}),
+    ]
+    assert trace.written == 2
+    assert ppuc.lib is fake
+
+
+def test_log_lines_stamped_on_receipt(ppuc, fake, tmp_path):
+    path = tmp_path / "trace.json"
+    trace = ppuc.enable_tracing(str(path))
+    start_ns = trace.start_ns
+    received = []
+    for number in range(3):
+        before = time.monotonic_ns()
+        fake.emit_log(f"Found i/o board {number}")
+        received.append((before, time.monotonic_ns()))
+        time.sleep(0.002)
+    ppuc.disable_tracing()
+    log = [event for event in _events(path) if event['tid'] == TRACK_LOG and event['ph'] == 'i']
+    assert [event['name'] for event in log] == [f"Found i/o board {n}" for n in range(3)]
+    for event, (before, after) in zip(log, received):
+        # Zeitpunkt des Empfangs, nicht der gebündelten Auslieferung
+        assert (before - start_ns) / 1000 <= event['ts'] <= (after - start_ns) / 1000
+    assert trace.written == 3
+
+
+def test_written_excludes_metadata(tmp_path):
+    path = tmp_path / "trace.json"
+    with TraceWriter(str(path)) as writer:
+        pass
+    assert writer.written == 0
+    assert all(event['ph'] == 'M' for event in _events(path))
+
+
+def _next_switch(ppuc, timeout=5):
+    deadline = time.monotonic() + timeout
+    while (event := ppuc.get_next_switch_state()) is None and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return event
+
+
+def test_handle_created_before_tracing(ppuc, fake, tmp_path):
+    fake.set_devices(coils=[(1, 2, 0, 78, "Flipper")], lamps=[(1, 0, 0, 21, "8K-BONUS")])
+    lamp = ppuc.lamp("8K-BONUS")
+    coil = ppuc.coil("Flipper")
+    path = tmp_path / "trace.json"
+    ppuc.enable_tracing(str(path))
+    lamp.on()
+    coil.on()
+    ppuc.disable_tracing()
+    # Nach dem Trace gehen die Handles wieder direkt an die Bibliothek
+    lamp.off()
+    events = [event for event in _events(path) if event['ph'] != 'M']
+    assert [event['args'] for event in events] == [{'number': 21, 'state': 1}, {'number': 78, 'state': 1}]
+    assert fake.instance().lamps[21] == 0
+
+
+def test_pump_started_before_tracing(ppuc, fake, tmp_path):
+    ppuc.start_switch_pump()
+    path = tmp_path / "trace.json"
+    ppuc.enable_tracing(str(path))
+    fake.push_switch_state(3, 1)
+    assert _next_switch(ppuc) == (3, 1)
+    ppuc.disable_tracing()
+    ppuc.stop_switch_pump()
+    events = [event for event in _events(path) if event['ph'] != 'M']
+    assert [(event['tid'], event['args']) for event in events] == [(TRACK_SWITCH, {'number': 3, 'state': 1})]